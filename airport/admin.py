@@ -9,6 +9,15 @@ from airport.models import (
     Flight,
     Order,
     Ticket,
+    Schedule,
+    IdempotencyKey,
+    OrderRequest,
+    SeatHold,
+    ArchivedFlight,
+    ArchivedTicket,
+    TravelStats,
+    RequestProfile,
+    Tombstone,
 )
 
 admin.site.register(Airport)
@@ -19,3 +28,12 @@ admin.site.register(Crew)
 admin.site.register(Flight)
 admin.site.register(Order)
 admin.site.register(Ticket)
+admin.site.register(Schedule)
+admin.site.register(IdempotencyKey)
+admin.site.register(OrderRequest)
+admin.site.register(SeatHold)
+admin.site.register(ArchivedFlight)
+admin.site.register(ArchivedTicket)
+admin.site.register(TravelStats)
+admin.site.register(RequestProfile)
+admin.site.register(Tombstone)
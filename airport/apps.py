@@ -2,5 +2,71 @@ from django.apps import AppConfig
 
 
 class AirportConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'airport'
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "airport"
+
+    def ready(self):
+        from django.db.models.signals import (
+            m2m_changed,
+            post_delete,
+            post_save,
+            pre_delete,
+        )
+
+        from airport.autocomplete import airport_deleted, airport_saved
+        from airport.coalescing import flights_changed
+        from airport.geo import airport_changed
+        from airport import travel_stats
+        from airport.models import Airport, Crew, Flight, Order, Ticket
+        from airport.seat_events import ticket_deleted, ticket_saved
+        from airport.sync import (
+            KIND_OF_MODEL,
+            crew_deleted,
+            flight_crew_changed,
+            object_deleted,
+        )
+
+        post_save.connect(ticket_saved, sender=Ticket, dispatch_uid="seat_taken")
+        post_delete.connect(ticket_deleted, sender=Ticket, dispatch_uid="seat_released")
+        post_save.connect(
+            airport_saved, sender=Airport, dispatch_uid="autocomplete_index"
+        )
+        post_delete.connect(
+            airport_deleted, sender=Airport, dispatch_uid="autocomplete_unindex"
+        )
+        post_save.connect(
+            airport_changed, sender=Airport, dispatch_uid="geo_index_save"
+        )
+        post_delete.connect(
+            airport_changed, sender=Airport, dispatch_uid="geo_index_delete"
+        )
+        for signal, sender, uid in (
+            (post_save, Flight, "flight_lists_flight_saved"),
+            (post_delete, Flight, "flight_lists_flight_deleted"),
+            (m2m_changed, Flight.crew.through, "flight_lists_crew_changed"),
+            (post_save, Ticket, "flight_lists_ticket_saved"),
+            (post_delete, Ticket, "flight_lists_ticket_deleted"),
+        ):
+            signal.connect(flights_changed, sender=sender, dispatch_uid=uid)
+        for model, kind in KIND_OF_MODEL.items():
+            post_delete.connect(
+                object_deleted, sender=model, dispatch_uid=f"sync_{kind}_deleted"
+            )
+        m2m_changed.connect(
+            flight_crew_changed,
+            sender=Flight.crew.through,
+            dispatch_uid="sync_flight_crew_changed",
+        )
+        pre_delete.connect(
+            crew_deleted, sender=Crew, dispatch_uid="sync_crew_flights_changed"
+        )
+        pre_delete.connect(
+            travel_stats.ticket_deleted,
+            sender=Ticket,
+            dispatch_uid="travel_stats_ticket_deleted",
+        )
+        pre_delete.connect(
+            travel_stats.order_deleted,
+            sender=Order,
+            dispatch_uid="travel_stats_order_deleted",
+        )
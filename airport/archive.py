@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from airport.models import ArchivedFlight, ArchivedTicket, Flight, Ticket
+
+
+def archive_after():
+    return getattr(settings, "AIRPORT_ARCHIVE_AFTER", timedelta(days=30))
+
+
+def ensure_partitions(years):
+    """Create yearly archive partitions on PostgreSQL (see 0012_partition_archive)."""
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        for model in (ArchivedFlight, ArchivedTicket):
+            table = model._meta.db_table
+            for year in sorted(years):
+                cursor.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{table}_{year}" '
+                    f'PARTITION OF "{table}" FOR VALUES '
+                    f"FROM ('{year}-01-01 00:00:00+00') "
+                    f"TO ('{year + 1}-01-01 00:00:00+00')"
+                )
+
+
+def archive_batch(cutoff, batch_size=500):
+    """
+    Move up to batch_size flights that landed before cutoff, with their
+    tickets, into the archive tables in one transaction.
+
+    Rows keep their ids, so orders and clients referencing them stay
+    valid. Returns the number of flights archived.
+    """
+    with transaction.atomic():
+        flights = Flight.objects.filter(arrival_time__lt=cutoff).order_by(
+            "departure_time", "id"
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            flights = flights.select_for_update(skip_locked=True)
+        flights = list(flights[:batch_size])
+        if not flights:
+            return 0
+        flight_ids = [flight.id for flight in flights]
+        ensure_partitions({flight.departure_time.year for flight in flights})
+
+        crew = {}
+        for flight_id, crew_id in Flight.crew.through.objects.filter(
+            flight_id__in=flight_ids
+        ).values_list("flight_id", "crew_id"):
+            crew.setdefault(flight_id, []).append(crew_id)
+        ArchivedFlight.objects.bulk_create(
+            [
+                ArchivedFlight(
+                    id=flight.id,
+                    route_id=flight.route_id,
+                    airplane_id=flight.airplane_id,
+                    departure_time=flight.departure_time,
+                    arrival_time=flight.arrival_time,
+                    crew_ids=sorted(crew.get(flight.id, [])),
+                )
+                for flight in flights
+            ]
+        )
+
+        departures = {flight.id: flight.departure_time for flight in flights}
+        tickets = Ticket.objects.filter(flight_id__in=flight_ids)
+        ArchivedTicket.objects.bulk_create(
+            [
+                ArchivedTicket(
+                    id=ticket_id,
+                    row=row,
+                    seat=seat,
+                    flight_id=flight_id,
+                    order_id=order_id,
+                    departure_time=departures[flight_id],
+                )
+                for ticket_id, row, seat, flight_id, order_id in tickets.values_list(
+                    "id", "row", "seat", "flight_id", "order_id"
+                )
+            ]
+        )
+        # A plain delete() would fire post_delete per ticket and log a
+        # "released" seat event for a flight that is about to disappear
+        tickets._raw_delete(tickets.db)
+        Flight.objects.filter(id__in=flight_ids).delete()
+    return len(flights)
@@ -0,0 +1,218 @@
+import heapq
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from airport.models import Airport
+
+VERSION_CACHE_KEY = "airport:autocomplete:version"
+RESULTS_CACHE_SIZE = 4096
+
+
+def normalize(text):
+    """Casefold and strip accents so "Zürich" matches "zur"."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    return "".join(char if char.isalnum() else " " for char in normalize(text)).split()
+
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class AirportIndex:
+    """
+    In-memory prefix and trigram index over airport names and cities.
+
+    Prefix lookups bisect a sorted list of (token, airport id) pairs;
+    queries with no prefix hit fall back to trigram overlap, which
+    tolerates typos. All airports are held as plain tuples, so a lookup
+    touches no database and no model instances.
+    """
+
+    def __init__(self, airports=()):
+        self.entries = {}
+        self.folded = {}
+        self.tokens = []
+        self.grams = defaultdict(set)
+        self.results = {}
+        for airport_id, name, city in airports:
+            self._add(airport_id, name, city)
+        self.tokens.sort()
+
+    def _add(self, airport_id, name, city):
+        self.entries[airport_id] = (name, city)
+        name_words = tokenize(name)
+        words = frozenset(name_words + tokenize(city))
+        self.folded[airport_id] = (normalize(name), normalize(city), name_words, words)
+        for token in words:
+            self.tokens.append((token, airport_id))
+            for gram in trigrams(token):
+                self.grams[gram].add(airport_id)
+
+    def add(self, airport_id, name, city):
+        self.results.clear()
+        self.remove(airport_id)
+        self._add(airport_id, name, city)
+        self.tokens.sort()
+
+    def remove(self, airport_id):
+        if airport_id not in self.entries:
+            return
+        self.results.clear()
+        for token in self.folded[airport_id][3]:
+            position = bisect_left(self.tokens, (token, airport_id))
+            if self.tokens[position : position + 1] == [(token, airport_id)]:
+                del self.tokens[position]
+            for gram in trigrams(token):
+                self.grams[gram].discard(airport_id)
+        del self.entries[airport_id]
+        del self.folded[airport_id]
+
+    def _span(self, prefix):
+        start = bisect_left(self.tokens, (prefix,))
+        end = bisect_left(self.tokens, (prefix + "\U0010ffff",), start)
+        return start, end
+
+    def _matches(self, words):
+        # Walk only the narrowest prefix range; other words are checked
+        # against each candidate's own tokens
+        spans = sorted(
+            ((self._span(word), word) for word in words),
+            key=lambda item: item[0][1] - item[0][0],
+        )
+        (start, end), _ = spans[0]
+        candidates = {airport_id for _, airport_id in self.tokens[start:end]}
+        for _, word in spans[1:]:
+            candidates = {
+                airport_id
+                for airport_id in candidates
+                if any(token.startswith(word) for token in self.folded[airport_id][3])
+            }
+        return candidates
+
+    def _rank(self, airport_id, query, first_word):
+        name, city, name_words, _ = self.folded[airport_id]
+        return (
+            not name.startswith(query),
+            not any(word.startswith(first_word) for word in name_words),
+            not city.startswith(query),
+            len(name),
+            name,
+        )
+
+    def search(self, query, limit=10):
+        words = tokenize(query)
+        if not words:
+            return []
+        # Short prefixes match most airports and are also the most
+        # repeated, so ranked results are memoized until the next change
+        key = (tuple(words), limit)
+        cached = self.results.get(key)
+        if cached is not None:
+            return cached
+        matches = self._matches(words)
+        normalized = " ".join(words)
+        if matches:
+            ranked = heapq.nsmallest(
+                limit, matches, key=lambda item: self._rank(item, normalized, words[0])
+            )
+        else:
+            ranked = self._fuzzy(words)[:limit]
+        if len(self.results) >= RESULTS_CACHE_SIZE:
+            self.results.clear()
+        result = self.results[key] = [
+            (airport_id, *self.entries[airport_id]) for airport_id in ranked
+        ]
+        return result
+
+    def _fuzzy(self, words, threshold=0.3):
+        query_grams = set().union(*(trigrams(word) for word in words))
+        scores = defaultdict(int)
+        for gram in query_grams:
+            for airport_id in self.grams.get(gram, ()):
+                scores[airport_id] += 1
+        minimum = max(1, int(len(query_grams) * threshold))
+        return [
+            airport_id
+            for airport_id, score in sorted(
+                scores.items(), key=lambda item: (-item[1], item[0])
+            )
+            if score >= minimum
+        ]
+
+
+_lock = threading.Lock()
+_state = {"index": None, "version": None, "built_at": 0.0}
+
+
+def _version():
+    return cache.get(VERSION_CACHE_KEY, 0)
+
+
+def get_index():
+    """
+    Return the process-wide index, building it on first use.
+
+    Other processes learn about changes through a version counter in the
+    cache; the index is also rebuilt after AIRPORT_AUTOCOMPLETE_MAX_AGE
+    seconds as a safety net for caches not shared between workers.
+    """
+    max_age = getattr(settings, "AIRPORT_AUTOCOMPLETE_MAX_AGE", 300)
+    version = _version()
+    state = _state
+    if (
+        state["index"] is None
+        or state["version"] != version
+        or time.monotonic() - state["built_at"] > max_age
+    ):
+        with _lock:
+            airports = Airport.objects.values_list("id", "name", "closest_big_city")
+            state["index"] = AirportIndex(airports.iterator())
+            state["version"] = version
+            state["built_at"] = time.monotonic()
+    return state["index"]
+
+
+def _bump_version():
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
+    if _state["index"] is not None:
+        _state["version"] = _version()
+
+
+def airport_saved(sender, instance, **kwargs):
+    entry = (instance.id, instance.name, instance.closest_big_city)
+
+    def apply():
+        if _state["index"] is not None:
+            with _lock:
+                _state["index"].add(*entry)
+        _bump_version()
+
+    transaction.on_commit(apply)
+
+
+def airport_deleted(sender, instance, **kwargs):
+    # The pk is cleared once delete() returns, before the commit hook runs
+    airport_id = instance.id
+
+    def apply():
+        if _state["index"] is not None:
+            with _lock:
+                _state["index"].remove(airport_id)
+        _bump_version()
+
+    transaction.on_commit(apply)
@@ -0,0 +1,283 @@
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.db.models.signals import post_save
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.serializers import as_serializer_error
+
+IDS_PARAM = "ids"
+MAX_BATCH_IDS = 100
+MAX_BATCH_CREATE = 1000
+PRELOADED_CONTEXT_KEY = "preloaded"
+MAX_ID = 2**63 - 1
+
+
+def parse_id(value):
+    """
+    The id in a query string value, or None if it is not a plain ASCII
+    number in the range of a primary key. ``str.isdigit`` alone would let
+    through characters such as "²" that ``int`` rejects.
+    """
+    if not (value.isascii() and value.isdigit()):
+        return None
+    number = int(value)
+    return number if 0 < number <= MAX_ID else None
+
+
+class BatchRetrieveMixin:
+    """
+    ``GET <list-url>/batch/?ids=1,2,3`` returning many detail representations.
+
+    All found objects are loaded with ``batch_queryset`` in one go, so the
+    query count does not depend on the number of ids. Items come back in
+    request order, each with its own status, so unknown or malformed ids
+    do not fail the whole call.
+    """
+
+    batch_queryset = None
+    batch_serializer_class = None
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name=IDS_PARAM,
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description=f"Comma-separated ids, at most {MAX_BATCH_IDS}. "
+                "Example: ?ids=1,2,3",
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False, url_path="batch")
+    def batch(self, request):
+        raw_ids = [
+            value.strip()
+            for value in request.query_params.get(IDS_PARAM, "").split(",")
+            if value.strip()
+        ]
+        if not raw_ids:
+            raise ValidationError({IDS_PARAM: "Provide at least one id."})
+        if len(raw_ids) > MAX_BATCH_IDS:
+            raise ValidationError(
+                {IDS_PARAM: f"At most {MAX_BATCH_IDS} ids per request."}
+            )
+
+        parsed = [(value, parse_id(value)) for value in raw_ids]
+        objects = self.batch_queryset.in_bulk(
+            [number for _, number in parsed if number is not None]
+        )
+        serializer_class = self.batch_serializer_class or self.get_serializer_class()
+        context = self.get_serializer_context()
+
+        items = []
+        for value, number in parsed:
+            if number is None:
+                items.append(
+                    {
+                        "id": value,
+                        "status": status.HTTP_400_BAD_REQUEST,
+                        "error": "Invalid id.",
+                    }
+                )
+                continue
+            instance = objects.get(number)
+            if instance is None:
+                items.append(
+                    {
+                        "id": number,
+                        "status": status.HTTP_404_NOT_FOUND,
+                        "error": "Not found.",
+                    }
+                )
+                continue
+            items.append(
+                {
+                    "id": instance.pk,
+                    "status": status.HTTP_200_OK,
+                    "data": serializer_class(instance, context=context).data,
+                }
+            )
+        return Response(items)
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field that resolves from objects loaded up front.
+
+    When the serializer context carries ``preloaded`` objects for the
+    field's model (see ``BatchCreateMixin``) the lookup is a dict access
+    instead of a query per value; otherwise it behaves like the stock
+    field.
+    """
+
+    def to_internal_value(self, data):
+        model = self.queryset.model
+        objects = self.context.get(PRELOADED_CONTEXT_KEY, {}).get(model)
+        if objects is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = model._meta.pk.to_python(data)
+        except (DjangoValidationError, TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return objects[pk]
+        except (KeyError, TypeError):
+            self.fail("does_not_exist", pk_value=data)
+
+
+def _related_fields(serializer):
+    """Yield (field name, field) for every preloadable relation."""
+    for name, field in serializer.fields.items():
+        if field.read_only:
+            continue
+        if isinstance(field, serializers.ManyRelatedField):
+            field = field.child_relation
+        if isinstance(field, PreloadedPrimaryKeyRelatedField):
+            yield name, field
+
+
+def preload_related(serializer, items):
+    """
+    Load every object referenced by ``items`` with one query per model.
+
+    Returns {model: {pk: instance}} to be put in the serializer context.
+    """
+    wanted = defaultdict(set)
+    querysets = {}
+    for name, field in _related_fields(serializer):
+        model = field.get_queryset().model
+        querysets.setdefault(model, field.get_queryset())
+        for item in items:
+            if not isinstance(item, dict) or item.get(name) is None:
+                continue
+            values = item[name] if isinstance(item[name], list) else [item[name]]
+            for value in values:
+                if isinstance(value, bool):
+                    continue
+                try:
+                    wanted[model].add(model._meta.pk.to_python(value))
+                except (DjangoValidationError, TypeError, ValueError):
+                    continue
+    return {
+        model: queryset.in_bulk(wanted[model]) if wanted[model] else {}
+        for model, queryset in querysets.items()
+    }
+
+
+class BatchCreateMixin:
+    """
+    ``POST <list-url>`` with a JSON array creates many objects at once.
+
+    Referenced objects are loaded once for the whole array, every item is
+    validated by a single serializer instance, and the valid ones are
+    written with one ``bulk_create`` per table, many-to-many links
+    included. ``post_save`` is sent for each created row so receivers
+    (search indexes and the like) see them as if saved one by one.
+
+    Each item is reported in request order with its own status; the call
+    answers 201 when everything was created, 400 when nothing was and 207
+    otherwise. A single object keeps the usual create behaviour.
+    """
+
+    def get_batch_context(self, items):
+        """Extra serializer context shared by all items of a batch."""
+        return {}
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        items = request.data
+        if not items:
+            raise ValidationError("Provide at least one item.")
+        if len(items) > MAX_BATCH_CREATE:
+            raise ValidationError(f"At most {MAX_BATCH_CREATE} items per request.")
+
+        serializer = self.get_serializer()
+        context = serializer.context
+        context[PRELOADED_CONTEXT_KEY] = preload_related(serializer, items)
+        context.update(self.get_batch_context(items))
+
+        results = [None] * len(items)
+        valid = []
+        for position, item in enumerate(items):
+            context["batch_item"] = position
+            try:
+                valid.append((position, serializer.run_validation(item)))
+            except ValidationError as exc:
+                results[position] = {
+                    "index": position,
+                    "status": status.HTTP_400_BAD_REQUEST,
+                    "errors": as_serializer_error(exc),
+                }
+
+        if valid:
+            with transaction.atomic():
+                instances = self.bulk_create_items([attrs for _, attrs in valid])
+            for (position, _), instance in zip(valid, instances):
+                results[position] = {
+                    "index": position,
+                    "status": status.HTTP_201_CREATED,
+                    "id": instance.pk,
+                    "data": serializer.to_representation(instance),
+                }
+
+        if len(valid) == len(items):
+            response_status = status.HTTP_201_CREATED
+        elif valid:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(results, status=response_status)
+
+    def bulk_create_items(self, validated):
+        """Insert validated items and their many-to-many links."""
+        model = self.get_queryset().model
+        many_to_many = [
+            field
+            for field in model._meta.many_to_many
+            if any(field.name in attrs for attrs in validated)
+        ]
+        instances = model.objects.bulk_create(
+            [
+                model(
+                    **{
+                        name: value
+                        for name, value in attrs.items()
+                        if name not in {field.name for field in many_to_many}
+                    }
+                )
+                for attrs in validated
+            ]
+        )
+        for field in many_to_many:
+            through = field.remote_field.through
+            source = f"{field.m2m_field_name()}_id"
+            target = f"{field.m2m_reverse_field_name()}_id"
+            through.objects.bulk_create(
+                [
+                    through(**{source: instance.pk, target: related.pk})
+                    for instance, attrs in zip(instances, validated)
+                    for related in attrs.get(field.name, ())
+                ]
+            )
+        if many_to_many:
+            prefetch_related_objects(instances, *(field.name for field in many_to_many))
+        for instance in instances:
+            post_save.send(
+                sender=model,
+                instance=instance,
+                created=True,
+                update_fields=None,
+                raw=False,
+                using=instance._state.db,
+            )
+        return instances
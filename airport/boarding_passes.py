@@ -0,0 +1,341 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from PIL import Image, ImageDraw, ImageFont
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+
+from airport.batch import IDS_PARAM, MAX_BATCH_IDS, parse_id
+from airport.models import Flight, Ticket
+
+FORMATS = {"png": "PNG", "pdf": "PDF"}
+PASS_FORMAT_PARAM = "pass_format"
+PASS_FORMAT_PARAMETER = OpenApiParameter(
+    name=PASS_FORMAT_PARAM,
+    type=OpenApiTypes.STR,
+    location=OpenApiParameter.QUERY,
+    enum=list(FORMATS),
+    description="png (default) or pdf. Example: ?pass_format=pdf",
+)
+CACHE_PREFIX = "airport:boarding_pass"
+# Bump when the layout changes so cached passes are rendered again
+LAYOUT_VERSION = 1
+SIZE = (900, 320)
+STUB_X = 660
+SEAT_LETTERS = "ABCDEFGHJK"
+HEADER_COLOR = (18, 52, 110)
+TIME_FORMAT = "%d %b %Y %H:%M"
+
+
+def seat_label(row, seat):
+    letter = SEAT_LETTERS[seat - 1] if seat <= len(SEAT_LETTERS) else f"-{seat}"
+    return f"{row}{letter}"
+
+
+def pass_data(ticket):
+    """Everything printed on a ticket's boarding pass, as plain data."""
+    flight = ticket.flight
+    route = flight.route
+    user = ticket.order.user
+    departure = timezone.localtime(flight.departure_time)
+    return {
+        "ticket": ticket.id,
+        "flight": flight.id,
+        "passenger": user.get_full_name() or user.email,
+        "source": route.source.name,
+        "source_city": route.source.closest_big_city,
+        "destination": route.destination.name,
+        "destination_city": route.destination.closest_big_city,
+        "departure": departure.strftime(TIME_FORMAT),
+        "arrival": timezone.localtime(flight.arrival_time).strftime(TIME_FORMAT),
+        "seat": seat_label(ticket.row, ticket.seat),
+    }
+
+
+def fingerprint(data, format):
+    """Cache key part that changes whenever anything printed changes."""
+    raw = json.dumps([LAYOUT_VERSION, format, data], sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def file_name(data, format):
+    return f"flight-{data['flight']}/{data['seat']}-ticket-{data['ticket']}.{format}"
+
+
+# Fonts and the blank pass, built once per process (each pool worker has
+# its own) instead of once per pass
+_state = {}
+
+
+def _load_fonts(font_path=None):
+    def font(size):
+        if font_path:
+            return ImageFont.truetype(font_path, size)
+        return ImageFont.load_default(size)
+
+    return {"label": font(14), "value": font(24), "large": font(40)}
+
+
+def _build_template(fonts):
+    image = Image.new("RGB", SIZE, "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, SIZE[0], 56), fill=HEADER_COLOR)
+    draw.text((24, 12), "BOARDING PASS", font=fonts["value"], fill="white")
+    draw.line((STUB_X, 70, STUB_X, SIZE[1] - 16), fill="gray", width=2)
+    for position, label in (
+        ((24, 72), "PASSENGER"),
+        ((24, 140), "FROM"),
+        ((340, 140), "TO"),
+        ((24, 236), "DEPARTURE"),
+        ((340, 236), "ARRIVAL"),
+        ((STUB_X + 24, 72), "SEAT"),
+        ((STUB_X + 24, 160), "FLIGHT"),
+    ):
+        draw.text(position, label, font=fonts["label"], fill="gray")
+    return image
+
+
+def init_worker(font_path=None):
+    fonts = _load_fonts(font_path)
+    _state["fonts"] = fonts
+    _state["template"] = _build_template(fonts)
+
+
+def render(data, format="png"):
+    """Bytes of one boarding pass as PNG or PDF."""
+    if "template" not in _state:
+        init_worker(getattr(settings, "AIRPORT_BOARDING_PASS_FONT", None))
+    fonts = _state["fonts"]
+    image = _state["template"].copy()
+    draw = ImageDraw.Draw(image)
+
+    draw.text((24, 92), data["passenger"], font=fonts["value"], fill="black")
+    draw.text((24, 160), data["source"], font=fonts["value"], fill="black")
+    draw.text((24, 192), data["source_city"], font=fonts["label"], fill="gray")
+    draw.text((340, 160), data["destination"], font=fonts["value"], fill="black")
+    draw.text((340, 192), data["destination_city"], font=fonts["label"], fill="gray")
+    draw.text((24, 256), data["departure"], font=fonts["value"], fill="black")
+    draw.text((340, 256), data["arrival"], font=fonts["value"], fill="black")
+    draw.text((STUB_X + 24, 92), data["seat"], font=fonts["large"], fill="black")
+    draw.text(
+        (STUB_X + 24, 180), f"#{data['flight']}", font=fonts["value"], fill="black"
+    )
+
+    # Stripes drawn from the ticket number, for scanners at the gate
+    code = f"{data['ticket']:012d}"
+    x = STUB_X + 24
+    for digit in code:
+        for bit in f"{int(digit):04b}":
+            width = 3 if bit == "1" else 1
+            draw.rectangle((x, 240, x + width - 1, 296), fill="black")
+            x += width + 2
+
+    output = io.BytesIO()
+    image.save(output, FORMATS[format])
+    return output.getvalue()
+
+
+def pool_size():
+    return getattr(settings, "AIRPORT_BOARDING_PASS_WORKERS", None) or os.cpu_count()
+
+
+@contextmanager
+def render_pool():
+    """
+    Process pool for ``render_many`` in batch jobs such as
+    render_boarding_passes, each worker loading the fonts once.
+
+    Not for web workers: forking a threaded server process would copy its
+    listening socket, database connections and signal handlers into every
+    child, and each server worker would start a pool of its own.
+    """
+    # Children must not inherit, and later close, this process's
+    # connections (one inside a transaction has to stay open)
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close()
+    with ProcessPoolExecutor(
+        max_workers=pool_size(),
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=init_worker,
+        initargs=(getattr(settings, "AIRPORT_BOARDING_PASS_FONT", None),),
+    ) as pool:
+        yield pool
+
+
+def render_many(passes, format="png", pool=None):
+    """
+    Rendered bytes for each pass data, in order.
+
+    Passes are cached by fingerprint, so only those whose ticket, flight,
+    route or passenger changed since the last batch are rendered. Given a
+    ``render_pool``, batches of at least AIRPORT_BOARDING_PASS_POOL_MIN
+    passes are rendered there; everything else in this process.
+    """
+    keys = [f"{CACHE_PREFIX}:{fingerprint(data, format)}" for data in passes]
+    found = cache.get_many(keys)
+    missing = [(key, data) for key, data in zip(keys, passes) if key not in found]
+
+    if missing:
+        work = partial(render, format=format)
+        datas = [data for _, data in missing]
+        if pool is not None and len(missing) >= getattr(
+            settings, "AIRPORT_BOARDING_PASS_POOL_MIN", 32
+        ):
+            chunk = max(1, len(datas) // (4 * pool_size()))
+            rendered = list(pool.map(work, datas, chunksize=chunk))
+        else:
+            rendered = [work(data) for data in datas]
+        new = {key: content for (key, _), content in zip(missing, rendered)}
+        cache.set_many(new, getattr(settings, "AIRPORT_BOARDING_PASS_CACHE_TTL", 86400))
+        found.update(new)
+    return [found[key] for key in keys]
+
+
+def flight_tickets(flight_ids):
+    return (
+        Ticket.objects.filter(flight_id__in=flight_ids)
+        .select_related(
+            "flight__route__source",
+            "flight__route__destination",
+            "order__user",
+        )
+        .order_by("flight_id", "row", "seat")
+    )
+
+
+def build_archive(flight_ids, format="png", pool=None):
+    """
+    Return (zip bytes, etag) with a boarding pass for every ticket of the
+    given flights. The archive is cached under the fingerprints of its
+    passes, so it is rebuilt only after a ticket is added, changed or
+    removed (or anything printed on one changes).
+    """
+    passes = [pass_data(ticket) for ticket in flight_tickets(flight_ids)]
+    digest = hashlib.sha1(format.encode("utf-8"))
+    for data in passes:
+        digest.update(fingerprint(data, format).encode("utf-8"))
+    etag = digest.hexdigest()
+    archive_key = f"{CACHE_PREFIX}:archive:{etag}"
+
+    archive = cache.get(archive_key)
+    if archive is None:
+        output = io.BytesIO()
+        # PNG and PDF are compressed already
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as zip_file:
+            for data, content in zip(passes, render_many(passes, format, pool)):
+                zip_file.writestr(file_name(data, format), content)
+        archive = output.getvalue()
+        cache.set(
+            archive_key,
+            archive,
+            getattr(settings, "AIRPORT_BOARDING_PASS_CACHE_TTL", 86400),
+        )
+    return archive, etag
+
+
+def archive_response(request, flight_ids, format):
+    archive, etag = build_archive(flight_ids, format)
+    etag = f'"{etag}"'
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = HttpResponse(archive, content_type="application/zip")
+        name = "-".join(str(flight_id) for flight_id in flight_ids[:5])
+        response["Content-Disposition"] = (
+            f'attachment; filename="boarding-passes-{name}.zip"'
+        )
+    response["ETag"] = etag
+    return response
+
+
+class BoardingPassMixin:
+    """
+    Staff-only zip archives of boarding passes for every ticket of one
+    flight (``<detail-url>/boarding-passes/``) or of several
+    (``<list-url>/boarding-passes/?ids=1,2``), as PNG or, with
+    ``?pass_format=pdf``, PDF. Archives carry an ETag, so airlines polling
+    before departure download one again only after tickets changed.
+    """
+
+    @staticmethod
+    def get_pass_format(request):
+        format = request.query_params.get(PASS_FORMAT_PARAM, "png")
+        if format not in FORMATS:
+            raise ValidationError({PASS_FORMAT_PARAM: f"One of: {', '.join(FORMATS)}."})
+        return format
+
+    @extend_schema(
+        operation_id="airport_flights_boarding_passes_retrieve",
+        parameters=[PASS_FORMAT_PARAMETER],
+        responses={(200, "application/zip"): OpenApiTypes.BINARY},
+    )
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="boarding-passes",
+        permission_classes=[IsAdminUser],
+    )
+    def boarding_passes(self, request, pk=None):
+        """Boarding passes of every ticket of this flight, zipped."""
+        format = self.get_pass_format(request)
+        flight = get_object_or_404(Flight.objects.only("id"), pk=pk)
+        return archive_response(request, [flight.id], format)
+
+    @extend_schema(
+        operation_id="airport_flights_boarding_passes_batch_retrieve",
+        parameters=[
+            PASS_FORMAT_PARAMETER,
+            OpenApiParameter(
+                name=IDS_PARAM,
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description=f"Comma-separated flight ids, at most "
+                f"{MAX_BATCH_IDS}. Example: ?ids=1,2,3",
+            ),
+        ],
+        responses={(200, "application/zip"): OpenApiTypes.BINARY},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="boarding-passes",
+        permission_classes=[IsAdminUser],
+    )
+    def batch_boarding_passes(self, request):
+        """Boarding passes of every ticket of the given flights, zipped."""
+        format = self.get_pass_format(request)
+        raw_ids = [
+            value.strip()
+            for value in request.query_params.get(IDS_PARAM, "").split(",")
+            if value.strip()
+        ]
+        parsed = [parse_id(value) for value in raw_ids]
+        if not parsed or None in parsed:
+            raise ValidationError({IDS_PARAM: "Provide comma-separated flight ids."})
+        if len(parsed) > MAX_BATCH_IDS:
+            raise ValidationError(
+                {IDS_PARAM: f"At most {MAX_BATCH_IDS} ids per request."}
+            )
+        ids = sorted(set(parsed))
+        found = set(Flight.objects.filter(id__in=ids).values_list("id", flat=True))
+        if missing := [flight_id for flight_id in ids if flight_id not in found]:
+            raise ValidationError({IDS_PARAM: f"Unknown flights: {missing}."})
+        return archive_response(request, ids, format)
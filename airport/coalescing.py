@@ -0,0 +1,337 @@
+import hashlib
+import logging
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from airport.query_guards import statement_timeout
+from airport.streaming import wants_stream
+
+logger = logging.getLogger(__name__)
+
+CACHE_STATUS_HEADER = "X-Cache"
+VERSION_CACHE_KEY = "airport:flights:version"
+
+
+class ServiceUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Flight search is temporarily unavailable, try again shortly."
+    default_code = "service_unavailable"
+
+    def __init__(self, wait=None):
+        super().__init__()
+        # Sent as Retry-After by the DRF exception handler
+        self.wait = wait
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time in this process; callers
+    arriving while it runs wait for it and share its result or error.
+    """
+
+    class Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        """Return (result, shared) where shared means another caller ran it."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self.Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = func()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class CircuitBreaker:
+    """
+    Stop sending work to a degraded database.
+
+    ``failures`` consecutive errors or slow calls (longer than ``slow``
+    seconds) open the breaker for ``cooldown`` seconds. After that one
+    trial call is let through: success closes the breaker, failure keeps
+    it open for another cooldown.
+    """
+
+    def __init__(self, failures=5, cooldown=30.0, slow=2.0):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.slow = slow
+        self._lock = threading.Lock()
+        self._failed = 0
+        self._opened_at = None
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def retry_after(self):
+        if self._opened_at is None:
+            return 0
+        return max(0.0, self._opened_at + self.cooldown - time.monotonic())
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            # Half open: this caller is the trial, everyone else waits
+            # for another cooldown unless it succeeds
+            self._opened_at = time.monotonic()
+            return True
+
+    def record(self, ok, seconds=0.0):
+        with self._lock:
+            if ok and seconds <= self.slow:
+                self._failed = 0
+                self._opened_at = None
+                return
+            self._failed += 1
+            if self._failed >= self.failures:
+                if self._opened_at is None:
+                    logger.warning(
+                        "circuit breaker open after %s failures", self._failed
+                    )
+                self._opened_at = time.monotonic()
+
+
+class Coalescer:
+    """
+    Cached, coalesced and degradation-tolerant computation of list data.
+
+    Entries live in the Django cache as (data, version, computed_at):
+
+    * fresh (same version, younger than AIRPORT_FLIGHT_LIST_FRESH): served
+    * stale (older, or the version moved on) but younger than
+      AIRPORT_FLIGHT_LIST_STALE: served at once while one refresh runs in
+      a background thread
+    * missing or older: computed, with concurrent identical requests in
+      this process waiting for a single computation
+
+    While the circuit breaker is open the database is not queried: any
+    entry still in the cache is served however old, otherwise the request
+    fails with 503. Entries, the version and refresh claims (``cache.add``)
+    reach other serve workers only when the cache is shared between
+    processes, i.e. with REDIS_URL set; SingleFlight itself coalesces the
+    threads of one worker.
+    """
+
+    def __init__(self, prefix, breaker=None, background=True):
+        self.prefix = prefix
+        self.breaker = breaker
+        self.background = background
+        self.single_flight = SingleFlight()
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+
+    def get_breaker(self):
+        if self.breaker is None:
+            self.breaker = CircuitBreaker(
+                failures=getattr(settings, "AIRPORT_DB_BREAKER_FAILURES", 5),
+                cooldown=getattr(settings, "AIRPORT_DB_BREAKER_COOLDOWN", 30),
+                slow=getattr(settings, "AIRPORT_DB_BREAKER_SLOW", 2.0),
+            )
+        return self.breaker
+
+    def get(self, key, compute, refresh=None):
+        """
+        Return (data, cache status) for ``key``. ``refresh`` is run instead
+        of ``compute`` by background refreshes, which are on a thread (and
+        database connection) of their own; by default ``compute``.
+        """
+        fresh = getattr(settings, "AIRPORT_FLIGHT_LIST_FRESH", 5)
+        stale = getattr(settings, "AIRPORT_FLIGHT_LIST_STALE", 300)
+        breaker = self.get_breaker()
+        cache_key = f"{self.prefix}:{key}"
+        version = cache.get(VERSION_CACHE_KEY, 0)
+        entry = cache.get(cache_key)
+
+        if entry is not None:
+            data, entry_version, computed_at = entry
+            age = time.time() - computed_at
+            if entry_version == version and age < fresh:
+                return data, "HIT"
+            if age < stale or breaker.is_open:
+                if breaker.allow():
+                    self._refresh(cache_key, version, refresh or compute)
+                return data, "STALE"
+
+        if not breaker.allow():
+            raise ServiceUnavailable(wait=round(breaker.retry_after()) or 1)
+        try:
+            data, shared = self.single_flight.do(
+                cache_key, lambda: self._compute(cache_key, version, compute)
+            )
+        except DatabaseError:
+            if entry is not None:
+                return entry[0], "STALE"
+            raise ServiceUnavailable(wait=round(breaker.retry_after()) or 1)
+        return data, "COALESCED" if shared else "MISS"
+
+    def _compute(self, cache_key, version, compute):
+        breaker = self.get_breaker()
+        start = time.monotonic()
+        try:
+            data = compute()
+        except DatabaseError:
+            breaker.record(False)
+            raise
+        breaker.record(True, time.monotonic() - start)
+        cache.set(
+            cache_key,
+            (data, version, time.time()),
+            getattr(settings, "AIRPORT_FLIGHT_LIST_STALE_IF_ERROR", 3600),
+        )
+        return data
+
+    def _refresh(self, cache_key, version, compute):
+        with self._refreshing_lock:
+            if cache_key in self._refreshing:
+                return
+            if not cache.add(f"{cache_key}:refreshing", 1, 30):
+                return
+            self._refreshing.add(cache_key)
+
+        def run():
+            try:
+                self._compute(cache_key, version, compute)
+            except Exception:
+                logger.exception("background refresh of %s failed", cache_key)
+            finally:
+                cache.delete(f"{cache_key}:refreshing")
+                with self._refreshing_lock:
+                    self._refreshing.discard(cache_key)
+                if self.background:
+                    connections.close_all()
+
+        if self.background:
+            threading.Thread(target=run, daemon=True).start()
+        else:
+            run()
+
+
+def request_key(request):
+    """Cache key part identifying the data a list request asks for."""
+    params = sorted(
+        (name, value)
+        for name in request.query_params
+        for value in request.query_params.getlist(name)
+    )
+    raw = f"{request.path}?{params}".encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+def refresh_view(viewset, url, user, auth, **initkwargs):
+    """
+    A new ``viewset`` with a new GET request for ``url`` made by ``user``,
+    for a background refresh to list through once the request that
+    triggered it has been answered.
+    """
+    url = urlsplit(url)
+    path = urlunsplit(("", "", url.path, url.query, ""))
+    request = Request(
+        APIRequestFactory().get(
+            path, HTTP_HOST=url.netloc, secure=url.scheme == "https"
+        )
+    )
+    request.user = user
+    request.auth = auth
+    return viewset(request=request, **initkwargs)
+
+
+class CoalescedListMixin:
+    """
+    Serve ``list`` through ``coalescer`` when AIRPORT_FLIGHT_LIST_CACHE is
+    enabled. The response says how it was produced in ``X-Cache``: HIT,
+    STALE, MISS or COALESCED. Streamed lists are never cached.
+    """
+
+    coalescer = None
+
+    def list(self, request, *args, **kwargs):
+        enabled = getattr(settings, "AIRPORT_FLIGHT_LIST_CACHE", False)
+        if not enabled or wants_stream(request):
+            return super().list(request, *args, **kwargs)
+
+        parent = super()
+
+        def compute():
+            return list(parent.list(request, *args, **kwargs).data)
+
+        # Background refreshes run on another thread and connection after
+        # this request has been answered, so they list through a request
+        # and view of their own, under the statement timeout dispatch set
+        # for this request
+        endpoint = f"{self.basename}-{self.action}"
+        milliseconds = None
+        if hasattr(self, "get_statement_timeout"):
+            milliseconds = self.get_statement_timeout(self.action)
+        viewset = type(self)
+        url, user, auth = request.build_absolute_uri(), request.user, request.auth
+        initkwargs = {
+            "basename": self.basename,
+            "action": self.action,
+            "action_map": self.action_map,
+            "detail": self.detail,
+            "args": args,
+            "kwargs": kwargs,
+            "format_kwarg": self.format_kwarg,
+        }
+
+        def refresh():
+            view = refresh_view(viewset, url, user, auth, **initkwargs)
+            with statement_timeout(endpoint, milliseconds):
+                response = super(CoalescedListMixin, view).list(
+                    view.request, *args, **kwargs
+                )
+                return list(response.data)
+
+        data, cache_status = self.coalescer.get(request_key(request), compute, refresh)
+        response = Response(data)
+        response[CACHE_STATUS_HEADER] = cache_status
+        return response
+
+
+def _bump_version():
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
+
+
+def flights_changed(sender, **kwargs):
+    transaction.on_commit(_bump_version)
+
+
+flight_lists = Coalescer("airport:flights:list")
@@ -0,0 +1,125 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+
+from airport.models import Flight
+
+FlightCrew = Flight.crew.through
+
+MAX_FLIGHT_DURATION = getattr(
+    settings, "AIRPORT_MAX_FLIGHT_DURATION", timedelta(hours=24)
+)
+
+
+class IntervalIndex:
+    """
+    Per-key interval index over [start, end) ranges.
+
+    Intervals of every key are kept sorted by start. Since no interval is
+    longer than ``max_length``, everything overlapping [start, end) starts
+    inside [start - max_length, end), so a lookup is two bisects plus a
+    scan of the few neighbours in that window.
+    """
+
+    def __init__(self, max_length=MAX_FLIGHT_DURATION):
+        self.max_length = max_length
+        self._starts = defaultdict(list)
+        self._items = defaultdict(list)
+
+    def add(self, key, start, end, value):
+        starts = self._starts[key]
+        position = bisect_right(starts, start)
+        starts.insert(position, start)
+        self._items[key].insert(position, (start, end, value))
+
+    def overlapping(self, key, start, end, exclude=None):
+        starts = self._starts.get(key)
+        if not starts:
+            return []
+        low = bisect_left(starts, start - self.max_length)
+        high = bisect_left(starts, end)
+        return [
+            value
+            for item_start, item_end, value in self._items[key][low:high]
+            if item_end > start and value != exclude
+        ]
+
+    def conflicts(self):
+        """Yield (key, value, other_value) for every overlapping pair."""
+        for key, items in self._items.items():
+            active = []
+            for start, end, value in items:
+                active = [item for item in active if item[0] > start]
+                for _, other in active:
+                    yield key, other, value
+                active.append((end, value))
+
+
+def build_indexes(flights=None):
+    """Return (airplane_index, crew_index) built from the given flights."""
+    if flights is None:
+        flights = Flight.objects.all()
+    airplane_index = IntervalIndex()
+    crew_index = IntervalIndex()
+    times = {}
+    for flight_id, airplane_id, departure, arrival in flights.values_list(
+        "id", "airplane_id", "departure_time", "arrival_time"
+    ):
+        times[flight_id] = (departure, arrival)
+        airplane_index.add(airplane_id, departure, arrival, flight_id)
+    for flight_id, crew_id in FlightCrew.objects.filter(
+        flight_id__in=flights.values("id")
+    ).values_list("flight_id", "crew_id"):
+        departure, arrival = times[flight_id]
+        crew_index.add(crew_id, departure, arrival, flight_id)
+    return airplane_index, crew_index
+
+
+def indexes_covering(windows):
+    """
+    (airplane_index, crew_index) of the flights that can overlap any of
+    the (departure, arrival) ``windows``, e.g. the items of a batch.
+    """
+    if not windows:
+        return IntervalIndex(), IntervalIndex()
+    return build_indexes(
+        Flight.objects.filter(
+            departure_time__lt=max(arrival for _, arrival in windows),
+            arrival_time__gt=min(departure for departure, _ in windows),
+        )
+    )
+
+
+def _window(departure, arrival):
+    return {
+        "departure_time__gt": departure - MAX_FLIGHT_DURATION,
+        "departure_time__lt": arrival,
+        "arrival_time__gt": departure,
+    }
+
+
+def airplane_conflicts(airplane_id, departure, arrival, exclude=None):
+    """Ids of flights of the airplane overlapping [departure, arrival)."""
+    return list(
+        Flight.objects.filter(airplane_id=airplane_id, **_window(departure, arrival))
+        .exclude(id=exclude)
+        .values_list("id", flat=True)
+    )
+
+
+def crew_conflicts(crew_ids, departure, arrival, exclude=None):
+    """Map crew id -> ids of its flights overlapping [departure, arrival)."""
+    found = defaultdict(list)
+    window = {
+        f"flight__{lookup}": value
+        for lookup, value in _window(departure, arrival).items()
+    }
+    for crew_id, flight_id in (
+        FlightCrew.objects.filter(crew_id__in=crew_ids, **window)
+        .exclude(flight_id=exclude)
+        .values_list("crew_id", "flight_id")
+    ):
+        found[crew_id].append(flight_id)
+    return dict(found)
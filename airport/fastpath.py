@@ -0,0 +1,217 @@
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import QuerySet
+from rest_framework import relations
+from rest_framework.response import Response
+
+from airport.fieldsets import is_sparse_request
+from airport.serializers import (
+    AirportSerializer,
+    RouteSerializer,
+    AirplaneTypeSerializer,
+    AirplaneSerializer,
+    CrewSerializer,
+    FlightListSerializer,
+)
+
+RELATED_CHUNK_SIZE = 2000
+
+
+def _identity(value):
+    return value
+
+
+class Computed:
+    """Field built in Python from one or more columns of the row."""
+
+    def __init__(self, columns, func):
+        self.columns = tuple(columns)
+        self.func = func
+
+
+class Many:
+    """To-many field built from columns of the related rows."""
+
+    def __init__(self, columns, func=_identity):
+        self.columns = tuple(columns)
+        self.func = func
+
+
+class FieldPlan:
+    """
+    Precompiled mapping from ``values_list()`` rows to serializer output.
+
+    The plan is derived once from the serializer's fields: plain model
+    fields become columns converted with the field's own
+    ``to_representation``, slug/pk relations become joined columns and
+    anything else has to be described with ``Computed``/``Many``. Rendering
+    then runs one column query plus one query per to-many field, without
+    model instances or per-row serializer machinery.
+    """
+
+    def __init__(self, serializer_class, **overrides):
+        self.serializer_class = serializer_class
+        self.columns = []
+        self.steps = []
+        self.many = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            spec = overrides.get(name) or self._spec_for(name, field)
+            if isinstance(spec, Many):
+                self.many.append((name, field.source, spec))
+                self.steps.append((name, None, None))
+                continue
+            if isinstance(spec, Computed):
+                indexes = tuple(self._column(column) for column in spec.columns)
+                self.steps.append((name, indexes, spec.func))
+            else:
+                self.steps.append((name, self._column(spec), self._converter(field)))
+        if self.many:
+            self._pk_index = self._column("pk")
+
+    def _column(self, column):
+        if column not in self.columns:
+            self.columns.append(column)
+        return self.columns.index(column)
+
+    @staticmethod
+    def _converter(field):
+        if isinstance(field, relations.RelatedField):
+            return _identity
+        to_representation = field.to_representation
+
+        def convert(value):
+            return None if value is None else to_representation(value)
+
+        return convert
+
+    def _spec_for(self, name, field):
+        source = field.source.replace(".", "__")
+        if isinstance(field, relations.ManyRelatedField):
+            child = field.child_relation
+            if isinstance(child, relations.SlugRelatedField):
+                return Many((child.slug_field,))
+            if isinstance(child, relations.PrimaryKeyRelatedField):
+                return Many(("pk",))
+        elif isinstance(field, relations.SlugRelatedField):
+            return f"{source}__{field.slug_field}"
+        elif isinstance(field, relations.PrimaryKeyRelatedField):
+            return source
+        elif not isinstance(field, relations.RelatedField):
+            return source
+        raise ImproperlyConfigured(
+            f"{self.serializer_class.__name__}.{name} needs an explicit "
+            f"Computed or Many spec for the fast path"
+        )
+
+    def _related(self, model, pks):
+        related = {}
+        for name, source, spec in self.many:
+            values = defaultdict(list)
+            lookups = [f"{source}__{column}" for column in spec.columns]
+            for start in range(0, len(pks), RELATED_CHUNK_SIZE):
+                rows = (
+                    model._default_manager.filter(
+                        pk__in=pks[start : start + RELATED_CHUNK_SIZE]
+                    )
+                    .order_by("pk", f"{source}__pk")
+                    .values_list("pk", *lookups)
+                )
+                for pk, *columns in rows:
+                    if all(column is None for column in columns):
+                        continue
+                    values[pk].append(spec.func(*columns))
+            related[name] = values
+        return related
+
+    def render(self, queryset):
+        return self.render_rows(
+            queryset.model, list(queryset.values_list(*self.columns))
+        )
+
+    def render_chunks(self, queryset, chunk_size):
+        """Yield rendered lists of at most chunk_size rows, streaming the rows."""
+        rows = queryset.values_list(*self.columns).iterator(chunk_size=chunk_size)
+        while chunk := list(islice(rows, chunk_size)):
+            yield self.render_rows(queryset.model, chunk)
+
+    def render_rows(self, model, rows):
+        related = {}
+        if self.many:
+            related = self._related(model, [row[self._pk_index] for row in rows])
+        data = []
+        for row in rows:
+            item = {}
+            for name, index, func in self.steps:
+                if index is None:
+                    item[name] = related[name].get(row[self._pk_index], [])
+                elif isinstance(index, tuple):
+                    item[name] = func(*(row[position] for position in index))
+                else:
+                    item[name] = func(row[index])
+            data.append(item)
+        return data
+
+
+def _route_str(source_name, source_city, destination_name):
+    return f"{source_name}({source_city}) - {destination_name}"
+
+
+def _full_name(first_name, last_name):
+    return f"{first_name} {last_name}"
+
+
+PLAN_SPECS = {
+    AirportSerializer: {},
+    RouteSerializer: {},
+    AirplaneTypeSerializer: {},
+    AirplaneSerializer: {},
+    CrewSerializer: {},
+    FlightListSerializer: {
+        "route": Computed(
+            (
+                "route__source__name",
+                "route__source__closest_big_city",
+                "route__destination__name",
+            ),
+            _route_str,
+        ),
+        "crew": Many(("first_name", "last_name"), _full_name),
+    },
+}
+
+_plans = {}
+
+
+def get_plan(serializer_class):
+    """Return the compiled plan for a serializer, or None if it has none."""
+    if serializer_class not in PLAN_SPECS:
+        return None
+    if serializer_class not in _plans:
+        _plans[serializer_class] = FieldPlan(
+            serializer_class, **PLAN_SPECS[serializer_class]
+        )
+    return _plans[serializer_class]
+
+
+class FastListMixin:
+    """
+    Serve ``list`` through a precompiled FieldPlan when AIRPORT_FAST_LIST
+    is enabled. Falls back to the regular serializer when the serializer
+    has no plan, the queryset was materialized or pagination is active.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(settings, "AIRPORT_FAST_LIST", False) or is_sparse_request(
+            request
+        ):
+            return super().list(request, *args, **kwargs)
+        plan = get_plan(self.get_serializer_class())
+        queryset = self.filter_queryset(self.get_queryset())
+        if plan is None or not isinstance(queryset, QuerySet) or self.paginator:
+            return super().list(request, *args, **kwargs)
+        return Response(plan.render(queryset))
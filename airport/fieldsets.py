@@ -0,0 +1,140 @@
+from rest_framework import relations
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+class Shape:
+    """Query needs of one output field: columns, joins and annotations."""
+
+    def __init__(self, only=(), select=(), prefetch=(), annotate=None):
+        self.only = tuple(only)
+        self.select = tuple(select)
+        self.prefetch = tuple(prefetch)
+        self.annotate = annotate or {}
+
+
+class Expand:
+    """Nested representation rendered for a field listed in ``?expand=``."""
+
+    def __init__(self, serializer_class, shape, many=False):
+        self.serializer_class = serializer_class
+        self.shape = shape
+        self.many = many
+
+
+def _split(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def is_sparse_request(request):
+    params = request.query_params
+    return FIELDS_PARAM in params or EXPAND_PARAM in params
+
+
+class SparseFieldsetMixin:
+    """
+    Support ``?fields=a,b`` and ``?expand=x,y`` on read endpoints.
+
+    ``fields`` trims the top-level output and ``expand`` swaps the listed
+    relations for the nested representation declared in ``expandable``.
+    On ``list`` the view's queryset loads the requested fields only:
+    ``field_shapes`` declares what each field needs (plain model fields
+    default to loading just their own column), so skipped fields also skip
+    their joins and prefetches. Filters and annotations of the view's
+    queryset are kept.
+    """
+
+    field_shapes = {}
+    expandable = {}
+
+    def _sparse_params(self):
+        request = self.request
+        if request is None or request.method != "GET":
+            return None
+        if not is_sparse_request(request):
+            return None
+        params = request.query_params
+        fields = _split(params.get(FIELDS_PARAM, ""))
+        expand = _split(params.get(EXPAND_PARAM, ""))
+        unknown = [name for name in expand if name not in self.expandable]
+        if unknown:
+            raise ValidationError(
+                {EXPAND_PARAM: f"Cannot expand: {', '.join(unknown)}"}
+            )
+        return fields, expand
+
+    def _requested_fields(self, serializer, fields):
+        available = {
+            name: field
+            for name, field in serializer.fields.items()
+            if not field.write_only
+        }
+        if not fields:
+            return available
+        unknown = [name for name in fields if name not in available]
+        if unknown:
+            raise ValidationError({FIELDS_PARAM: f"Unknown: {', '.join(unknown)}"})
+        return {name: available[name] for name in fields}
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        params = self._sparse_params()
+        if params is None:
+            return serializer
+        fields, expand = params
+        target = getattr(serializer, "child", serializer)
+        requested = self._requested_fields(target, fields)
+        for name in list(target.fields):
+            if name not in requested:
+                target.fields.pop(name)
+        for name in expand:
+            if name in target.fields:
+                spec = self.expandable[name]
+                source = target.fields[name].source
+                extra = {} if source == name else {"source": source}
+                target.fields[name] = spec.serializer_class(
+                    read_only=True, many=spec.many, **extra
+                )
+        return serializer
+
+    def get_queryset(self):
+        params = self._sparse_params()
+        if params is None or self.action != "list":
+            return super().get_queryset()
+        fields, expand = params
+        serializer = self.get_serializer_class()()
+        requested = self._requested_fields(serializer, fields)
+
+        model = self.queryset.model
+        only, select, prefetch, annotate = [model._meta.pk.name], [], [], {}
+        for name, field in requested.items():
+            if name in expand:
+                shape = self.expandable[name].shape
+            elif name in self.field_shapes:
+                shape = self.field_shapes[name]
+            elif isinstance(field, relations.ManyRelatedField):
+                shape = Shape(prefetch=(field.source,))
+            else:
+                shape = Shape(only=(field.source.replace(".", "__"),))
+            only.extend(shape.only)
+            select.extend(shape.select)
+            prefetch.extend(shape.prefetch)
+            annotate.update(shape.annotate)
+
+        # Keep the view's filters and annotations, but load only the
+        # relations the requested fields need
+        queryset = super().get_queryset().select_related(None).prefetch_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        annotate = {
+            name: expression
+            for name, expression in annotate.items()
+            if name not in queryset.query.annotations
+        }
+        if annotate:
+            queryset = queryset.annotate(**annotate)
+        return queryset.only(*only)
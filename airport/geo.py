@@ -0,0 +1,207 @@
+import heapq
+import math
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from airport.models import Airport
+
+EARTH_RADIUS_KM = 6371.0088
+VERSION_CACHE_KEY = "airport:geo:version"
+LEAF_SIZE = 32
+
+
+def great_circle_km(lat1, lon1, lat2, lon2):
+    """Haversine distance in km; accepts scalars or equally shaped arrays."""
+    lat1, lon1, lat2, lon2 = (
+        np.radians(np.asarray(value, dtype=float)) for value in (lat1, lon1, lat2, lon2)
+    )
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def route_distances(pairs):
+    """
+    Great-circle km for many (source, destination) airport pairs at once.
+
+    Pairs where either airport lacks coordinates come back as None.
+    """
+    pairs = list(pairs)
+    known = [
+        index
+        for index, (source, destination) in enumerate(pairs)
+        if None not in (source.latitude, source.longitude)
+        and None not in (destination.latitude, destination.longitude)
+    ]
+    result = [None] * len(pairs)
+    if known:
+        coords = np.array(
+            [
+                (
+                    pairs[index][0].latitude,
+                    pairs[index][0].longitude,
+                    pairs[index][1].latitude,
+                    pairs[index][1].longitude,
+                )
+                for index in known
+            ]
+        )
+        distances = great_circle_km(*coords.T)
+        for index, distance in zip(known, distances.tolist()):
+            result[index] = distance
+    return result
+
+
+def distance_mismatch(distance, expected):
+    """True when a declared route distance is off by more than the tolerance."""
+    tolerance = getattr(settings, "AIRPORT_ROUTE_DISTANCE_TOLERANCE", 0.15)
+    return abs(distance - expected) > expected * tolerance + 1
+
+
+def to_unit_vectors(latitudes, longitudes):
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    return np.column_stack(
+        (np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat))
+    )
+
+
+class AirportTree:
+    """
+    Static k-d tree over airports as 3-D unit vectors.
+
+    Straight-line (chord) distance between unit vectors grows with
+    great-circle distance, so nearest neighbours in 3-D are nearest on the
+    globe, without special cases at the poles or the antimeridian. Nodes
+    are visited best-first by their bounding-box distance and each leaf is
+    scanned with one vectorized NumPy expression.
+    """
+
+    def __init__(self, ids, latitudes, longitudes, details=None, leaf_size=LEAF_SIZE):
+        self.details = details or {}
+        self.ids = np.asarray(ids, dtype=np.int64)
+        points = to_unit_vectors(latitudes, longitudes)
+        self.order = np.arange(len(self.ids))
+        # Per node: (lower, upper, start, end, left, right)
+        self.nodes = []
+        if len(self.ids):
+            self._build(points, 0, len(self.ids), leaf_size)
+        self.points = points[self.order]
+        self.ids = self.ids[self.order]
+
+    def _build(self, points, start, end, leaf_size):
+        index = len(self.nodes)
+        members = points[self.order[start:end]]
+        lower, upper = members.min(axis=0), members.max(axis=0)
+        self.nodes.append([tuple(lower), tuple(upper), start, end, None, None])
+        if end - start > leaf_size:
+            axis = int(np.argmax(upper - lower))
+            middle = (end - start) // 2
+            segment = self.order[start:end]
+            split = np.argpartition(members[:, axis], middle)
+            self.order[start:end] = segment[split]
+            self.nodes[index][4] = self._build(points, start, start + middle, leaf_size)
+            self.nodes[index][5] = self._build(points, start + middle, end, leaf_size)
+        return index
+
+    @staticmethod
+    def _bound(point, lower, upper):
+        total = 0.0
+        for value, low, high in zip(point, lower, upper):
+            if value < low:
+                total += (low - value) ** 2
+            elif value > high:
+                total += (value - high) ** 2
+        return total
+
+    def nearest(self, latitude, longitude, limit=10):
+        """[(airport id, distance km)] of the ``limit`` closest airports."""
+        if not self.nodes or limit < 1:
+            return []
+        point = to_unit_vectors([latitude], [longitude])[0]
+        query = tuple(point.tolist())
+        best = []  # max-heap of (-squared chord, id)
+        frontier = [(0.0, 0)]
+        while frontier:
+            bound, index = heapq.heappop(frontier)
+            if len(best) == limit and bound > -best[0][0]:
+                break
+            lower, upper, start, end, left, right = self.nodes[index]
+            if left is None:
+                squared = ((self.points[start:end] - point) ** 2).sum(axis=1)
+                for value, airport_id in zip(
+                    squared.tolist(), self.ids[start:end].tolist()
+                ):
+                    if len(best) < limit:
+                        heapq.heappush(best, (-value, airport_id))
+                    elif value < -best[0][0]:
+                        heapq.heapreplace(best, (-value, airport_id))
+                continue
+            for child in (left, right):
+                child_lower, child_upper = self.nodes[child][:2]
+                heapq.heappush(
+                    frontier, (self._bound(query, child_lower, child_upper), child)
+                )
+        return [
+            (airport_id, 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(-neg) / 2)))
+            for neg, airport_id in sorted(best, reverse=True)
+        ]
+
+
+_lock = threading.Lock()
+_state = {"tree": None, "version": None, "built_at": 0.0}
+
+
+def _version():
+    return cache.get(VERSION_CACHE_KEY, 0)
+
+
+def get_tree():
+    """
+    Return the process-wide tree, rebuilt when an airport changes.
+
+    Changes are signalled through a version counter in the cache, with
+    AIRPORT_GEO_INDEX_MAX_AGE as a fallback for caches not shared between
+    workers.
+    """
+    max_age = getattr(settings, "AIRPORT_GEO_INDEX_MAX_AGE", 300)
+    version = _version()
+    state = _state
+    if (
+        state["tree"] is None
+        or state["version"] != version
+        or time.monotonic() - state["built_at"] > max_age
+    ):
+        with _lock:
+            rows = list(
+                Airport.objects.filter(
+                    latitude__isnull=False, longitude__isnull=False
+                ).values_list("id", "name", "closest_big_city", "latitude", "longitude")
+            )
+            state["tree"] = AirportTree(
+                [row[0] for row in rows],
+                [row[3] for row in rows],
+                [row[4] for row in rows],
+                details={row[0]: row[1:] for row in rows},
+            )
+            state["version"] = version
+            state["built_at"] = time.monotonic()
+    return state["tree"]
+
+
+def _bump_version():
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
+
+
+def airport_changed(sender, instance, **kwargs):
+    transaction.on_commit(_bump_version)
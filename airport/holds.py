@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from airport.models import Order, SeatEvent, SeatHold, Ticket
+from airport.seat_events import record
+from airport.travel_stats import record_orders
+
+
+def get_ttl():
+    return getattr(settings, "AIRPORT_SEAT_HOLD_TTL", timedelta(minutes=10))
+
+
+def place_hold(user, flight, row, seat):
+    """
+    Hold a seat for user, or extend the user's existing hold on it.
+
+    An expired hold by someone else is replaced in place; an active one
+    raises ValidationError. The unique (flight, row, seat) constraint
+    settles concurrent attempts.
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            hold = (
+                SeatHold.objects.select_for_update()
+                .filter(flight=flight, row=row, seat=seat)
+                .first()
+            )
+            if hold is None:
+                return SeatHold.objects.create(
+                    flight=flight,
+                    row=row,
+                    seat=seat,
+                    user=user,
+                    expires_at=now + get_ttl(),
+                )
+            if hold.user_id != user.id and hold.expires_at > now:
+                raise ValidationError({"seat": "seat is held by another customer"})
+            hold.user = user
+            hold.expires_at = now + get_ttl()
+            hold.save(update_fields=("user", "expires_at"))
+            return hold
+    except IntegrityError:
+        raise ValidationError({"seat": "seat is held by another customer"})
+
+
+def checkout(user, hold_ids=None):
+    """
+    Turn the user's active holds into one order, atomically.
+
+    Holds are locked, re-checked against sold seats, converted into
+    tickets with one insert and deleted in a single transaction; either
+    every held seat becomes a ticket or nothing changes.
+    """
+    with transaction.atomic():
+        holds = SeatHold.objects.select_for_update().filter(
+            user=user, expires_at__gt=timezone.now()
+        )
+        if hold_ids is not None:
+            holds = holds.filter(id__in=hold_ids)
+        holds = list(holds.select_related("flight__airplane"))
+        if not holds:
+            raise ValidationError({"holds": "No active seat holds to check out."})
+        if hold_ids is not None and len(holds) != len(set(hold_ids)):
+            raise ValidationError({"holds": "Some holds are expired or unknown."})
+
+        seats = Q(pk__in=[])
+        for hold in holds:
+            seats |= Q(flight_id=hold.flight_id, row=hold.row, seat=hold.seat)
+        if Ticket.objects.filter(seats).exists():
+            raise ValidationError({"holds": "Some held seats are already taken."})
+
+        for hold in holds:
+            Ticket.validate_ticket(
+                hold.row, hold.seat, hold.flight.airplane, ValidationError
+            )
+        order = Order.objects.create(user=user)
+        tickets = Ticket.objects.bulk_create(
+            [
+                Ticket(order=order, flight=hold.flight, row=hold.row, seat=hold.seat)
+                for hold in holds
+            ]
+        )
+        # bulk_create skips the post_save signal that feeds the seat log
+        record(tickets, SeatEvent.TAKEN)
+        SeatHold.objects.filter(id__in=[hold.id for hold in holds]).delete()
+        record_orders([order])
+        return order
+
+
+def release_expired(batch_size=1000):
+    """
+    Delete expired holds in batches using the expires_at index.
+
+    Each batch is its own short transaction touching only SeatHold rows;
+    holds locked by a running checkout are skipped where the database
+    supports SKIP LOCKED. Returns the number of holds deleted.
+    """
+    released = 0
+    while True:
+        with transaction.atomic():
+            expired = SeatHold.objects.filter(expires_at__lte=timezone.now())
+            if connection.features.has_select_for_update_skip_locked:
+                expired = expired.select_for_update(skip_locked=True)
+            ids = list(expired.values_list("id", flat=True)[:batch_size])
+            if not ids:
+                return released
+            released += SeatHold.objects.filter(id__in=ids).delete()[0]
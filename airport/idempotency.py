@@ -0,0 +1,80 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from airport.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "HTTP_IDEMPOTENCY_KEY"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def get_ttl():
+    return getattr(settings, "AIRPORT_IDEMPOTENCY_TTL", timedelta(hours=24))
+
+
+def fingerprint(data):
+    payload = json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def replay(record, request_fingerprint):
+    if record.fingerprint != request_fingerprint:
+        return Response(
+            {"detail": "Idempotency-Key was already used with a different payload."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(record.response_body, status=record.response_status)
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+class IdempotentCreateMixin:
+    """
+    Honour an ``Idempotency-Key`` header on ``create``.
+
+    The first successful response for a (user, key) pair is stored and
+    replayed verbatim for retries until it expires, without running
+    validation or touching inventory again. The key row is inserted in
+    the same transaction as the created objects, so a concurrent retry
+    blocks on the unique constraint and then replays the committed
+    result.
+    """
+
+    def create(self, request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return super().create(request, *args, **kwargs)
+
+        now = timezone.now()
+        request_fingerprint = fingerprint(request.data)
+        records = IdempotencyKey.objects.filter(user=request.user, key=key[:255])
+        record = records.filter(expires_at__gt=now).first()
+        if record is not None:
+            return replay(record, request_fingerprint)
+        records.filter(expires_at__lte=now).delete()
+
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=request.user,
+                    key=key[:255],
+                    fingerprint=request_fingerprint,
+                    expires_at=now + get_ttl(),
+                )
+                response = super().create(request, *args, **kwargs)
+                record.response_status = response.status_code
+                record.response_body = response.data
+                record.save(update_fields=("response_status", "response_body"))
+        except IntegrityError:
+            record = records.first()
+            if record is None:
+                # Not a concurrent use of the key: the create itself failed
+                raise
+            return replay(record, request_fingerprint)
+        return response
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from airport.archive import archive_after, archive_batch
+
+
+class Command(BaseCommand):
+    help = "Move landed flights and their tickets to the archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--days",
+            type=float,
+            help="Archive flights landed this many days ago "
+            "(default: AIRPORT_ARCHIVE_AFTER)",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] is None:
+            age = archive_after()
+        else:
+            age = timedelta(days=options["days"])
+        cutoff = timezone.now() - age
+        total = 0
+        while count := archive_batch(cutoff, options["batch_size"]):
+            total += count
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} flight(s)"))
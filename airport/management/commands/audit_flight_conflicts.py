@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from airport.conflicts import build_indexes
+from airport.models import Flight
+
+
+class Command(BaseCommand):
+    help = "Report airplanes and crew members assigned to overlapping flights"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Include flights that have already landed",
+        )
+        parser.add_argument(
+            "--fail",
+            action="store_true",
+            help="Exit with an error when conflicts are found",
+        )
+
+    def handle(self, *args, **options):
+        flights = Flight.objects.all()
+        if not options["all"]:
+            flights = flights.filter(arrival_time__gt=timezone.now())
+        airplane_index, crew_index = build_indexes(flights)
+
+        found = 0
+        for label, index in (("Airplane", airplane_index), ("Crew", crew_index)):
+            for key, flight_id, other_id in index.conflicts():
+                found += 1
+                self.stdout.write(
+                    f"{label} {key}: flight {flight_id} overlaps flight {other_id}"
+                )
+
+        if found and options["fail"]:
+            raise CommandError(f"{found} conflict(s) found")
+        self.stdout.write(self.style.SUCCESS(f"{found} conflict(s) found"))
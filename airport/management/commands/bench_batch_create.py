@@ -0,0 +1,89 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from airport.models import Airport, Route, AirplaneType, Airplane, Crew
+from airport.views import FlightViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare creating flights with one POST each against a single "
+        "batch POST. Seed data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = options["items"]
+        view = FlightViewSet.as_view({"post": "create"}, throttle_classes=())
+        factory = APIRequestFactory()
+
+        def post(data):
+            request = factory.post("/api/airport/flights/", data, format="json")
+            force_authenticate(request, user=user)
+            response = view(request)
+            if response.status_code != 201:
+                raise CommandError(f"create failed: {response.data}")
+
+        with transaction.atomic():
+            user, items = self.seed(2 * count)
+            single_items, batch_items = items[:count], items[count:]
+
+            start = time.perf_counter()
+            for item in single_items:
+                post(item)
+            single = time.perf_counter() - start
+
+            start = time.perf_counter()
+            post(batch_items)
+            batch = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"one per request: {count / single:9.1f} flights/s")
+        self.stdout.write(f"          batch: {count / batch:9.1f} flights/s")
+        self.stdout.write(self.style.SUCCESS(f"speed-up: {single / batch:.1f}x"))
+
+    @staticmethod
+    def seed(count):
+        """A staff user and ``count`` flight payloads that do not conflict."""
+        user = get_user_model().objects.create_user(
+            "bench@example.com", "bench", is_staff=True
+        )
+        route = Route.objects.create(
+            source=Airport.objects.create(name="Bench A", closest_big_city="A"),
+            destination=Airport.objects.create(name="Bench B", closest_big_city="B"),
+            distance=1000,
+        )
+        airplane_type = AirplaneType.objects.create(name="bench")
+        airplanes = Airplane.objects.bulk_create(
+            [
+                Airplane(
+                    name=f"bench {i}",
+                    rows=30,
+                    seats_in_row=6,
+                    airplane_type=airplane_type,
+                )
+                for i in range(count)
+            ]
+        )
+        crew = Crew.objects.bulk_create(
+            [Crew(first_name="Bench", last_name=str(i)) for i in range(count)]
+        )
+        departure = timezone.now() + timedelta(days=1)
+        return user, [
+            {
+                "route": route.id,
+                "airplane": airplane.id,
+                "departure_time": departure.isoformat(),
+                "arrival_time": (departure + timedelta(hours=2)).isoformat(),
+                "crew": [member.id],
+            }
+            for airplane, member in zip(airplanes, crew)
+        ]
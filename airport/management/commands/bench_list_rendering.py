@@ -0,0 +1,92 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from airport.fastpath import get_plan
+from airport.models import Airport, Route, AirplaneType, Airplane, Crew, Flight
+from airport.serializers import FlightListSerializer
+from airport.views import TICKETS_AVAILABLE, FlightViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare FlightListSerializer with the fast path on seeded flights. "
+        "Seed data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        with transaction.atomic():
+            self.seed(rows)
+            queryset = FlightViewSet.queryset.annotate(
+                tickets_available=TICKETS_AVAILABLE
+            ).filter(airplane__name="bench")
+            plan = get_plan(FlightListSerializer)
+
+            optimal = queryset.select_related(
+                "route__source", "route__destination"
+            ).prefetch_related("crew")
+            slow = self.best_of(
+                repeat, lambda: FlightListSerializer(optimal.all(), many=True).data
+            )
+            fast = self.best_of(repeat, lambda: plan.render(queryset.all()))
+            transaction.set_rollback(True)
+
+        for label, seconds in (("serializer", slow), ("fast path", fast)):
+            self.stdout.write(
+                f"{label:>10}: {seconds * 1000:8.2f} ms total, "
+                f"{seconds / rows * 1e6:7.2f} us/row"
+            )
+        self.stdout.write(self.style.SUCCESS(f"speed-up: {slow / fast:.1f}x"))
+
+    @staticmethod
+    def best_of(repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    @staticmethod
+    def seed(rows):
+        source = Airport.objects.create(name="Bench A", closest_big_city="A")
+        destination = Airport.objects.create(name="Bench B", closest_big_city="B")
+        route = Route.objects.create(
+            source=source, destination=destination, distance=1000
+        )
+        airplane = Airplane.objects.create(
+            name="bench",
+            rows=30,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="bench"),
+        )
+        crew = Crew.objects.bulk_create(
+            [Crew(first_name="Bench", last_name=str(i)) for i in range(3)]
+        )
+        start = timezone.now() + timedelta(days=1)
+        flights = Flight.objects.bulk_create(
+            [
+                Flight(
+                    route=route,
+                    airplane=airplane,
+                    departure_time=start + timedelta(hours=3 * i),
+                    arrival_time=start + timedelta(hours=3 * i + 2),
+                )
+                for i in range(rows)
+            ]
+        )
+        Flight.crew.through.objects.bulk_create(
+            [
+                Flight.crew.through(flight_id=flight.id, crew_id=member.id)
+                for flight in flights
+                for member in crew
+            ]
+        )
@@ -0,0 +1,84 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from airport.models import Airport, Route, AirplaneType, Airplane, Flight, OrderRequest
+from airport.order_queue import process_batch
+from airport.serializers import OrderSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare synchronous OrderSerializer creation with the queued, "
+        "group-committed path. Seed data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=500)
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        count = options["orders"]
+        with transaction.atomic():
+            user, flight = self.seed()
+            payloads = [
+                {
+                    "tickets": [
+                        {"row": i % 30 + 1, "seat": i % 6 + 1, "flight": flight.id}
+                    ]
+                }
+                for i in range(count)
+            ]
+
+            start = time.perf_counter()
+            for payload in payloads:
+                with transaction.atomic():
+                    serializer = OrderSerializer(data=payload)
+                    serializer.is_valid(raise_exception=True)
+                    serializer.save(user=user)
+            sync = time.perf_counter() - start
+
+            start = time.perf_counter()
+            OrderRequest.objects.bulk_create(
+                [OrderRequest(user=user, payload=payload) for payload in payloads]
+            )
+            enqueue = time.perf_counter() - start
+            start = time.perf_counter()
+            while process_batch(options["batch_size"]):
+                pass
+            queued = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"synchronous: {count / sync:9.1f} orders/s")
+        self.stdout.write(
+            f"     queued: {count / queued:9.1f} orders/s "
+            f"(enqueue {enqueue * 1000:.1f} ms)"
+        )
+        self.stdout.write(self.style.SUCCESS(f"speed-up: {sync / queued:.1f}x"))
+
+    @staticmethod
+    def seed():
+        user = get_user_model().objects.create_user("bench@example.com", "bench")
+        route = Route.objects.create(
+            source=Airport.objects.create(name="Bench A", closest_big_city="A"),
+            destination=Airport.objects.create(name="Bench B", closest_big_city="B"),
+            distance=1000,
+        )
+        airplane = Airplane.objects.create(
+            name="bench",
+            rows=30,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="bench"),
+        )
+        departure = timezone.now() + timedelta(days=1)
+        flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=departure,
+            arrival_time=departure + timedelta(hours=2),
+        )
+        return user, flight
@@ -0,0 +1,112 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from airport.management.commands.bench_list_rendering import Command as ListBench
+from airport.models import Flight, Order, Ticket
+from airport.msgpack_format import MessagePackRenderer, unpackb
+from airport.serializers import (
+    FlightDetailSerializer,
+    FlightListSerializer,
+    OrderListSerializer,
+)
+from airport.views import TICKETS_AVAILABLE, FlightViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare JSONRenderer and MessagePackRenderer on seeded flight list, "
+        "seat map and order history payloads: encode and decode time and "
+        "bytes. Seed data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        with transaction.atomic():
+            payloads = self.payloads(rows)
+            transaction.set_rollback(True)
+
+        formats = (
+            ("json", JSONRenderer(), json.loads),
+            ("msgpack", MessagePackRenderer(), unpackb),
+        )
+        for name, data in payloads.items():
+            self.stdout.write(f"{name}:")
+            baseline = None
+            for label, renderer, decode in formats:
+                body = renderer.render(data)
+                encode_time = self.best_of(repeat, lambda: renderer.render(data))
+                decode_time = self.best_of(repeat, lambda: decode(body))
+                line = (
+                    f"  {label:>8}: {len(body) / 1024:8.1f} KiB, "
+                    f"encode {encode_time * 1000:7.2f} ms, "
+                    f"decode {decode_time * 1000:7.2f} ms"
+                )
+                if baseline is None:
+                    baseline = len(body), encode_time
+                else:
+                    line += (
+                        f" ({len(body) / baseline[0]:.0%} of the bytes, "
+                        f"encode {baseline[1] / encode_time:.1f}x)"
+                    )
+                self.stdout.write(line)
+
+    @staticmethod
+    def best_of(repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    @staticmethod
+    def payloads(rows):
+        """Serialized data as the flight and order endpoints return it."""
+        ListBench.seed(rows)
+        flights = list(Flight.objects.filter(airplane__name="bench"))
+        user = get_user_model().objects.create_user("bench@example.com", "bench")
+        # Order history: one order per flight with two seats each
+        orders = Order.objects.bulk_create([Order(user=user) for _ in flights])
+        Ticket.objects.bulk_create(
+            [
+                Ticket(order=order, flight=flight, row=row, seat=1)
+                for order, flight in zip(orders, flights)
+                for row in (1, 2)
+            ]
+        )
+        # Seat map: a nearly full flight
+        full = flights[0]
+        Ticket.objects.bulk_create(
+            [
+                Ticket(order=orders[0], flight=full, row=row, seat=seat)
+                for row in range(3, full.airplane.rows + 1)
+                for seat in range(1, full.airplane.seats_in_row + 1)
+            ]
+        )
+
+        flight_list = (
+            FlightViewSet.queryset.annotate(tickets_available=TICKETS_AVAILABLE)
+            .filter(airplane__name="bench")
+            .select_related("route__source", "route__destination")
+            .prefetch_related("crew")
+        )
+        seat_map = Flight.objects.select_related(
+            "route__source", "route__destination", "airplane__airplane_type"
+        ).prefetch_related("crew", "tickets")
+        order_history = Order.objects.filter(user=user).prefetch_related(
+            "tickets", "archived_tickets"
+        )
+        return {
+            "flight list": FlightListSerializer(flight_list, many=True).data,
+            "seat map": FlightDetailSerializer(seat_map.get(id=full.id)).data,
+            "order history": OrderListSerializer(order_history, many=True).data,
+        }
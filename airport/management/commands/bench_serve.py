@@ -0,0 +1,111 @@
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test runserver and the pre-forked serve command with the same "
+        "concurrent GET requests and compare throughput and latency. DRF "
+        "endpoints are rate limited, so the default target is a plain "
+        "Django page."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--path", default="/admin/login/")
+        parser.add_argument("--port", type=int, default=8800)
+
+    def handle(self, *args, **options):
+        port = options["port"]
+        servers = (
+            ("runserver", port, ["runserver", "--noreload", f"127.0.0.1:{port}"]),
+            (
+                "serve",
+                port + 1,
+                [
+                    "serve",
+                    "--host",
+                    "127.0.0.1",
+                    "--port",
+                    str(port + 1),
+                    "--workers",
+                    str(options["workers"]),
+                ],
+            ),
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        manage = str(settings.BASE_DIR / "manage.py")
+
+        results = {}
+        for label, server_port, argv in servers:
+            process = subprocess.Popen(
+                [sys.executable, manage, *argv],
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                self.wait_ready(server_port, options["path"], process)
+                results[label] = self.load(
+                    server_port,
+                    options["path"],
+                    options["requests"],
+                    options["concurrency"],
+                )
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+
+        for label, (seconds, latencies, errors) in results.items():
+            cuts = statistics.quantiles(latencies, n=100)
+            self.stdout.write(
+                f"{label:>9}: {len(latencies) / seconds:8.1f} req/s, "
+                f"p50 {cuts[49] * 1000:6.1f} ms, p95 {cuts[94] * 1000:6.1f} ms, "
+                f"p99 {cuts[98] * 1000:6.1f} ms, {errors} error(s)"
+            )
+        speed_up = results["runserver"][0] / results["serve"][0]
+        self.stdout.write(self.style.SUCCESS(f"speed-up: {speed_up:.1f}x"))
+
+    @staticmethod
+    def fetch(port, path):
+        start = time.perf_counter()
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status < 400
+        except OSError:
+            ok = False
+        finally:
+            connection.close()
+        return time.perf_counter() - start, ok
+
+    def wait_ready(self, port, path, process, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"server on port {port} exited early")
+            if self.fetch(port, path)[1]:
+                return
+            time.sleep(0.2)
+        raise CommandError(f"server on port {port} did not come up")
+
+    def load(self, port, path, count, concurrency):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            outcomes = list(pool.map(lambda _: self.fetch(port, path), range(count)))
+        seconds = time.perf_counter() - start
+        latencies = [latency for latency, _ in outcomes]
+        errors = sum(1 for _, ok in outcomes if not ok)
+        return seconds, latencies, errors
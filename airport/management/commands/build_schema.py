@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.schema import generate_schema, render_schema, schema_file
+
+
+class Command(BaseCommand):
+    help = "Write the OpenAPI schema served at /api/schema/ to AIRPORT_SCHEMA_FILE"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="Write here instead of AIRPORT_SCHEMA_FILE")
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Exit with an error if the file differs from live introspection",
+        )
+
+    def handle(self, *args, **options):
+        path = options["file"] or schema_file()
+        if not path:
+            raise CommandError("Set AIRPORT_SCHEMA_FILE or pass --file")
+        body = render_schema(generate_schema())
+
+        if options["check"]:
+            try:
+                with open(path, "rb") as file:
+                    stored = json.loads(file.read())
+            except FileNotFoundError:
+                raise CommandError(f"{path} does not exist")
+            if stored != json.loads(body):
+                raise CommandError(
+                    f"{path} is out of date, run `python manage.py build_schema`"
+                )
+            self.stdout.write(self.style.SUCCESS(f"{path} is up to date"))
+            return
+
+        with open(path, "wb") as file:
+            file.write(body)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {path}"))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from airport.geo import distance_mismatch, route_distances
+from airport.models import Route
+
+
+class Command(BaseCommand):
+    help = "Compare route distances with the great-circle distance of their airports"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Overwrite mismatching distances with the great-circle distance",
+        )
+        parser.add_argument(
+            "--fail",
+            action="store_true",
+            help="Exit with an error when mismatches are found",
+        )
+
+    def handle(self, *args, **options):
+        routes = list(Route.objects.select_related("source", "destination"))
+        expected = route_distances(
+            (route.source, route.destination) for route in routes
+        )
+
+        mismatched = []
+        for route, distance in zip(routes, expected):
+            if distance is None or not distance_mismatch(route.distance, distance):
+                continue
+            self.stdout.write(
+                f"Route {route.id} {route}: {route.distance} km, "
+                f"great-circle {round(distance)} km"
+            )
+            route.distance = round(distance)
+            route.updated_at = timezone.now()
+            mismatched.append(route)
+
+        if options["fix"]:
+            Route.objects.bulk_update(
+                mismatched, ("distance", "updated_at"), batch_size=1000
+            )
+        if mismatched and options["fail"]:
+            raise CommandError(f"{len(mismatched)} mismatching route(s)")
+        action = "Fixed" if options["fix"] else "Found"
+        self.stdout.write(
+            self.style.SUCCESS(f"{action} {len(mismatched)} mismatching route(s)")
+        )
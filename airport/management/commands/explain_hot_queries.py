@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from airport.query_plans import check_hot_queries, supported
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot-path queries and report sequential scans and sorts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--plans", action="store_true", help="Print every plan, not only failures"
+        )
+        parser.add_argument(
+            "--fail",
+            action="store_true",
+            help="Exit with an error when a hot query scans a table or sorts",
+        )
+
+    def handle(self, *args, **options):
+        if not supported():
+            raise CommandError(f"No plan checks for {connection.vendor}")
+        failures = 0
+        for name, plan, scans, sorted_ in check_hot_queries():
+            if scans:
+                self.stdout.write(
+                    self.style.ERROR(f"{name}: full scan of {', '.join(scans)}")
+                )
+            if sorted_:
+                self.stdout.write(
+                    self.style.ERROR(f"{name}: sorts instead of reading in index order")
+                )
+            failing = bool(scans or sorted_)
+            failures += failing
+            if not failing and options["plans"]:
+                self.stdout.write(f"{name}: ok")
+            if failing or options["plans"]:
+                self.stdout.write(plan)
+        if failures and options["fail"]:
+            raise CommandError(f"{failures} hot query(ies) scan a table or sort")
+        self.stdout.write(
+            self.style.SUCCESS(f"{failures} hot query(ies) scan a table or sort")
+        )
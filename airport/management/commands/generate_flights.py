@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from airport.models import Schedule
+from airport.scheduling import generate_all
+
+
+class Command(BaseCommand):
+    help = "Expand schedules into concrete flights"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "schedule_ids",
+            nargs="*",
+            type=int,
+            help="Only regenerate these schedules (default: all)",
+        )
+
+    def handle(self, *args, **options):
+        schedules = Schedule.objects.prefetch_related("crew")
+        if options["schedule_ids"]:
+            schedules = schedules.filter(id__in=options["schedule_ids"])
+        totals = generate_all(schedules)
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Flights created: {created}, updated: {updated}, "
+                "deleted: {deleted}".format(**totals)
+            )
+        )
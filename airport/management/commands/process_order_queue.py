@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from airport.order_queue import process_batch
+
+
+class Command(BaseCommand):
+    help = "Confirm queued orders, many per transaction"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--once", action="store_true", help="Drain the queue and exit"
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.2,
+            help="Seconds to wait when the queue is empty",
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            count = process_batch(options["batch_size"])
+            processed += count
+            if count:
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} request(s)"))
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from airport.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete sync tombstones older than AIRPORT_SYNC_TOMBSTONE_TTL in "
+        "batches; clients with older cursors get a full resync"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        ttl = getattr(settings, "AIRPORT_SYNC_TOMBSTONE_TTL", 30 * 24 * 60 * 60)
+        cutoff = timezone.now() - timedelta(seconds=ttl)
+        total = 0
+        while True:
+            ids = list(
+                Tombstone.objects.filter(deleted_at__lt=cutoff).values_list(
+                    "id", flat=True
+                )[: options["batch_size"]]
+            )
+            if not ids:
+                break
+            total += Tombstone.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} tombstone(s)"))
@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from airport.travel_stats import compute, save
+
+
+def compute_chunk(user_ids):
+    try:
+        return compute(user_ids)
+    finally:
+        # Each worker thread opened its own connection
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Rebuild every user's travel stats from their tickets"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Chunks aggregated in parallel, each on its own connection",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = list(
+            get_user_model().objects.order_by("id").values_list("id", flat=True)
+        )
+        size = options["chunk_size"]
+        chunks = [user_ids[i : i + size] for i in range(0, len(user_ids), size)]
+        if options["workers"] > 1:
+            pool = ThreadPoolExecutor(options["workers"])
+            results = pool.map(compute_chunk, chunks)
+        else:
+            pool = None
+            results = map(compute, chunks)
+
+        # Reads run in parallel; writes stay on this thread, one short
+        # transaction per chunk, so workers never contend for locks
+        total = 0
+        for stats in results:
+            with transaction.atomic():
+                save(stats)
+            total += len(stats)
+        if pool is not None:
+            pool.shutdown()
+        self.stdout.write(self.style.SUCCESS(f"Recomputed stats for {total} user(s)"))
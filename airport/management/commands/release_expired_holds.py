@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from airport.holds import release_expired
+
+
+class Command(BaseCommand):
+    help = "Release expired seat holds in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        released = release_expired(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Released {released} hold(s)"))
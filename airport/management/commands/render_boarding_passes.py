@@ -0,0 +1,51 @@
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from airport.boarding_passes import FORMATS, build_archive, render_pool
+from airport.models import Flight
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the boarding passes of every ticket of the given flights, or "
+        "of all flights departing within --departing-within hours, into a "
+        "zip archive. Passes are rendered in a process pool and cached until "
+        "their ticket changes, so running this again is cheap."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("flights", nargs="*", type=int, help="Flight ids")
+        parser.add_argument("--departing-within", type=float, metavar="HOURS")
+        parser.add_argument("--format", choices=list(FORMATS), default="png")
+        parser.add_argument("--output", default="boarding-passes.zip")
+
+    def handle(self, *args, **options):
+        ids = set(options["flights"])
+        if options["departing_within"] is not None:
+            now = timezone.now()
+            ids.update(
+                Flight.objects.filter(
+                    departure_time__gte=now,
+                    departure_time__lte=now
+                    + timedelta(hours=options["departing_within"]),
+                ).values_list("id", flat=True)
+            )
+        if not ids:
+            raise CommandError("no flights given or departing in that window")
+
+        start = time.perf_counter()
+        with render_pool() as pool:
+            archive, _ = build_archive(sorted(ids), options["format"], pool)
+        seconds = time.perf_counter() - start
+
+        Path(options["output"]).write_bytes(archive)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(ids)} flight(s) -> {options['output']} "
+                f"({len(archive) / 1024:.0f} KiB) in {seconds:.2f}s"
+            )
+        )
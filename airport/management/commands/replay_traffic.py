@@ -0,0 +1,148 @@
+import http.client
+import json
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.traffic import read_records
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def percentiles(latencies):
+    """p50, p95 and p99 of the given latencies."""
+    if len(latencies) == 1:
+        return latencies * 3
+    cuts = statistics.quantiles(latencies, n=100)
+    return [cuts[49], cuts[94], cuts[98]]
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a log written by TrafficCaptureMiddleware against a running "
+        "instance, keeping the captured gaps between requests (divided by "
+        "--speed), and report latency percentiles and error rates per "
+        "endpoint. Captured roles are mapped to the given tokens; requests "
+        "of a role without one are sent anonymously."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("log", help="JSONL file written by the middleware")
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument(
+            "--speed",
+            type=float,
+            default=1.0,
+            help="Replay speed-up, e.g. 4 for 4x; 0 sends as fast as possible",
+        )
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--user-token", help="DRF token for role 'user'")
+        parser.add_argument("--staff-token", help="DRF token for role 'staff'")
+        parser.add_argument(
+            "--read-only",
+            action="store_true",
+            help="Skip requests that could change data (POST, PUT, DELETE...)",
+        )
+
+    def handle(self, *args, **options):
+        records = read_records(options["log"])
+        if options["read_only"]:
+            records = [r for r in records if r["method"] in SAFE_METHODS]
+        if not records:
+            raise CommandError("nothing to replay")
+        if options["speed"] < 0:
+            raise CommandError("--speed must not be negative")
+
+        target = urlsplit(options["base_url"])
+        if target.scheme not in ("http", "https") or not target.hostname:
+            raise CommandError(f"unsupported base URL {options['base_url']!r}")
+        tokens = {"user": options["user_token"], "staff": options["staff_token"]}
+
+        results = defaultdict(list)
+        results_lock = threading.Lock()
+
+        def send(record):
+            latency, status = self.send(target, record, tokens.get(record["role"]))
+            with results_lock:
+                results[record["endpoint"]].append((latency, status, record))
+
+        first = records[0]["ts"]
+        start = time.monotonic()
+        with ThreadPoolExecutor(options["concurrency"]) as pool:
+            for record in records:
+                if options["speed"]:
+                    delay = (record["ts"] - first) / options["speed"]
+                    delay -= time.monotonic() - start
+                    if delay > 0:
+                        time.sleep(delay)
+                pool.submit(send, record)
+        seconds = time.monotonic() - start
+
+        self.report(results, len(records), seconds)
+
+    @staticmethod
+    def send(target, record, token):
+        """Return (latency, status) of one replayed request; status 0 on error."""
+        connection_class = (
+            http.client.HTTPSConnection
+            if target.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        path = target.path.rstrip("/") + record["path"]
+        if record["query"]:
+            path += "?" + urlencode(record["query"], doseq=True)
+        headers = {}
+        if token:
+            headers["Authorization"] = f"Token {token}"
+        body = None
+        if record["body"] is not None:
+            headers["Content-Type"] = record["content_type"]
+            if record["content_type"] == "application/json":
+                body = json.dumps(record["body"])
+            else:
+                body = urlencode(record["body"], doseq=True)
+
+        start = time.perf_counter()
+        connection = connection_class(target.hostname, target.port, timeout=30)
+        try:
+            connection.request(record["method"], path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except OSError:
+            status = 0
+        finally:
+            connection.close()
+        return time.perf_counter() - start, status
+
+    def report(self, results, total, seconds):
+        self.stdout.write(
+            f"{'endpoint':<40} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'errors':>7} {'changed':>8}"
+        )
+        errors_total = 0
+        for endpoint, outcomes in sorted(results.items()):
+            p50, p95, p99 = percentiles([latency for latency, _, _ in outcomes])
+            # Failed connections and server errors; a 4xx may be expected
+            # (the captured request got one too), so compare with the capture
+            errors = sum(1 for _, status, _ in outcomes if not status or status >= 500)
+            changed = sum(
+                1 for _, status, record in outcomes if status != record["status"]
+            )
+            errors_total += errors
+            self.stdout.write(
+                f"{endpoint:<40} {len(outcomes):>6} "
+                f"{p50 * 1000:>8.1f} {p95 * 1000:>8.1f} {p99 * 1000:>8.1f} "
+                f"{errors / len(outcomes):>7.1%} {changed:>8}"
+            )
+        summary = (
+            f"{total} request(s) in {seconds:.1f}s, "
+            f"error rate {errors_total / total:.1%}"
+        )
+        style = self.style.SUCCESS if not errors_total else self.style.WARNING
+        self.stdout.write(style(summary))
@@ -0,0 +1,102 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from airport.serving import PreforkServer, get_application, shared_cache, warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the project with pre-forked worker processes. The app is "
+        "loaded and its caches warmed once in the master before forking; "
+        "workers are replaced after --max-requests requests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="0.0.0.0")
+        parser.add_argument("--port", type=int, default=8000)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="API requests each worker serves at once.",
+        )
+        parser.add_argument(
+            "--streams",
+            type=int,
+            default=16,
+            help="Event streams each worker keeps open besides --threads; "
+            "more are answered with 503. Each holds a database connection.",
+        )
+        parser.add_argument(
+            "--max-requests",
+            type=int,
+            default=1000,
+            help="Recycle a worker after this many requests; 0 never does.",
+        )
+        parser.add_argument(
+            "--max-requests-jitter",
+            type=int,
+            default=100,
+            help="Random extra requests per worker, so they do not all "
+            "restart at once.",
+        )
+        parser.add_argument(
+            "--no-static",
+            action="store_true",
+            help="Leave STATIC_URL to a proxy in front instead of serving it.",
+        )
+        parser.add_argument("--no-warm-up", action="store_true")
+        parser.add_argument("--access-log", action="store_true")
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stderr.write(
+                self.style.WARNING(
+                    "DEBUG is on: every worker keeps a log of its SQL queries "
+                    "and error pages expose settings. Set DJANGO_DEBUG=false "
+                    "in production."
+                )
+            )
+        if options["workers"] > 1 and not shared_cache():
+            self.stderr.write(
+                self.style.WARNING(
+                    "The default cache is local to each worker: flight list "
+                    "caching, refresh coalescing and index invalidation do "
+                    "not reach the other workers. Set REDIS_URL to share it."
+                )
+            )
+        app = get_application(static=not options["no_static"])
+        server = PreforkServer(
+            app,
+            host=options["host"],
+            port=options["port"],
+            workers=options["workers"],
+            threads=options["threads"],
+            streams=options["streams"],
+            max_requests=options["max_requests"],
+            jitter=options["max_requests_jitter"],
+            access_log=options["access_log"],
+        )
+
+        if not options["no_warm_up"]:
+            for step, seconds, error in warm_up():
+                if error is None:
+                    self.stdout.write(f"warmed {step} in {seconds * 1000:.1f} ms")
+                else:
+                    self.stderr.write(
+                        self.style.WARNING(f"could not warm {step}: {error}")
+                    )
+
+        host, port = server.address
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Serving on http://{host}:{port}/ with "
+                f"{options['workers']} worker(s) x {options['threads']} "
+                f"thread(s) + {options['streams']} stream(s), pid {os.getpid()}"
+            )
+        )
+        self.stdout.flush()
+        server.serve()
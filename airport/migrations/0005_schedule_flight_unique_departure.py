@@ -0,0 +1,84 @@
+# Generated by Django 5.1.5 on 2026-10-19 08:37
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0004_airplane_image_alter_flight_airplane"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="flight",
+            unique_together=set(),
+        ),
+        migrations.CreateModel(
+            name="Schedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "days_of_week",
+                    models.CharField(
+                        max_length=7,
+                        validators=[
+                            django.core.validators.RegexValidator(
+                                "^[1-7]{1,7}$",
+                                "Use ISO weekday digits, e.g. '135' for Mon, Wed and Fri.",
+                            )
+                        ],
+                    ),
+                ),
+                ("departure_time", models.TimeField()),
+                ("arrival_time", models.TimeField()),
+                ("valid_from", models.DateField()),
+                ("valid_until", models.DateField()),
+                (
+                    "airplane",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="schedules",
+                        to="airport.airplane",
+                    ),
+                ),
+                ("crew", models.ManyToManyField(blank=True, to="airport.crew")),
+                (
+                    "route",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="schedules",
+                        to="airport.route",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="flight",
+            name="schedule",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="flights",
+                to="airport.schedule",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="flight",
+            constraint=models.UniqueConstraint(
+                fields=("route", "airplane", "departure_time"),
+                name="unique_flight_route_airplane_departure",
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.5 on 2026-10-19 08:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0008_orderrequest"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SeatEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("taken", "Taken"), ("released", "Released")],
+                        max_length=8,
+                    ),
+                ),
+                ("row", models.IntegerField()),
+                ("seat", models.IntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "flight",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="seat_events",
+                        to="airport.flight",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["flight", "id"], name="seatevent_flight_id_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.1.5 on 2026-10-19 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0010_seathold"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedFlight",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("departure_time", models.DateTimeField()),
+                ("arrival_time", models.DateTimeField()),
+                ("crew_ids", models.JSONField(default=list)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "airplane",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to="airport.airplane",
+                    ),
+                ),
+                (
+                    "route",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to="airport.route",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ArchivedTicket",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("row", models.IntegerField()),
+                ("seat", models.IntegerField()),
+                ("departure_time", models.DateTimeField()),
+                (
+                    "flight",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="tickets",
+                        to="airport.archivedflight",
+                    ),
+                ),
+                (
+                    "order",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_tickets",
+                        to="airport.order",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="archivedflight",
+            index=models.Index(
+                fields=["departure_time"], name="archivedflight_departure_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="archivedticket",
+            index=models.Index(fields=["order"], name="archivedticket_order_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="archivedticket",
+            index=models.Index(fields=["flight"], name="archivedticket_flight_idx"),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.5 on 2026-10-19 09:00
+
+from django.db import migrations
+
+ARCHIVE_MODELS = ("ArchivedFlight", "ArchivedTicket")
+
+
+def partition_archive(apps, schema_editor):
+    """
+    Rebuild the archive tables as range partitions on departure_time.
+
+    PostgreSQL only; other databases keep the plain tables. A partitioned
+    table's primary key must include the partition key, so it becomes
+    (id, departure_time). Yearly partitions are created by archive_flights,
+    anything else lands in the default partition.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for model_name in ARCHIVE_MODELS:
+        model = apps.get_model("airport", model_name)
+        table = schema_editor.quote_name(model._meta.db_table)
+        partitioned = schema_editor.quote_name(f"{model._meta.db_table}_partitioned")
+        default = schema_editor.quote_name(f"{model._meta.db_table}_default")
+        schema_editor.execute(
+            f"CREATE TABLE {partitioned} (LIKE {table} INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (departure_time)"
+        )
+        schema_editor.execute(f"DROP TABLE {table}")
+        schema_editor.execute(f"ALTER TABLE {partitioned} RENAME TO {table}")
+        schema_editor.execute(
+            f"ALTER TABLE {table} ADD PRIMARY KEY (id, departure_time)"
+        )
+        schema_editor.execute(f"CREATE TABLE {default} PARTITION OF {table} DEFAULT")
+        for index in model._meta.indexes:
+            schema_editor.add_index(model, index)
+
+    ticket = apps.get_model("airport", "ArchivedTicket")
+    order = apps.get_model("airport", "Order")
+    schema_editor.execute(
+        f"ALTER TABLE {schema_editor.quote_name(ticket._meta.db_table)} "
+        "ADD CONSTRAINT archivedticket_order_fk FOREIGN KEY (order_id) "
+        f"REFERENCES {schema_editor.quote_name(order._meta.db_table)} (id) "
+        "DEFERRABLE INITIALLY DEFERRED"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0011_archivedflight_archivedticket"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_archive, migrations.RunPython.noop),
+    ]
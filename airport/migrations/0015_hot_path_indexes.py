@@ -0,0 +1,57 @@
+# Generated by Django 5.1.5 on 2026-10-19 09:15
+
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0014_airport_coordinates"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="airplane",
+            index=models.Index(
+                django.db.models.expressions.CombinedExpression(
+                    models.F("rows"), "*", models.F("seats_in_row")
+                ),
+                name="airplane_capacity_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(fields=["departure_time"], name="flight_departure_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(
+                fields=["route", "departure_time"], name="flight_route_departure_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(fields=["arrival_time"], name="flight_arrival_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "-created_at"], name="order_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="seathold",
+            index=models.Index(
+                fields=["user", "expires_at"], name="seathold_user_expires_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["flight", "row", "seat"], name="ticket_flight_seat_idx"
+            ),
+        ),
+    ]
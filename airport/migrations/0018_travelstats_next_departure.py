@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-19 10:18
+
+from django.db import migrations, models
+
+
+def drop_stats(apps, schema_editor):
+    # Rows counted booked flights before departure; they are recomputed
+    # on the next read
+    apps.get_model("airport", "TravelStats").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0017_sync_tracking"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="travelstats",
+            name="next_departure",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(drop_stats, migrations.RunPython.noop),
+    ]
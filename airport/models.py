@@ -3,13 +3,36 @@ import uuid
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import (
+    MaxValueValidator,
+    MinValueValidator,
+    RegexValidator,
+)
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 
 
 class Airport(models.Model):
     name = models.CharField(max_length=255)
     closest_big_city = models.CharField(max_length=255)
+    latitude = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+    )
+    longitude = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=("updated_at", "id"), name="airport_updated_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name}({self.closest_big_city})"
@@ -23,6 +46,12 @@ class Route(models.Model):
         Airport, on_delete=models.CASCADE, related_name="routes_to"
     )
     distance = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=("updated_at", "id"), name="route_updated_idx"),
+        ]
 
     def __str__(self):
         return f"{str(self.source)} - {self.destination.name}"
@@ -48,6 +77,16 @@ class Airplane(models.Model):
     seats_in_row = models.IntegerField()
     airplane_type = models.ForeignKey(AirplaneType, on_delete=models.CASCADE)
     image = models.ImageField(null=True, upload_to=airplane_image_file_path)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                models.F("rows") * models.F("seats_in_row"),
+                name="airplane_capacity_idx",
+            ),
+            models.Index(fields=("updated_at", "id"), name="airplane_updated_idx"),
+        ]
 
     @property
     def capacity(self):
@@ -60,6 +99,12 @@ class Airplane(models.Model):
 class Crew(models.Model):
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=("updated_at", "id"), name="crew_updated_idx"),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -69,15 +114,80 @@ class Crew(models.Model):
         return f"{self.first_name} {self.last_name}"
 
 
+class Schedule(models.Model):
+    """Recurring timetable entry expanded into concrete flights."""
+
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="schedules")
+    airplane = models.ForeignKey(
+        Airplane, on_delete=models.CASCADE, related_name="schedules"
+    )
+    days_of_week = models.CharField(
+        max_length=7,
+        validators=[
+            RegexValidator(
+                r"^[1-7]{1,7}$",
+                "Use ISO weekday digits, e.g. '135' for Mon, Wed and Fri.",
+            )
+        ],
+    )
+    departure_time = models.TimeField()
+    arrival_time = models.TimeField()
+    valid_from = models.DateField()
+    valid_until = models.DateField()
+    crew = models.ManyToManyField(Crew, blank=True)
+
+    @property
+    def weekdays(self):
+        return {int(day) for day in self.days_of_week}
+
+    def clean(self):
+        if self.valid_until < self.valid_from:
+            raise ValidationError(
+                {"valid_until": "valid_until must not be before valid_from"}
+            )
+
+    def __str__(self):
+        return (
+            f"{self.route} {self.airplane.name} {self.days_of_week} "
+            f"{self.departure_time} ({self.valid_from} - {self.valid_until})"
+        )
+
+
 class Flight(models.Model):
     route = models.ForeignKey(Route, on_delete=models.CASCADE)
     airplane = models.ForeignKey(Airplane, on_delete=models.CASCADE)
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crew = models.ManyToManyField(Crew)
+    schedule = models.ForeignKey(
+        Schedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="flights",
+    )
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        unique_together = (("route", "airplane"),)
+        constraints = [
+            models.UniqueConstraint(
+                fields=("route", "airplane", "departure_time"),
+                name="unique_flight_route_airplane_departure",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=("airplane", "departure_time"),
+                name="flight_airplane_departure_idx",
+            ),
+            models.Index(fields=("departure_time",), name="flight_departure_idx"),
+            models.Index(
+                fields=("route", "departure_time"),
+                name="flight_route_departure_idx",
+            ),
+            models.Index(fields=("arrival_time",), name="flight_arrival_idx"),
+            models.Index(fields=("updated_at", "id"), name="flight_updated_idx"),
+        ]
 
     def __str__(self):
         return (
@@ -93,8 +203,19 @@ class Order(models.Model):
     def __str__(self):
         return f"{self.created_at} - {self.user}"
 
+    @property
+    def all_tickets(self):
+        """Live tickets together with those moved out by archive_flights."""
+        return sorted(
+            [*self.tickets.all(), *self.archived_tickets.all()],
+            key=lambda ticket: ticket.id,
+        )
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=("user", "-created_at"), name="order_user_created_idx"),
+        ]
 
 
 class Ticket(models.Model):
@@ -139,5 +260,257 @@ class Ticket(models.Model):
             force_insert, force_update, using, update_fields
         )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=("flight", "row", "seat"), name="ticket_flight_seat_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"{str(self.flight)} ({self.row} {self.seat}) "
+
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a request made with an Idempotency-Key header."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("user", "key"), name="unique_idempotency_key_per_user"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.key} ({self.response_status})"
+
+
+class OrderRequest(models.Model):
+    """Queued order waiting to be confirmed by process_order_queue."""
+
+    PENDING = "pending"
+    CONFIRMED = "confirmed"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (CONFIRMED, "Confirmed"),
+        (FAILED, "Failed"),
+    )
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    payload = models.JSONField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    errors = models.JSONField(null=True, blank=True)
+    order = models.OneToOneField(
+        Order,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="request",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=("status", "created_at"), name="orderrequest_status_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.status} ({self.created_at})"
+
+
+class SeatEvent(models.Model):
+    """Append-only log of seats taken or released, read by the SSE feed."""
+
+    TAKEN = "taken"
+    RELEASED = "released"
+    KIND_CHOICES = ((TAKEN, "Taken"), (RELEASED, "Released"))
+
+    flight = models.ForeignKey(
+        Flight, on_delete=models.CASCADE, related_name="seat_events"
+    )
+    kind = models.CharField(max_length=8, choices=KIND_CHOICES)
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=("flight", "id"), name="seatevent_flight_id_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.flight_id} {self.kind} ({self.row} {self.seat})"
+
+
+class SeatHold(models.Model):
+    """Seat reserved for a user until expires_at while they check out."""
+
+    flight = models.ForeignKey(Flight, on_delete=models.CASCADE, related_name="holds")
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("flight", "row", "seat"), name="unique_seat_hold"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=("user", "expires_at"), name="seathold_user_expires_idx"
+            ),
+        ]
+
+    @property
+    def is_active(self):
+        return self.expires_at > timezone.now()
+
+    def __str__(self):
+        return f"{self.flight_id} ({self.row} {self.seat}) until {self.expires_at}"
+
+
+class ArchivedFlight(models.Model):
+    """
+    Flight moved out of the hot table by archive_flights, keeping its id.
+
+    On PostgreSQL the table is range-partitioned by departure_time, so
+    route and airplane are plain references: history outlives them.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    route = models.ForeignKey(
+        Route, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False
+    )
+    airplane = models.ForeignKey(
+        Airplane, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False
+    )
+    departure_time = models.DateTimeField()
+    arrival_time = models.DateTimeField()
+    crew_ids = models.JSONField(default=list)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=("departure_time",), name="archivedflight_departure_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.route_id} {self.airplane_id} {self.departure_time} (archived)"
+
+
+class ArchivedTicket(models.Model):
+    """Ticket of an archived flight; departure_time is the partition key."""
+
+    id = models.BigIntegerField(primary_key=True)
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    flight = models.ForeignKey(
+        ArchivedFlight,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name="tickets",
+    )
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name="archived_tickets",
+    )
+    departure_time = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=("order",), name="archivedticket_order_idx"),
+            models.Index(fields=("flight",), name="archivedticket_flight_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.flight_id} ({self.row} {self.seat}) (archived)"
+
+
+class TravelStats(models.Model):
+    """
+    Per-user totals of departed flights for the loyalty screen, kept up to
+    date as orders are created or deleted (airport.travel_stats) instead
+    of aggregated per request.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="travel_stats",
+    )
+    flights_taken = models.PositiveIntegerField(default=0)
+    distance = models.PositiveBigIntegerField(default=0)
+    airport_visits = models.JSONField(default=dict)
+    # First departure booked but not yet counted; the row is recomputed
+    # once it has passed
+    next_departure = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user}: {self.flights_taken} flights, {self.distance} km"
+
+
+class RequestProfile(models.Model):
+    """
+    CPU profile and allocation snapshot of one request, recorded on
+    demand for staff by airport.profiling.ProfilingMiddleware.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="request_profiles",
+    )
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    summary = models.JSONField(default=dict)
+    stats = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.1f} ms)"
+
+
+class Tombstone(models.Model):
+    """A deleted object that delta-sync clients must drop from their caches."""
+
+    kind = models.CharField(max_length=32)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=("kind", "deleted_at", "id"), name="tombstone_kind_deleted_idx"
+            ),
+            models.Index(fields=("deleted_at",), name="tombstone_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted {self.deleted_at}"
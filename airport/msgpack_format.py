@@ -0,0 +1,58 @@
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+MEDIA_TYPE = "application/msgpack"
+
+# Dates, decimals, UUIDs, lazy strings... become exactly what the JSON
+# renderer would write, so both formats carry the same data
+_to_json_types = JSONEncoder().default
+
+
+def packb(data):
+    return msgpack.packb(
+        data, default=_to_json_types, use_bin_type=True, datetime=False
+    )
+
+
+def _str_keyed(pairs):
+    # Serializers expect JSON objects: string keys at every depth
+    if not all(isinstance(key, str) for key, _ in pairs):
+        raise ValueError("map keys must be strings")
+    return dict(pairs)
+
+
+def unpackb(content):
+    return msgpack.unpackb(content, raw=False, object_pairs_hook=_str_keyed)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack responses for clients sending
+    ``Accept: application/msgpack`` (or ``?format=msgpack``).
+    """
+
+    media_type = MEDIA_TYPE
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return packb(data)
+
+
+class MessagePackParser(BaseParser):
+    """Request bodies sent with ``Content-Type: application/msgpack``."""
+
+    media_type = MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            data = unpackb(stream.read())
+        except ValueError as error:  # malformed, truncated, trailing data or keys
+            raise ParseError(f"MessagePack parse error - {error}")
+        return data
@@ -0,0 +1,174 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from airport.models import (
+    Flight,
+    Order,
+    OrderRequest,
+    SeatEvent,
+    SeatHold,
+    Ticket,
+)
+from airport.seat_events import record
+from airport.travel_stats import record_orders
+
+PREFER_ASYNC = "respond-async"
+
+
+class QueuedTicketSerializer(serializers.Serializer):
+    """Shape-only ticket validation: no database access."""
+
+    row = serializers.IntegerField(min_value=1)
+    seat = serializers.IntegerField(min_value=1)
+    flight = serializers.IntegerField(min_value=1)
+
+
+class QueuedOrderSerializer(serializers.Serializer):
+    tickets = QueuedTicketSerializer(many=True, allow_empty=False)
+
+
+class OrderRequestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderRequest
+        fields = ("id", "status", "order", "errors", "created_at", "processed_at")
+
+
+def wants_async(request):
+    if getattr(settings, "AIRPORT_ASYNC_ORDERS", False):
+        return True
+    return PREFER_ASYNC in request.META.get("HTTP_PREFER", "")
+
+
+class QueuedCreateMixin:
+    """
+    Accept-then-process mode for ``create``.
+
+    With ``Prefer: respond-async`` (or AIRPORT_ASYNC_ORDERS) the payload is
+    only shape-checked, stored as an OrderRequest and answered with 202.
+    ``process_order_queue`` confirms queued requests later, many per
+    transaction.
+    """
+
+    def create(self, request, *args, **kwargs):
+        if not wants_async(request):
+            return super().create(request, *args, **kwargs)
+        serializer = QueuedOrderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order_request = OrderRequest.objects.create(
+            user=request.user, payload=serializer.validated_data
+        )
+        data = OrderRequestSerializer(order_request).data
+        data["status_url"] = reverse(
+            "airport:orderrequest-detail", args=[order_request.id]
+        )
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+
+def _claim(batch_size):
+    queryset = OrderRequest.objects.filter(status=OrderRequest.PENDING).order_by(
+        "created_at", "id"
+    )
+    if connection.features.has_select_for_update_skip_locked:
+        queryset = queryset.select_for_update(skip_locked=True)
+    return list(queryset[:batch_size])
+
+
+def _check(order_request, flights, holds):
+    errors = []
+    for ticket in order_request.payload["tickets"]:
+        flight = flights.get(ticket["flight"])
+        if flight is None:
+            errors.append({"flight": f"Invalid pk \"{ticket['flight']}\""})
+            continue
+        try:
+            Ticket.validate_ticket(
+                ticket["row"], ticket["seat"], flight.airplane, ValidationError
+            )
+        except ValidationError as error:
+            errors.append(error.detail)
+            continue
+        holder = holds.get((ticket["flight"], ticket["row"], ticket["seat"]))
+        if holder is not None and holder != order_request.user_id:
+            errors.append({"seat": "seat is held by another customer"})
+    return errors
+
+
+def process_batch(batch_size=200):
+    """
+    Confirm up to batch_size pending requests in a single transaction.
+
+    Flights of the whole batch are loaded with one query, tickets are
+    validated with the same rules as TicketSerializer, and valid requests
+    are written with one bulk insert for orders and one for tickets; the
+    buyers' holds on those seats are released with one delete. Returns the number of requests processed.
+    """
+    with transaction.atomic():
+        batch = _claim(batch_size)
+        if not batch:
+            return 0
+        flight_ids = {
+            ticket["flight"]
+            for order_request in batch
+            for ticket in order_request.payload["tickets"]
+        }
+        flights = Flight.objects.select_related("airplane").in_bulk(flight_ids)
+
+        now = timezone.now()
+        holds = {
+            (flight_id, row, seat): user_id
+            for flight_id, row, seat, user_id in SeatHold.objects.filter(
+                flight_id__in=flight_ids, expires_at__gt=now
+            ).values_list("flight_id", "row", "seat", "user_id")
+        }
+        accepted = []
+        for order_request in batch:
+            order_request.processed_at = now
+            errors = _check(order_request, flights, holds)
+            if errors:
+                order_request.status = OrderRequest.FAILED
+                order_request.errors = {"tickets": errors}
+            else:
+                order_request.status = OrderRequest.CONFIRMED
+                accepted.append(order_request)
+
+        orders = Order.objects.bulk_create(
+            [Order(user_id=order_request.user_id) for order_request in accepted]
+        )
+        tickets = Ticket.objects.bulk_create(
+            [
+                Ticket(
+                    order=order,
+                    flight_id=ticket["flight"],
+                    row=ticket["row"],
+                    seat=ticket["seat"],
+                )
+                for order, order_request in zip(orders, accepted)
+                for ticket in order_request.payload["tickets"]
+            ]
+        )
+        # bulk_create skips the post_save signal that feeds the seat log
+        record(tickets, SeatEvent.TAKEN)
+        # Release the buyers' own holds on the seats they got, as
+        # OrderSerializer.create does
+        bought = Q(pk__in=[])
+        for ticket in tickets:
+            bought |= Q(
+                user_id=ticket.order.user_id,
+                flight_id=ticket.flight_id,
+                row=ticket.row,
+                seat=ticket.seat,
+            )
+        SeatHold.objects.filter(bought).delete()
+        record_orders(orders)
+        for order, order_request in zip(orders, accepted):
+            order_request.order = order
+        OrderRequest.objects.bulk_update(
+            batch, ("status", "errors", "order", "processed_at")
+        )
+    return len(batch)
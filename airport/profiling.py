@@ -0,0 +1,245 @@
+import cProfile
+import marshal
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.models import query as queryset_module
+from django.db.models.sql import Query
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+
+from airport.fastpath import FieldPlan
+from airport.models import RequestProfile
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_PARAM = "profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+TRACEMALLOC_FRAMES = 10
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 20
+
+
+def _code_key(func):
+    code = func.__code__
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+# Entry points of each phase in the cProfile stats. None of them calls
+# another one of the same phase, so their cumulative times add up; a
+# queryset first evaluated while serializing counts in both phases.
+PHASES = {
+    "queryset": [
+        _code_key(iterable.__iter__)
+        for iterable in (
+            queryset_module.ModelIterable,
+            queryset_module.RawModelIterable,
+            queryset_module.ValuesIterable,
+            queryset_module.ValuesListIterable,
+            queryset_module.NamedValuesListIterable,
+            queryset_module.FlatValuesListIterable,
+        )
+    ]
+    + [_code_key(Query.get_aggregation), _code_key(Query.has_results)],
+    "serialization": [
+        _code_key(BaseSerializer.data.fget),
+        _code_key(FieldPlan.render_rows),
+    ],
+    "rendering": [_code_key(Response.rendered_content.fget)],
+}
+
+# tracemalloc and cProfile are process-wide, so one request at a time
+_lock = threading.Lock()
+
+
+def sample_rate(value):
+    """Fraction of requests to profile for a flag value: "1", "0.1", "true"."""
+    try:
+        rate = float(value)
+    except ValueError:
+        return 1.0 if value.lower() in ("true", "yes", "on") else 0.0
+    return min(max(rate, 0.0), 1.0)
+
+
+def is_staff_request(request, view_func):
+    """
+    Authenticate like the view will, so token-authenticated staff can
+    profile DRF endpoints; plain Django views rely on request.user.
+    """
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        user = getattr(request, "user", None)
+    else:
+        view = view_class(**getattr(view_func, "initkwargs", {}))
+        try:
+            user = Request(request, authenticators=view.get_authenticators()).user
+        except APIException:
+            return False
+    return bool(user is not None and user.is_staff)
+
+
+class QueryTimer:
+    """execute_wrapper collecting the count and duration of SQL statements."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def phase_times(stats):
+    """Seconds spent in each of PHASES according to ``pstats`` data."""
+    return {
+        phase: sum(stats[key][3] for key in keys if key in stats)
+        for phase, keys in PHASES.items()
+    }
+
+
+def top_functions(stats, limit=TOP_FUNCTIONS):
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [
+        {
+            "function": pstats.func_std_string(key),
+            "calls": calls,
+            "tottime_ms": round(tottime * 1000, 3),
+            "cumtime_ms": round(cumtime * 1000, 3),
+        }
+        for key, (_, calls, tottime, cumtime, _) in rows[:limit]
+    ]
+
+
+def top_allocations(snapshot, limit=TOP_ALLOCATIONS):
+    snapshot = snapshot.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+    )
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+class ProfilingMiddleware:
+    """
+    Profile single requests on demand for staff.
+
+    A request carrying ``X-Profile: <rate>`` or ``?profile=<rate>`` from
+    a staff user is run under cProfile and tracemalloc with probability
+    ``rate`` (1 when the flag is just "1" or "true"). The result is kept
+    as a RequestProfile, its id returned in ``X-Profile-Id``; the stats
+    download as a ``.prof`` file for pstats or snakeviz.
+
+    With AIRPORT_PROFILING disabled the middleware removes itself at
+    startup; otherwise requests without the flag cost one lookup.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "AIRPORT_PROFILING", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            session = getattr(request, "_profile_session", None)
+            if session is not None:
+                session.stop()
+        if session is not None:
+            profile = session.save(request, response)
+            response[PROFILE_ID_HEADER] = str(profile.id)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        flag = request.META.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM)
+        if not flag or random.random() >= sample_rate(flag):
+            return None
+        if not is_staff_request(request, view_func):
+            return None
+        if not _lock.acquire(blocking=False):
+            return None
+        request._profile_session = ProfileSession()
+        return None
+
+
+class ProfileSession:
+    """Profilers running for one request, from the view to the response."""
+
+    def __init__(self):
+        self.queries = QueryTimer()
+        self._query_context = connection.execute_wrapper(self.queries)
+        self._query_context.__enter__()
+        # Leave tracing alone if it was already on (PYTHONTRACEMALLOC)
+        self._owns_tracemalloc = not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self.profiler = cProfile.Profile()
+        self.started = time.perf_counter()
+        self.profiler.enable()
+
+    def stop(self):
+        try:
+            self.profiler.disable()
+            self.duration = time.perf_counter() - self.started
+            self.snapshot = tracemalloc.take_snapshot()
+            _, self.peak = tracemalloc.get_traced_memory()
+        finally:
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+            self._query_context.__exit__(None, None, None)
+            _lock.release()
+
+    def save(self, request, response):
+        self.profiler.create_stats()
+        stats = self.profiler.stats
+        user = getattr(request, "user", None)
+        profile = RequestProfile.objects.create(
+            user=user if user is not None and user.is_authenticated else None,
+            method=request.method,
+            path=request.get_full_path()[:2048],
+            status_code=response.status_code,
+            duration_ms=self.duration * 1000,
+            summary={
+                "phases_ms": {
+                    phase: round(seconds * 1000, 3)
+                    for phase, seconds in phase_times(stats).items()
+                },
+                "sql": {
+                    "queries": self.queries.count,
+                    "time_ms": round(self.queries.seconds * 1000, 3),
+                },
+                "memory": {"peak_kb": round(self.peak / 1024, 1)},
+                "functions": top_functions(stats),
+                "allocations": top_allocations(self.snapshot),
+            },
+            stats=marshal.dumps(stats),
+        )
+        prune()
+        return profile
+
+
+def prune():
+    """Keep only the newest AIRPORT_PROFILING_KEEP profiles."""
+    keep = getattr(settings, "AIRPORT_PROFILING_KEEP", 100)
+    stale = RequestProfile.objects.values_list("id", flat=True)[keep:]
+    RequestProfile.objects.filter(id__in=list(stale)).delete()
@@ -0,0 +1,231 @@
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, OperationalError, connection
+from django.db.models import QuerySet
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from airport.streaming import STREAM_PARAM, wants_stream
+
+logger = logging.getLogger(__name__)
+
+LIMIT_PARAM = "limit"
+OFFSET_PARAM = "offset"
+NEXT_OFFSET_HEADER = "X-Next-Offset"
+PAGE_SIZE_HEADER = "X-Page-Size"
+TIMEOUT_METRIC_KEY = "airport:metrics:query_timeouts"
+# PostgreSQL query_canceled, raised when statement_timeout fires
+POSTGRES_QUERY_CANCELED = "57014"
+SQLITE_PROGRESS_STEPS = 1000
+
+
+class QueryTimeout(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The query took too long. Narrow the filters or try later."
+    default_code = "query_timeout"
+
+    def __init__(self, wait=None):
+        super().__init__()
+        # Sent as Retry-After by the DRF exception handler
+        self.wait = wait
+
+
+def is_timeout(error):
+    """Whether a database error means a statement ran out of time."""
+    if not isinstance(error, OperationalError):
+        return False
+    cause = error.__cause__
+    if getattr(cause, "pgcode", None) == POSTGRES_QUERY_CANCELED:
+        return True
+    return connection.vendor == "sqlite" and str(error) == "interrupted"
+
+
+def record_timeout(endpoint):
+    """Count a timed-out statement per endpoint in the (shared) cache."""
+    logger.warning("statement timeout on %s", endpoint)
+    key = f"{TIMEOUT_METRIC_KEY}:{endpoint}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def timeout_count(endpoint):
+    return cache.get(f"{TIMEOUT_METRIC_KEY}:{endpoint}", 0)
+
+
+class StatementTimer:
+    """
+    execute_wrapper recording timed-out statements. On SQLite, which has
+    no statement_timeout, it also enforces the limit with a progress
+    handler that interrupts a statement once its time is up.
+    """
+
+    def __init__(self, endpoint, milliseconds):
+        self.endpoint = endpoint
+        self.seconds = milliseconds / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        sqlite = context["connection"].vendor == "sqlite"
+        if sqlite:
+            deadline = time.monotonic() + self.seconds
+            context["connection"].connection.set_progress_handler(
+                lambda: time.monotonic() > deadline, SQLITE_PROGRESS_STEPS
+            )
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as error:
+            if is_timeout(error):
+                record_timeout(self.endpoint)
+            raise
+        finally:
+            if sqlite:
+                context["connection"].connection.set_progress_handler(None, 0)
+
+
+@contextmanager
+def statement_timeout(endpoint, milliseconds):
+    """Limit every statement run inside the block to ``milliseconds``."""
+    if not milliseconds:
+        yield
+        return
+    postgres = connection.vendor == "postgresql"
+    if postgres:
+        with connection.cursor() as cursor:
+            cursor.execute("SET statement_timeout = %s", [int(milliseconds)])
+    try:
+        with connection.execute_wrapper(StatementTimer(endpoint, milliseconds)):
+            yield
+    finally:
+        if postgres:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("RESET statement_timeout")
+            except DatabaseError:
+                # The connection is broken and will be discarded anyway
+                pass
+
+
+def get_int_param(request, name, default):
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValidationError({name: "Must be an integer."})
+    if number < 0:
+        raise ValidationError({name: "Must not be negative."})
+    return number
+
+
+class QueryGuardMixin:
+    """
+    Bound the cost of every request to the viewset.
+
+    * Statements run under a timeout from AIRPORT_STATEMENT_TIMEOUTS,
+      looked up by "<basename>-<action>" (e.g. "flight-list") with
+      "default" as fallback. A statement that runs out of time is counted
+      (see ``timeout_count``) and answered with 503 and Retry-After
+      instead of holding the worker.
+    * ``list`` returns at most AIRPORT_MAX_PAGE_SIZE rows; clients page
+      with ?limit=&offset= and the ``X-Next-Offset`` header tells them
+      when more rows follow. ``X-Page-Size`` gives the limit actually
+      applied, so a client asking for more than the cap can tell.
+      Offsets past AIRPORT_MAX_OFFSET are rejected, as the database still
+      reads every skipped row.
+    * When ``selective_filters`` is set, lists filtered by none of them
+      read most of the table; they are downgraded to pages of at most
+      AIRPORT_SCAN_PAGE_SIZE rows.
+
+    Streamed lists (?stream=true) are exports meant to read everything
+    and are not paged, so without one of ``selective_filters`` only staff
+    may stream. Their rows are read after ``dispatch`` has returned, and
+    ``get_stream_chunks`` puts them back under the statement timeout.
+    """
+
+    selective_filters = None
+
+    def get_statement_timeout(self, action):
+        timeouts = getattr(settings, "AIRPORT_STATEMENT_TIMEOUTS", {})
+        return timeouts.get(f"{self.basename}-{action}", timeouts.get("default"))
+
+    def dispatch(self, request, *args, **kwargs):
+        action = self.action_map.get(request.method.lower())
+        endpoint = f"{self.basename}-{action}"
+        with statement_timeout(endpoint, self.get_statement_timeout(action)):
+            return super().dispatch(request, *args, **kwargs)
+
+    def get_stream_chunks(self, queryset):
+        endpoint = f"{self.basename}-{self.action}"
+        with statement_timeout(endpoint, self.get_statement_timeout(self.action)):
+            yield from super().get_stream_chunks(queryset)
+
+    def handle_exception(self, exc):
+        if is_timeout(exc):
+            exc = QueryTimeout(
+                wait=getattr(settings, "AIRPORT_QUERY_TIMEOUT_RETRY_AFTER", 5)
+            )
+        return super().handle_exception(exc)
+
+    def is_streamed(self):
+        return wants_stream(self.request)
+
+    def is_selective(self):
+        """Whether the request narrows the list by an indexed filter."""
+        return self.selective_filters is None or any(
+            self.request.query_params.get(name) for name in self.selective_filters
+        )
+
+    def get_page_size(self):
+        page_size = getattr(settings, "AIRPORT_MAX_PAGE_SIZE", 1000)
+        if not self.is_selective():
+            page_size = min(page_size, getattr(settings, "AIRPORT_SCAN_PAGE_SIZE", 100))
+        return page_size
+
+    def get_page(self):
+        """(offset, limit) of the rows this list request may return."""
+        page_size = self.get_page_size()
+        limit = min(get_int_param(self.request, LIMIT_PARAM, page_size), page_size)
+        offset = get_int_param(self.request, OFFSET_PARAM, 0)
+        max_offset = getattr(settings, "AIRPORT_MAX_OFFSET", 10000)
+        if offset > max_offset:
+            raise ValidationError(
+                {OFFSET_PARAM: f"At most {max_offset}; narrow the filters instead."}
+            )
+        return offset, limit
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action != "list" or self.is_streamed():
+            return queryset
+        if not isinstance(queryset, QuerySet):
+            return queryset
+        offset, limit = self.get_page()
+        if not queryset.ordered:
+            # Pages must not overlap
+            queryset = queryset.order_by("pk")
+        # One row more than asked tells whether another page follows
+        return queryset[offset : offset + limit + 1]
+
+    def list(self, request, *args, **kwargs):
+        if self.is_streamed():
+            if not (request.user.is_staff or self.is_selective()):
+                raise ValidationError(
+                    {
+                        STREAM_PARAM: "Only staff may stream the whole list; "
+                        f"filter by {' or '.join(self.selective_filters)}."
+                    }
+                )
+            return super().list(request, *args, **kwargs)
+        offset, limit = self.get_page()
+        response = super().list(request, *args, **kwargs)
+        response[PAGE_SIZE_HEADER] = str(limit)
+        if isinstance(response.data, list) and len(response.data) > limit:
+            response.data = response.data[:limit]
+            response[NEXT_OFFSET_HEADER] = str(offset + limit)
+        return response
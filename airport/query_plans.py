@@ -0,0 +1,143 @@
+import re
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from airport.models import (
+    ArchivedTicket,
+    Flight,
+    IdempotencyKey,
+    OrderRequest,
+    SeatEvent,
+    SeatHold,
+    Ticket,
+)
+from airport.views import (
+    AirplaneViewSet,
+    FlightViewSet,
+    OrderViewSet,
+    SeatHoldViewSet,
+)
+
+MOMENT = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+def viewset_queryset(viewset, params=None, action="list"):
+    """
+    The queryset ``viewset`` builds for a GET with query ``params``, so
+    the plan follows any change to its ``get_queryset``. The request user
+    is an unsaved staff user with id 1.
+    """
+    request = Request(APIRequestFactory().get("/", params or {}))
+    request.user = get_user_model()(id=1, is_staff=True)
+    view = viewset(
+        action=action, request=request, args=(), kwargs={}, format_kwarg=None
+    )
+    return view.get_queryset()
+
+
+# Filters and orderings the viewsets and workers run on every request or
+# batch, each expected to be answered from an index. Viewset entries are
+# built by the viewsets themselves; the rest mirror the worker and
+# serializer queries. Plans only depend on the shape of the query, so the
+# ids are placeholders.
+HOT_QUERIES = {
+    "flight list: departure_after": lambda: viewset_queryset(
+        FlightViewSet, {"departure_after": MOMENT.isoformat()}
+    ),
+    "flight list: route_id + departure_after": lambda: viewset_queryset(
+        FlightViewSet, {"route_id": 1, "departure_after": MOMENT.isoformat()}
+    ),
+    "flight list: airplane_id": lambda: viewset_queryset(
+        FlightViewSet, {"airplane_id": 1}
+    ),
+    "crew roster": lambda: Flight.objects.filter(
+        crew=1, arrival_time__gt=MOMENT
+    ).order_by("departure_time"),
+    "seat taken": lambda: Ticket.objects.filter(flight_id=1, row=1, seat=1),
+    "order history": lambda: viewset_queryset(OrderViewSet),
+    "order tickets prefetch": lambda: Ticket.objects.filter(order_id__in=[1, 2]),
+    "archived order tickets prefetch": lambda: ArchivedTicket.objects.filter(
+        order_id__in=[1, 2]
+    ),
+    "airplane list: min_capacity": lambda: viewset_queryset(
+        AirplaneViewSet, {"min_capacity": 100}
+    ),
+    "active seat holds": lambda: viewset_queryset(SeatHoldViewSet),
+    "seat hold conflict": lambda: SeatHold.objects.filter(flight_id=1, row=1, seat=1),
+    "expired seat holds": lambda: SeatHold.objects.filter(expires_at__lte=MOMENT),
+    "seat events since": lambda: SeatEvent.objects.filter(
+        flight_id=1, id__gt=100
+    ).order_by("id"),
+    "order queue claim": lambda: OrderRequest.objects.filter(
+        status=OrderRequest.PENDING
+    ).order_by("created_at", "id"),
+    "expired idempotency keys": lambda: IdempotencyKey.objects.filter(
+        expires_at__lte=MOMENT
+    ),
+    "flights due for archival": lambda: Flight.objects.filter(arrival_time__lt=MOMENT),
+}
+
+# Entries whose rows must also come out of the index already in order:
+# these lists are paged through, so a sort step reads every matching row
+# before the first page can be returned.
+ORDERED_QUERIES = {"order history", "seat events since", "order queue claim"}
+
+SQLITE_FULL_SCAN = re.compile(r"\bSCAN (\w+)$")
+POSTGRES_FULL_SCAN = re.compile(r"Seq Scan on (\w+)")
+SQLITE_SORT = re.compile(r"USE TEMP B-TREE FOR .*ORDER BY")
+POSTGRES_SORT = re.compile(r"^(?:->\s*)?(?:Incremental )?Sort\s+\(")
+
+
+def explain(queryset):
+    """
+    Plan text for ``queryset`` on the default database.
+
+    PostgreSQL is asked with sequential scans disabled: on small or
+    freshly seeded tables a seq scan is cheaper and would be chosen even
+    with a good index, while with them disabled a seq scan in the plan
+    means no index can answer the query at all.
+    """
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+
+def full_scans(plan):
+    """Tables read with a full sequential scan according to ``plan``."""
+    pattern = (
+        POSTGRES_FULL_SCAN if connection.vendor == "postgresql" else SQLITE_FULL_SCAN
+    )
+    return sorted(
+        {
+            match.group(1)
+            for line in plan.splitlines()
+            if (match := pattern.search(line.strip()))
+        }
+    )
+
+
+def sorts(plan):
+    """Whether ``plan`` sorts the rows rather than reading them in order."""
+    pattern = POSTGRES_SORT if connection.vendor == "postgresql" else SQLITE_SORT
+    return any(pattern.search(line.strip()) for line in plan.splitlines())
+
+
+def supported():
+    return connection.vendor in ("postgresql", "sqlite")
+
+
+def check_hot_queries():
+    """
+    Yield (name, plan, tables scanned, sorted) for every query in
+    HOT_QUERIES, where ``sorted`` flags a sort step in an ORDERED_QUERIES
+    entry.
+    """
+    for name, build in HOT_QUERIES.items():
+        plan = explain(build())
+        yield name, plan, full_scans(plan), name in ORDERED_QUERIES and sorts(plan)
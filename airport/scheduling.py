@@ -0,0 +1,192 @@
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from airport.conflicts import indexes_covering
+from airport.models import Flight, Schedule, Ticket
+
+FlightCrew = Flight.crew.through
+
+
+def schedule_departures(schedule, start=None):
+    """Yield (departure, arrival) pairs for every day the schedule flies."""
+    day = schedule.valid_from
+    if start is not None and start > day:
+        day = start
+    weekdays = schedule.weekdays
+    tz = timezone.get_current_timezone()
+    while day <= schedule.valid_until:
+        if day.isoweekday() in weekdays:
+            departure = timezone.make_aware(
+                datetime.combine(day, schedule.departure_time), tz
+            )
+            arrival = timezone.make_aware(
+                datetime.combine(day, schedule.arrival_time), tz
+            )
+            if arrival <= departure:
+                arrival += timedelta(days=1)
+            yield departure, arrival
+        day += timedelta(days=1)
+
+
+def check_conflicts(schedule, windows, crew_ids):
+    """
+    Raise ValidationError if flights of the schedule in the (departure,
+    arrival) ``windows`` would double-book its airplane or crew. Bulk writes
+    skip the overlap checks of FlightSerializer, so they are repeated here
+    against flights created by hand or by other schedules.
+    """
+    airplane_index, crew_index = indexes_covering(windows)
+    own = set(Flight.objects.filter(schedule=schedule).values_list("id", flat=True))
+    errors = []
+    for departure, arrival in sorted(windows):
+        when = timezone.localtime(departure).strftime("%Y-%m-%d %H:%M")
+        busy = (
+            set(airplane_index.overlapping(schedule.airplane_id, departure, arrival))
+            - own
+        )
+        if busy:
+            errors.append(
+                f"{when}: airplane is already assigned to overlapping "
+                f"flight(s) {sorted(busy)}"
+            )
+        for crew_id in sorted(crew_ids):
+            busy = set(crew_index.overlapping(crew_id, departure, arrival)) - own
+            if busy:
+                errors.append(
+                    f"{when}: crew member {crew_id} is already assigned to "
+                    f"overlapping flight(s) {sorted(busy)}"
+                )
+    if errors:
+        raise ValidationError({"flights": errors})
+
+
+def generate_flights(schedule):
+    """
+    Bring the future flights of a schedule in line with its definition.
+
+    Flights already departed are left untouched. Future flights are matched
+    to the timetable by departure date: missing ones are bulk-created,
+    changed ones are bulk-updated and those no longer in the timetable are
+    deleted unless tickets were sold for them. Crew links are diffed and
+    written with bulk inserts. Returns a dict with created/updated/deleted
+    counts; raises ValidationError, writing nothing, if the timetable would
+    double-book the airplane or crew.
+    """
+    now = timezone.now()
+    wanted = {
+        departure.date(): (departure, arrival)
+        for departure, arrival in schedule_departures(
+            schedule, start=timezone.localdate(now)
+        )
+        if departure > now
+    }
+    crew_ids = set(schedule.crew.values_list("id", flat=True))
+
+    with transaction.atomic():
+        existing = {
+            timezone.localdate(flight.departure_time): flight
+            for flight in Flight.objects.select_for_update().filter(
+                schedule=schedule, departure_time__gt=now
+            )
+        }
+        check_conflicts(schedule, list(wanted.values()), crew_ids)
+
+        to_update = []
+        for day, flight in existing.items():
+            if day not in wanted:
+                continue
+            departure, arrival = wanted[day]
+            if (
+                flight.route_id != schedule.route_id
+                or flight.airplane_id != schedule.airplane_id
+                or flight.departure_time != departure
+                or flight.arrival_time != arrival
+            ):
+                flight.route_id = schedule.route_id
+                flight.airplane_id = schedule.airplane_id
+                flight.departure_time = departure
+                flight.arrival_time = arrival
+                flight.updated_at = timezone.now()
+                to_update.append(flight)
+        Flight.objects.bulk_update(
+            to_update,
+            ("route", "airplane", "departure_time", "arrival_time", "updated_at"),
+        )
+
+        stale_ids = [flight.id for day, flight in existing.items() if day not in wanted]
+        sold_ids = set(
+            Ticket.objects.filter(flight_id__in=stale_ids).values_list(
+                "flight_id", flat=True
+            )
+        )
+        _, deleted = Flight.objects.filter(
+            id__in=[flight_id for flight_id in stale_ids if flight_id not in sold_ids]
+        ).delete()
+        deleted = deleted.get(Flight._meta.label, 0)
+        Flight.objects.filter(id__in=sold_ids).update(schedule=None)
+
+        try:
+            # A flight added by hand since the check above may still collide
+            created = Flight.objects.bulk_create(
+                [
+                    Flight(
+                        route_id=schedule.route_id,
+                        airplane_id=schedule.airplane_id,
+                        departure_time=departure,
+                        arrival_time=arrival,
+                        schedule=schedule,
+                    )
+                    for day, (departure, arrival) in wanted.items()
+                    if day not in existing
+                ]
+            )
+        except IntegrityError:
+            raise ValidationError(
+                {"flights": "airplane is already assigned to a flight at that time"}
+            )
+        if any(flight.pk is None for flight in created):
+            created = list(
+                Flight.objects.filter(
+                    schedule=schedule,
+                    departure_time__in=[flight.departure_time for flight in created],
+                )
+            )
+
+        kept_ids = [flight.id for day, flight in existing.items() if day in wanted]
+        unlinked = FlightCrew.objects.filter(flight_id__in=kept_ids).exclude(
+            crew_id__in=crew_ids
+        )
+        recrewed = set(unlinked.values_list("flight_id", flat=True))
+        unlinked.delete()
+        linked = set(
+            FlightCrew.objects.filter(flight_id__in=kept_ids).values_list(
+                "flight_id", "crew_id"
+            )
+        )
+        links = [
+            FlightCrew(flight_id=flight_id, crew_id=crew_id)
+            for flight_id in kept_ids + [flight.id for flight in created]
+            for crew_id in crew_ids
+            if (flight_id, crew_id) not in linked
+        ]
+        FlightCrew.objects.bulk_create(links)
+        # Bulk link writes send no m2m_changed: mark the flights for delta sync
+        recrewed.update(link.flight_id for link in links)
+        Flight.objects.filter(id__in=recrewed.intersection(kept_ids)).update(
+            updated_at=timezone.now()
+        )
+
+    return {"created": len(created), "updated": len(to_update), "deleted": deleted}
+
+
+def generate_all(schedules=None):
+    if schedules is None:
+        schedules = Schedule.objects.all()
+    totals = {"created": 0, "updated": 0, "deleted": 0}
+    for schedule in schedules:
+        for key, value in generate_flights(schedule).items():
+            totals[key] += value
+    return totals
@@ -0,0 +1,119 @@
+import gzip
+import hashlib
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+from airport.streaming import accepts_gzip
+
+logger = logging.getLogger(__name__)
+
+RENDERERS = {"json": OpenApiJsonRenderer, "yaml": OpenApiYamlRenderer}
+
+
+def generate_schema():
+    """Introspect every view, exactly as ``SpectacularAPIView`` does."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+
+
+def render_schema(schema, format="json"):
+    return RENDERERS[format]().render(schema, renderer_context={})
+
+
+def schema_file():
+    return getattr(settings, "AIRPORT_SCHEMA_FILE", None)
+
+
+class CompiledSchema:
+    """One rendered schema body with its gzip variant and ETag."""
+
+    def __init__(self, body):
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+
+
+_lock = threading.Lock()
+_compiled = {}
+
+
+def load_schema():
+    """
+    Return the schema from AIRPORT_SCHEMA_FILE, falling back to live
+    introspection when the file is not configured or missing.
+    """
+    path = schema_file()
+    if path:
+        try:
+            with open(path, "rb") as file:
+                return json.loads(file.read())
+        except FileNotFoundError:
+            logger.warning("%s not found, generating the schema at runtime", path)
+    return generate_schema()
+
+
+def get_compiled(format):
+    """Render the schema in ``format`` once per process."""
+    compiled = _compiled.get(format)
+    if compiled is None:
+        with _lock:
+            if not _compiled:
+                schema = load_schema()
+                for name in RENDERERS:
+                    _compiled[name] = CompiledSchema(render_schema(schema, name))
+            compiled = _compiled[format]
+    return compiled
+
+
+def reset():
+    _compiled.clear()
+
+
+class PrecomputedSchemaView(SpectacularAPIView):
+    """
+    Serve the schema built by ``build_schema`` instead of introspecting
+    every viewset on each request.
+
+    Both formats are rendered and gzip-compressed once per process and
+    answered with an ETag, so Swagger and Redoc reloads are a 304.
+    Language and version variants are not precomputed and still go
+    through live generation.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if request.GET.get("lang") or request.GET.get("version"):
+            return super().get(request, *args, **kwargs)
+
+        compiled = get_compiled(request.accepted_renderer.format)
+        use_gzip = accepts_gzip(request)
+        etag = compiled.gzip_etag if use_gzip else compiled.etag
+        if etag in request.META.get("HTTP_IF_NONE_MATCH", ""):
+            response = HttpResponseNotModified()
+        elif use_gzip:
+            response = HttpResponse(
+                compiled.gzipped, content_type=request.accepted_media_type
+            )
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(
+                compiled.body, content_type=request.accepted_media_type
+            )
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+        response["Content-Disposition"] = (
+            f'inline; filename="{self._get_filename(request, None)}"'
+        )
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
@@ -0,0 +1,100 @@
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+
+from airport.models import Flight, SeatEvent
+
+LAST_EVENT_ID_HEADER = "HTTP_LAST_EVENT_ID"
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets DRF content negotiation accept ``text/event-stream``."""
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode(self.charset)
+
+
+def record(tickets, kind):
+    """Append one event per ticket with a single insert."""
+    SeatEvent.objects.bulk_create(
+        [
+            SeatEvent(
+                flight_id=ticket.flight_id, kind=kind, row=ticket.row, seat=ticket.seat
+            )
+            for ticket in tickets
+        ]
+    )
+
+
+def ticket_saved(sender, instance, created, **kwargs):
+    if created:
+        record([instance], SeatEvent.TAKEN)
+
+
+def ticket_deleted(sender, instance, origin=None, **kwargs):
+    # Events of a deleted flight are deleted along with it
+    if isinstance(origin, Flight) or (
+        isinstance(origin, QuerySet) and origin.model is Flight
+    ):
+        return
+    record([instance], SeatEvent.RELEASED)
+
+
+def format_event(event):
+    data = json.dumps({"kind": event.kind, "row": event.row, "seat": event.seat})
+    return f"id: {event.id}\nevent: seat\ndata: {data}\n\n".encode("utf-8")
+
+
+def event_stream(flight_id, last_event_id=0):
+    """
+    Yield SSE frames for seat events of a flight after last_event_id.
+
+    Polls the indexed (flight, id) log every AIRPORT_SSE_POLL_INTERVAL
+    seconds, sends a comment as heartbeat when idle and ends after
+    AIRPORT_SSE_MAX_DURATION seconds; clients reconnect with Last-Event-ID
+    and resume where they left off.
+
+    Ids are assigned at insert, not at commit, so an event can become
+    visible after one with a higher id was sent. Events younger than
+    AIRPORT_SSE_LAG seconds are therefore held back, together with
+    everything after them, until transactions that old have committed.
+    """
+    poll_interval = getattr(settings, "AIRPORT_SSE_POLL_INTERVAL", 1.0)
+    max_duration = getattr(settings, "AIRPORT_SSE_MAX_DURATION", 300)
+    heartbeat = getattr(settings, "AIRPORT_SSE_HEARTBEAT", 15)
+    lag = timedelta(seconds=getattr(settings, "AIRPORT_SSE_LAG", 2))
+
+    yield f"retry: {int(poll_interval * 1000)}\n\n".encode("utf-8")
+    started = last_sent = time.monotonic()
+    while True:
+        horizon = timezone.now() - lag
+        sent = False
+        for event in (
+            SeatEvent.objects.filter(flight_id=flight_id, id__gt=last_event_id)
+            .order_by("id")
+            .only("id", "kind", "row", "seat", "created_at")[:500]
+        ):
+            if event.created_at > horizon:
+                break
+            last_event_id = event.id
+            sent = True
+            yield format_event(event)
+        now = time.monotonic()
+        if sent:
+            last_sent = now
+            continue
+        if now - started >= max_duration:
+            return
+        if now - last_sent >= heartbeat:
+            last_sent = now
+            yield b": keep-alive\n\n"
+        time.sleep(poll_interval)
@@ -1,7 +1,18 @@
 from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from airport.batch import PreloadedPrimaryKeyRelatedField
+from airport.conflicts import (
+    MAX_FLIGHT_DURATION,
+    airplane_conflicts,
+    crew_conflicts,
+)
+from airport.geo import distance_mismatch, route_distances
+from airport.holds import place_hold
 from airport.models import (
     Airport,
     Route,
@@ -11,19 +22,59 @@ from airport.models import (
     Ticket,
     Order,
     AirplaneType,
+    Schedule,
+    SeatHold,
+    TravelStats,
+    RequestProfile,
 )
+from airport.travel_stats import record_orders, top_airports
 
 
 class AirportSerializer(serializers.ModelSerializer):
     class Meta:
         model = Airport
-        fields = ("id", "name", "closest_big_city")
+        fields = ("id", "name", "closest_big_city", "latitude", "longitude")
+
+    def validate(self, attrs):
+        data = super(AirportSerializer, self).validate(attrs=attrs)
+        latitude = attrs.get("latitude", getattr(self.instance, "latitude", None))
+        longitude = attrs.get("longitude", getattr(self.instance, "longitude", None))
+        if (latitude is None) != (longitude is None):
+            raise ValidationError("latitude and longitude must be set together")
+        return data
 
 
 class RouteSerializer(serializers.ModelSerializer):
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+
     class Meta:
         model = Route
         fields = ("id", "source", "destination", "distance")
+        extra_kwargs = {"distance": {"required": False}}
+
+    def validate(self, attrs):
+        data = super(RouteSerializer, self).validate(attrs=attrs)
+        source = attrs.get("source", getattr(self.instance, "source", None))
+        destination = attrs.get(
+            "destination", getattr(self.instance, "destination", None)
+        )
+        distance = attrs.get("distance", getattr(self.instance, "distance", None))
+        (expected,) = route_distances([(source, destination)])
+        if expected is None:
+            if distance is None:
+                raise ValidationError(
+                    {"distance": "Required unless both airports have coordinates."}
+                )
+        elif distance is None:
+            data["distance"] = round(expected)
+        elif distance_mismatch(distance, expected):
+            raise ValidationError(
+                {
+                    "distance": f"{distance} km does not match the "
+                    f"great-circle distance of {round(expected)} km"
+                }
+            )
+        return data
 
 
 class AirplaneImageSerializer(serializers.ModelSerializer):
@@ -33,6 +84,8 @@ class AirplaneImageSerializer(serializers.ModelSerializer):
 
 
 class AirplaneSerializer(serializers.ModelSerializer):
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+
     class Meta:
         model = Airplane
         fields = ("id", "name", "rows", "seats_in_row", "airplane_type")
@@ -40,7 +93,7 @@ class AirplaneSerializer(serializers.ModelSerializer):
 
 class AirplaneListSerializer(serializers.ModelSerializer):
     airplane_type = serializers.SlugRelatedField(read_only=True, slug_field="name")
-    capacity = serializers.IntegerField(source="capacity", read_only=True)
+    capacity = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Airplane
@@ -49,7 +102,7 @@ class AirplaneListSerializer(serializers.ModelSerializer):
 
 class AirplaneDetailSerializer(serializers.ModelSerializer):
     airplane_type = serializers.CharField(source="airplane_type.name", read_only=True)
-    capacity = serializers.IntegerField(source="capacity", read_only=True)
+    capacity = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Airplane
@@ -75,10 +128,16 @@ class CrewSerializer(serializers.ModelSerializer):
         fields = ("first_name", "last_name")
 
 
+class CrewSyncSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Crew
+        fields = ("id", "first_name", "last_name")
+
+
 class FlightSerializer(serializers.ModelSerializer):
-    route = serializers.PrimaryKeyRelatedField(queryset=Route.objects.all())
-    airplane = serializers.PrimaryKeyRelatedField(queryset=Airplane.objects.all())
-    crew = serializers.PrimaryKeyRelatedField(queryset=Crew.objects.all(), many=True)
+    route = PreloadedPrimaryKeyRelatedField(queryset=Route.objects.all())
+    airplane = PreloadedPrimaryKeyRelatedField(queryset=Airplane.objects.all())
+    crew = PreloadedPrimaryKeyRelatedField(queryset=Crew.objects.all(), many=True)
 
     class Meta:
         model = Flight
@@ -91,6 +150,108 @@ class FlightSerializer(serializers.ModelSerializer):
             "crew",
         )
 
+    def get_validators(self):
+        # A batch checks overlaps against in-memory indexes, which already
+        # rejects a second flight of the airplane at the same departure
+        # without a uniqueness query per item
+        if "conflict_indexes" in self.context:
+            return []
+        return super().get_validators()
+
+    def validate(self, attrs):
+        data = super(FlightSerializer, self).validate(attrs=attrs)
+        instance = self.instance
+        departure = attrs.get(
+            "departure_time", getattr(instance, "departure_time", None)
+        )
+        arrival = attrs.get("arrival_time", getattr(instance, "arrival_time", None))
+        airplane = attrs.get("airplane", getattr(instance, "airplane", None))
+        if "crew" in attrs:
+            crew = attrs["crew"]
+        else:
+            crew = instance.crew.all() if instance else []
+        exclude = instance.id if instance else None
+
+        if arrival <= departure:
+            raise ValidationError(
+                {"arrival_time": "arrival_time must be after departure_time"}
+            )
+        if arrival - departure > MAX_FLIGHT_DURATION:
+            raise ValidationError(
+                {
+                    "arrival_time": f"flight must not last longer than "
+                    f"{MAX_FLIGHT_DURATION}"
+                }
+            )
+
+        indexes = self.context.get("conflict_indexes")
+        crew_ids = [member.id for member in crew]
+        if indexes is None:
+            busy_airplane = airplane_conflicts(airplane.id, departure, arrival, exclude)
+            busy_crew = crew_conflicts(crew_ids, departure, arrival, exclude)
+        else:
+            airplane_index, crew_index = indexes
+            busy_airplane = airplane_index.overlapping(airplane.id, departure, arrival)
+            busy_crew = {
+                crew_id: flights
+                for crew_id in crew_ids
+                if (flights := crew_index.overlapping(crew_id, departure, arrival))
+            }
+
+        errors = {}
+        if busy_airplane:
+            errors["airplane"] = (
+                f"airplane is already assigned to overlapping flight(s) "
+                f"{busy_airplane}"
+            )
+        if busy_crew:
+            errors["crew"] = [
+                f"crew member {crew_id} is already assigned to overlapping "
+                f"flight(s) {flight_ids}"
+                for crew_id, flight_ids in sorted(busy_crew.items())
+            ]
+        if errors:
+            raise ValidationError(errors)
+        if indexes is not None:
+            # Later items of the same batch must not overlap this one
+            label = f"batch item {self.context['batch_item']}"
+            airplane_index.add(airplane.id, departure, arrival, label)
+            for crew_id in crew_ids:
+                crew_index.add(crew_id, departure, arrival, label)
+        return data
+
+
+class ScheduleSerializer(serializers.ModelSerializer):
+    crew = serializers.PrimaryKeyRelatedField(
+        queryset=Crew.objects.all(), many=True, required=False
+    )
+
+    class Meta:
+        model = Schedule
+        fields = (
+            "id",
+            "route",
+            "airplane",
+            "days_of_week",
+            "departure_time",
+            "arrival_time",
+            "valid_from",
+            "valid_until",
+            "crew",
+        )
+
+    def validate(self, attrs):
+        data = super(ScheduleSerializer, self).validate(attrs=attrs)
+        valid_from = attrs.get("valid_from", getattr(self.instance, "valid_from", None))
+        valid_until = attrs.get(
+            "valid_until", getattr(self.instance, "valid_until", None)
+        )
+        if valid_from and valid_until and valid_until < valid_from:
+            raise ValidationError(
+                {"valid_until": "valid_until must not be before valid_from"}
+            )
+        return data
+
 
 class FlightListSerializer(serializers.ModelSerializer):
     route = serializers.StringRelatedField(read_only=True)
@@ -104,6 +265,7 @@ class FlightListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Flight
         fields = (
+            "id",
             "route",
             "airplane",
             "departure_time",
@@ -119,6 +281,17 @@ class TicketSerializer(serializers.ModelSerializer):
         Ticket.validate_ticket(
             attrs["row"], attrs["seat"], attrs["flight"].airplane, ValidationError
         )
+        holds = SeatHold.objects.filter(
+            flight=attrs["flight"],
+            row=attrs["row"],
+            seat=attrs["seat"],
+            expires_at__gt=timezone.now(),
+        )
+        request = self.context.get("request")
+        if request is not None:
+            holds = holds.exclude(user=request.user)
+        if holds.exists():
+            raise ValidationError({"seat": "seat is held by another customer"})
         return data
 
     class Meta:
@@ -166,10 +339,83 @@ class OrderSerializer(serializers.ModelSerializer):
         with transaction.atomic():
             ticket_data = validated_data.pop("tickets")
             order = Order.objects.create(**validated_data)
+            seats = Q(pk__in=[])
             for ticket_data in ticket_data:
                 Ticket.objects.create(order=order, **ticket_data)
+                seats |= Q(
+                    flight=ticket_data["flight"],
+                    row=ticket_data["row"],
+                    seat=ticket_data["seat"],
+                )
+            SeatHold.objects.filter(seats, user=order.user).delete()
+            record_orders([order])
             return order
 
 
+class SeatHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeatHold
+        fields = ("id", "flight", "row", "seat", "expires_at")
+        read_only_fields = ("expires_at",)
+        # Expired holds still occupy the unique slot until swept;
+        # airport.holds.place_hold resolves that on save
+        validators = []
+
+    def create(self, validated_data):
+        return place_hold(**validated_data)
+
+    def validate(self, attrs):
+        data = super(SeatHoldSerializer, self).validate(attrs=attrs)
+        Ticket.validate_ticket(
+            attrs["row"], attrs["seat"], attrs["flight"].airplane, ValidationError
+        )
+        if Ticket.objects.filter(
+            flight=attrs["flight"], row=attrs["row"], seat=attrs["seat"]
+        ).exists():
+            raise ValidationError({"seat": "seat is already taken"})
+        return data
+
+
+class SeatHoldCheckoutSerializer(serializers.Serializer):
+    holds = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False
+    )
+
+
 class OrderListSerializer(OrderSerializer):
-    tickets = TicketSerializer(many=True, read_only=True)
+    tickets = TicketSerializer(many=True, read_only=True, source="all_tickets")
+
+
+class AirportVisitsSerializer(serializers.ModelSerializer):
+    visits = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Airport
+        fields = ("id", "name", "closest_big_city", "visits")
+
+
+class TravelStatsSerializer(serializers.ModelSerializer):
+    top_airports = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TravelStats
+        fields = ("flights_taken", "distance", "top_airports", "updated_at")
+
+    @extend_schema_field(AirportVisitsSerializer(many=True))
+    def get_top_airports(self, obj):
+        return AirportVisitsSerializer(top_airports(obj), many=True).data
+
+
+class RequestProfileSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RequestProfile
+        fields = (
+            "id",
+            "user",
+            "method",
+            "path",
+            "status_code",
+            "duration_ms",
+            "summary",
+            "created_at",
+        )
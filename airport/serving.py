@@ -0,0 +1,317 @@
+import logging
+import os
+import random
+import signal
+import socket
+import threading
+import time
+from socketserver import ThreadingMixIn
+
+from django.apps import apps
+from django.contrib.staticfiles.handlers import StaticFilesHandler
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.servers.basehttp import (
+    WSGIRequestHandler,
+    WSGIServer,
+    get_internal_wsgi_application,
+)
+from django.db import connections
+from django.urls import get_resolver
+
+from airport.autocomplete import get_index
+from airport.fastpath import get_plan
+from airport.geo import get_tree
+from airport.schema import RENDERERS, get_compiled
+
+logger = logging.getLogger(__name__)
+
+STOP_SIGNALS = {signal.SIGTERM, signal.SIGINT}
+EVENT_STREAM = "text/event-stream"
+STREAM_RETRY_AFTER = 5
+
+
+def reference_viewsets():
+    from airport import views
+
+    return (
+        views.AirportViewSet,
+        views.RouteViewSet,
+        views.AirplaneTypeViewSet,
+        views.AirplaneViewSet,
+        views.CrewViewSet,
+    )
+
+
+def warm_reference_lists():
+    """Render every reference list once, compiling their fast-path plans."""
+    rows = 0
+    for viewset in reference_viewsets():
+        queryset = viewset.queryset.all()
+        plan = get_plan(viewset.serializer_class)
+        if plan is None:
+            rows += len(viewset.serializer_class(queryset, many=True).data)
+        else:
+            rows += len(plan.render(queryset))
+    return rows
+
+
+WARM_UP_STEPS = (
+    ("url resolver", lambda: get_resolver().url_patterns),
+    ("reference lists", warm_reference_lists),
+    ("airport autocomplete index", get_index),
+    ("nearest-airport tree", get_tree),
+    ("schema", lambda: [get_compiled(format) for format in RENDERERS]),
+)
+
+
+def warm_up(steps=WARM_UP_STEPS):
+    """
+    Build the per-process caches before the server forks, so every worker
+    starts with them (shared copy-on-write) instead of paying for them on
+    its first requests. Yields (step, seconds, error) as each one runs.
+    """
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as error:  # a cold cache is not fatal
+            logger.exception("warm-up step %r failed", name)
+            yield name, time.perf_counter() - start, error
+        else:
+            yield name, time.perf_counter() - start, None
+    # Children must open their own database connections
+    connections.close_all()
+
+
+def shared_cache():
+    """Whether the default cache is seen by every worker process."""
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def get_application(static=True):
+    """
+    The project's WSGI application. With ``static`` it also answers
+    STATIC_URL from the staticfiles finders, as runserver does, so the
+    admin and the browsable API keep their CSS and scripts with DEBUG off.
+    """
+    app = get_internal_wsgi_application()
+    if static and apps.is_installed("django.contrib.staticfiles"):
+        app = StaticFilesHandler(app)
+    return app
+
+
+def is_event_stream(headers):
+    return any(
+        name.lower() == "content-type" and value.startswith(EVENT_STREAM)
+        for name, value in headers
+    )
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class WorkerServer(ThreadingMixIn, WSGIServer):
+    """
+    Django's development WSGIServer answering each request in its own
+    thread, at most ``threads`` at a time, and counting the requests it
+    serves. Closing it waits for the requests in flight.
+
+    With ``streams`` set, an event stream hands its request slot back as
+    soon as its response starts and holds one of ``streams`` stream slots
+    instead, so open streams never take threads from the API. A stream
+    arriving when all of them are taken is answered with 503.
+    """
+
+    daemon_threads = False
+    handled = 0
+
+    def __init__(self, *args, threads=1, streams=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.slots = threading.BoundedSemaphore(threads)
+        self.stream_slots = threading.BoundedSemaphore(streams) if streams else None
+        self.local = threading.local()
+
+    def get_app(self):
+        if self.stream_slots is None:
+            return self.application
+        return self.budget_streams
+
+    def budget_streams(self, environ, start_response):
+        started = {}
+
+        # Django never writes through start_response's write callable, so
+        # the status can be held back until the body is known to stream
+        def hold(status, headers, exc_info=None):
+            started.update(status=status, headers=headers, exc_info=exc_info)
+
+        body = self.application(environ, hold)
+        if is_event_stream(started["headers"]):
+            if not self.stream_slots.acquire(blocking=False):
+                if hasattr(body, "close"):
+                    body.close()
+                start_response(
+                    "503 Service Unavailable",
+                    [
+                        ("Content-Type", "text/plain; charset=utf-8"),
+                        ("Retry-After", str(STREAM_RETRY_AFTER)),
+                    ],
+                )
+                return [b"Too many event streams open, retry later.\n"]
+            self.local.streaming = True
+            self.slots.release()
+        start_response(started["status"], started["headers"], started["exc_info"])
+        return body
+
+    def wait_for_slot(self, timeout):
+        """Whether a thread is free to take the next request."""
+        if not self.slots.acquire(timeout=timeout):
+            return False
+        self.slots.release()
+        return True
+
+    def process_request(self, request, client_address):
+        self.slots.acquire()
+        self.handled += 1
+        super().process_request(request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            connections.close_all()
+            if getattr(self.local, "streaming", False):
+                self.stream_slots.release()
+            else:
+                self.slots.release()
+
+
+class PreforkServer:
+    """
+    Minimal pre-forking WSGI server.
+
+    The master binds the socket and loads the application once, then
+    forks ``workers`` children that accept on the shared socket. Each
+    child serves up to ``threads`` requests at once and only accepts
+    while one of them is free, leaving the connection to its siblings
+    otherwise. Up to ``streams`` event streams per child run on threads
+    of their own (see WorkerServer), so long-lived streams do not lock a
+    worker away from the API. A worker exits after about ``max_requests`` requests
+    (``jitter`` spreads the restarts) and the master forks a fresh one.
+    SIGTERM or SIGINT stop accepting and let every worker finish the
+    requests in flight.
+    """
+
+    def __init__(
+        self,
+        app,
+        host="0.0.0.0",
+        port=8000,
+        workers=4,
+        threads=8,
+        streams=0,
+        max_requests=0,
+        jitter=0,
+        backlog=128,
+        access_log=False,
+    ):
+        self.app = app
+        self.workers = workers
+        self.threads = threads
+        self.streams = streams
+        self.max_requests = max_requests
+        self.jitter = jitter
+        self.handler_class = WSGIRequestHandler if access_log else QuietRequestHandler
+        self.socket = socket.create_server((host, port), backlog=backlog)
+        self.socket.setblocking(False)
+        self.address = self.socket.getsockname()[:2]
+        self.server_name = socket.getfqdn(self.address[0])
+        self.children = set()
+        self.stopping = False
+
+    def serve(self):
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for _ in range(self.workers):
+            self._spawn()
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            self.children.discard(pid)
+            if self.stopping:
+                continue
+            if os.waitstatus_to_exitcode(status):
+                # Do not fork in a tight loop while the app keeps crashing
+                logger.error("worker %s failed, starting a new one", pid)
+                time.sleep(1)
+            else:
+                logger.info("worker %s recycled", pid)
+            self._spawn()
+        self.socket.close()
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _spawn(self):
+        # Hold back SIGTERM/SIGINT until the child is recorded (parent) or
+        # has its own handlers (child), so a stop request cannot miss it
+        signal.pthread_sigmask(signal.SIG_BLOCK, STOP_SIGNALS)
+        pid = os.fork()
+        if pid:
+            self.children.add(pid)
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+            return
+        status = 0
+        try:
+            self._work()
+        except BaseException:
+            logger.exception("worker %s crashed", os.getpid())
+            status = 1
+        finally:
+            os._exit(status)
+
+    def _work(self):
+        master = os.getppid()
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, self._stop_worker)
+        self.stopping = False
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+        random.seed()
+
+        server = WorkerServer(
+            self.address,
+            self.handler_class,
+            bind_and_activate=False,
+            threads=self.threads,
+            streams=self.streams,
+        )
+        server.socket.close()
+        server.socket = self.socket
+        server.server_name = self.server_name
+        server.server_port = self.address[1]
+        server.setup_environ()
+        server.set_app(self.app)
+        server.timeout = 1
+
+        budget = self.max_requests
+        if budget and self.jitter:
+            budget += random.randint(0, self.jitter)
+        while not self.stopping and not (budget and server.handled >= budget):
+            if server.wait_for_slot(server.timeout):
+                server.handle_request()
+            if os.getppid() != master:
+                break  # the master died without stopping us
+        server.server_close()
+
+    def _stop_worker(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,142 @@
+import zlib
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from airport.fastpath import get_plan
+from airport.fieldsets import is_sparse_request
+
+STREAM_PARAM = "stream"
+
+
+def wants_stream(request):
+    """Whether the list request asks to be streamed (?stream=1 or true)."""
+    return request.query_params.get(STREAM_PARAM, "").lower() in ("1", "true")
+
+
+def _encoder():
+    renderer = JSONRenderer()
+    encoder = renderer.encoder_class(
+        ensure_ascii=renderer.ensure_ascii,
+        allow_nan=not renderer.strict,
+        separators=(",", ":"),
+    )
+
+    def encode(row):
+        # Same escaping JSONRenderer applies for embedding in JavaScript
+        return (
+            encoder.encode(row)
+            .replace("\u2028", "\\u2028")
+            .replace("\u2029", "\\u2029")
+        )
+
+    return encode
+
+
+def iter_json_array(chunks):
+    """
+    Encode an iterable of row lists as one JSON array, chunk by chunk.
+
+    The concatenated output is byte-for-byte what ``JSONRenderer`` produces
+    for the whole list, but only one chunk is held in memory at a time.
+    """
+    encode = _encoder()
+    first = True
+    yield b"["
+    for chunk in chunks:
+        if not chunk:
+            continue
+        body = ",".join(encode(row) for row in chunk).encode("utf-8")
+        yield body if first else b"," + body
+        first = False
+    yield b"]"
+
+
+def accepts_gzip(request):
+    """
+    Whether Accept-Encoding allows gzip, honouring q-values: "gzip;q=0"
+    refuses it and "*" only counts when gzip is not listed itself.
+    """
+    wildcard = False
+    for coding in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        name, *params = (part.strip() for part in coding.split(";"))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        name = name.lower()
+        if name in ("gzip", "x-gzip"):
+            return quality > 0
+        if name == "*":
+            wildcard = quality > 0
+    return wildcard
+
+
+def gzip_stream(parts, level=6):
+    """Gzip an iterable of bytes, flushing after each part."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for part in parts:
+        data = compressor.compress(part) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class StreamingListMixin:
+    """
+    Stream ``list`` responses when the client passes ``?stream=true``.
+
+    Rows are read with a chunked queryset iterator and each chunk is
+    serialized, encoded and flushed before the next one is fetched, so
+    worker memory stays flat regardless of result size. Responses are
+    gzip-compressed when the client accepts it.
+    """
+
+    stream_chunk_size = None
+
+    def get_stream_chunks(self, queryset):
+        chunk_size = self.stream_chunk_size or getattr(
+            settings, "AIRPORT_STREAM_CHUNK_SIZE", 500
+        )
+        if not isinstance(queryset, QuerySet):
+            rows = _batched(queryset, chunk_size)
+        else:
+            plan = None
+            if getattr(settings, "AIRPORT_FAST_LIST", False) and not is_sparse_request(
+                self.request
+            ):
+                plan = get_plan(self.get_serializer_class())
+            if plan is not None:
+                yield from plan.render_chunks(queryset, chunk_size)
+                return
+            rows = _batched(queryset.iterator(chunk_size=chunk_size), chunk_size)
+        for chunk in rows:
+            yield self.get_serializer(chunk, many=True).data
+
+    def list(self, request, *args, **kwargs):
+        if not wants_stream(request):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        content = iter_json_array(self.get_stream_chunks(queryset))
+        gzip = accepts_gzip(request)
+        if gzip:
+            content = gzip_stream(content)
+        response = StreamingHttpResponse(content, content_type="application/json")
+        response["Vary"] = "Accept, Accept-Encoding"
+        if gzip:
+            response["Content-Encoding"] = "gzip"
+        return response
@@ -0,0 +1,161 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from airport.models import Airplane, Airport, Crew, Flight, Route, Tombstone
+from airport.serializers import (
+    AirplaneSerializer,
+    AirportSerializer,
+    CrewSyncSerializer,
+    FlightSerializer,
+    RouteSerializer,
+)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Synced kinds: model, rows as sent and their serializer
+KINDS = {
+    "airports": (Airport, lambda: Airport.objects.all(), AirportSerializer),
+    "routes": (Route, lambda: Route.objects.all(), RouteSerializer),
+    "airplanes": (Airplane, lambda: Airplane.objects.all(), AirplaneSerializer),
+    "crew": (Crew, lambda: Crew.objects.all(), CrewSyncSerializer),
+    "flights": (
+        Flight,
+        lambda: Flight.objects.prefetch_related("crew"),
+        FlightSerializer,
+    ),
+}
+KIND_OF_MODEL = {model: kind for kind, (model, _, _) in KINDS.items()}
+
+
+def deleted_stream(kind):
+    return f"{kind}:deleted"
+
+
+STREAMS = (*KINDS, *map(deleted_stream, KINDS))
+
+
+def object_deleted(sender, instance, **kwargs):
+    Tombstone.objects.create(kind=KIND_OF_MODEL[sender], object_id=instance.pk)
+
+
+def flight_crew_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """A flight's crew is part of its synced data: mark the flight changed."""
+    if not reverse and action in ("post_add", "post_remove", "post_clear"):
+        flights = Flight.objects.filter(pk=instance.pk)
+    elif reverse and action in ("post_add", "post_remove"):
+        flights = Flight.objects.filter(pk__in=pk_set)
+    elif reverse and action == "pre_clear":
+        # Clearing a crew member's flights doesn't say which they were
+        flights = Flight.objects.filter(crew=instance)
+    else:
+        return
+    flights.update(updated_at=timezone.now())
+
+
+def crew_deleted(sender, instance, **kwargs):
+    """Deleting crew drops it from flights without an m2m_changed signal."""
+    Flight.objects.filter(crew=instance).update(updated_at=timezone.now())
+
+
+def encode_cursor(positions):
+    data = {
+        stream: [(moment - EPOCH) // timedelta(microseconds=1), last_id]
+        for stream, (moment, last_id) in positions.items()
+    }
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Positions by stream: (timestamp, id) of the last row delivered."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return {
+            stream: (
+                EPOCH + timedelta(microseconds=int(data[stream][0])),
+                int(data[stream][1]),
+            )
+            for stream in STREAMS
+        }
+    except (binascii.Error, ValueError, TypeError, KeyError, IndexError, OverflowError):
+        raise ValidationError({"cursor": "Invalid cursor."})
+
+
+def _after(queryset, field, position, horizon, limit):
+    """
+    Up to ``limit`` rows past ``position`` and not past ``horizon`` in
+    (field, id) order, whether more follow and the position to resume from.
+    """
+    moment, last_id = position
+    rows = list(
+        queryset.filter(
+            Q(**{f"{field}__gt": moment}) | Q(**{field: moment, "id__gt": last_id}),
+            **{f"{field}__lte": horizon},
+        ).order_by(field, "id")[: limit + 1]
+    )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, True, (getattr(rows[-1], field), rows[-1].id)
+    if rows and getattr(rows[-1], field) == horizon:
+        return rows, False, (horizon, rows[-1].id)
+    return rows, False, max(position, (horizon, 0))
+
+
+def changes_since(cursor=None, limit=None):
+    """
+    Rows created or changed and ids deleted since ``cursor``, by kind.
+
+    Each kind is read as two streams ordered by (timestamp, id): rows by
+    ``updated_at`` and tombstones by ``deleted_at``, at most ``limit`` rows
+    each per call (``has_more`` asks for another). Nothing newer than
+    AIRPORT_SYNC_LAG is read, so rows written by transactions that commit
+    late still land past the returned cursor instead of being skipped.
+    Without a cursor, or with one older than the tombstones kept
+    (AIRPORT_SYNC_TOMBSTONE_TTL), all rows are sent with ``reset`` set:
+    the client replaces its cache rather than patching it.
+    """
+    now = timezone.now()
+    limit = limit or getattr(settings, "AIRPORT_SYNC_PAGE_SIZE", 500)
+    horizon = now - timedelta(seconds=getattr(settings, "AIRPORT_SYNC_LAG", 5))
+    oldest = now - timedelta(
+        seconds=getattr(settings, "AIRPORT_SYNC_TOMBSTONE_TTL", 30 * 24 * 60 * 60)
+    )
+
+    positions = decode_cursor(cursor) if cursor else None
+    reset = positions is None or any(
+        positions[deleted_stream(kind)][0] < oldest for kind in KINDS
+    )
+    if reset:
+        # Deletions before now are already reflected by the full row set
+        positions = {stream: (EPOCH, 0) for stream in KINDS}
+        positions.update({deleted_stream(kind): (horizon, 0) for kind in KINDS})
+
+    result = {"cursor": None, "reset": reset, "has_more": False}
+    changed, deleted, new_positions = {}, {}, {}
+    for kind, (_, queryset, serializer_class) in KINDS.items():
+        rows, more, new_positions[kind] = _after(
+            queryset(), "updated_at", positions[kind], horizon, limit
+        )
+        changed[kind] = serializer_class(rows, many=True).data
+        result["has_more"] |= more
+
+        stream = deleted_stream(kind)
+        tombstones, more, new_positions[stream] = _after(
+            Tombstone.objects.filter(kind=kind).only("deleted_at", "object_id"),
+            "deleted_at",
+            positions[stream],
+            horizon,
+            limit,
+        )
+        deleted[kind] = [tombstone.object_id for tombstone in tombstones]
+        result["has_more"] |= more
+
+    result.update(cursor=encode_cursor(new_positions), changed=changed, deleted=deleted)
+    return result
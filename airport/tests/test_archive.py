@@ -0,0 +1,117 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.archive import archive_batch
+from airport.models import (
+    ArchivedFlight,
+    ArchivedTicket,
+    Flight,
+    SeatEvent,
+    Ticket,
+)
+from airport.tests.test_airport_api import (
+    sample_crew,
+    sample_flight,
+    sample_order,
+)
+
+ORDER_URL = reverse("airport:order-list")
+
+
+class ArchiveFlightsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        now = timezone.now()
+        self.crew = [sample_crew(), sample_crew(first_name="Jane")]
+        self.departed = sample_flight(
+            departure_time=now - timedelta(days=60), crew_list=self.crew
+        )
+        self.upcoming = sample_flight(departure_time=now + timedelta(days=1))
+        self.order = sample_order(
+            self.user,
+            [
+                {"flight": self.departed, "row": 1, "seat": 1},
+                {"flight": self.upcoming, "row": 2, "seat": 3},
+            ],
+        )
+        self.cutoff = now - timedelta(days=30)
+
+    def test_moves_departed_flights_and_tickets(self):
+        ticket = Ticket.objects.get(flight=self.departed)
+
+        self.assertEqual(archive_batch(self.cutoff), 1)
+
+        self.assertQuerySetEqual(Flight.objects.all(), [self.upcoming])
+        self.assertFalse(Ticket.objects.filter(flight_id=self.departed.id).exists())
+        archived = ArchivedFlight.objects.get(id=self.departed.id)
+        self.assertEqual(archived.route_id, self.departed.route_id)
+        self.assertEqual(archived.departure_time, self.departed.departure_time)
+        self.assertEqual(archived.crew_ids, sorted(crew.id for crew in self.crew))
+        archived_ticket = ArchivedTicket.objects.get(id=ticket.id)
+        self.assertEqual(archived_ticket.flight_id, self.departed.id)
+        self.assertEqual(archived_ticket.order_id, self.order.id)
+        self.assertEqual(archived_ticket.departure_time, self.departed.departure_time)
+
+    def test_does_not_log_seat_releases(self):
+        events = SeatEvent.objects.count()
+
+        archive_batch(self.cutoff)
+
+        self.assertFalse(
+            SeatEvent.objects.filter(
+                flight_id=self.departed.id, kind=SeatEvent.RELEASED
+            ).exists()
+        )
+        self.assertLessEqual(SeatEvent.objects.count(), events)
+
+    def test_nothing_to_archive(self):
+        self.assertEqual(archive_batch(timezone.now() - timedelta(days=90)), 0)
+        self.assertEqual(Flight.objects.count(), 2)
+
+    def test_command_archives_in_batches(self):
+        for days in (40, 50):
+            sample_flight(departure_time=timezone.now() - timedelta(days=days))
+        out = StringIO()
+
+        call_command("archive_flights", "--batch-size", "2", stdout=out)
+
+        self.assertIn("Archived 3 flight(s)", out.getvalue())
+        self.assertEqual(ArchivedFlight.objects.count(), 3)
+        self.assertQuerySetEqual(Flight.objects.all(), [self.upcoming])
+
+    def test_order_history_includes_archived_tickets(self):
+        before = self.client.get(ORDER_URL).data
+        archive_batch(self.cutoff)
+
+        res = self.client.get(ORDER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, before)
+
+    def test_order_history_sparse_fields(self):
+        archive_batch(self.cutoff)
+
+        res = self.client.get(ORDER_URL, {"fields": "id,tickets"})
+
+        self.assertEqual(len(res.data[0]["tickets"]), 2)
+
+    def test_deleting_order_removes_archived_tickets(self):
+        archive_batch(self.cutoff)
+
+        self.order.delete()
+
+        self.assertFalse(ArchivedTicket.objects.exists())
@@ -0,0 +1,127 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.autocomplete import VERSION_CACHE_KEY, AirportIndex, get_index
+from airport.tests.test_airport_api import sample_airport
+
+AUTOCOMPLETE_URL = reverse("airport:airport-autocomplete")
+
+
+class AirportIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.index = AirportIndex(
+            [
+                (1, "Boryspil International", "Kyiv"),
+                (2, "Zürich Airport", "Zürich"),
+                (3, "Kyiv Zhuliany", "Kyiv"),
+                (4, "Lviv Danylo Halytskyi", "Lviv"),
+            ]
+        )
+
+    def ids(self, query, limit=10):
+        return [airport_id for airport_id, _, _ in self.index.search(query, limit)]
+
+    def test_prefix_matches_name_and_city(self):
+        self.assertEqual(self.ids("bory"), [1])
+        self.assertEqual(sorted(self.ids("kyi")), [1, 3])
+
+    def test_case_and_accents_are_ignored(self):
+        self.assertEqual(self.ids("ZUR"), [2])
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.ids("kyiv zhu"), [3])
+
+    def test_name_prefix_ranks_first(self):
+        self.assertEqual(self.ids("kyiv"), [3, 1])
+
+    def test_typo_falls_back_to_trigrams(self):
+        self.assertIn(1, self.ids("Boryspyl"))
+        self.assertEqual(self.ids("Lvov")[0], 4)
+
+    def test_limit_and_empty_query(self):
+        self.assertEqual(len(self.ids("kyiv", limit=1)), 1)
+        self.assertEqual(self.ids("  "), [])
+
+    def test_add_replaces_and_remove_forgets(self):
+        self.index.add(1, "Kyiv Boryspil", "Kyiv")
+        self.assertEqual(self.ids("kyiv")[0], 1)
+        self.assertEqual(self.ids("international"), [])
+        self.index.remove(1)
+        self.assertEqual(self.ids("bory"), [])
+
+    def test_lookup_is_fast(self):
+        index = AirportIndex(
+            (i, f"Airport {i} Field", f"City {i % 500}") for i in range(5000)
+        )
+        index.search("air", 10)
+        started = time.perf_counter()
+        for _ in range(1000):
+            index.search("air", 10)
+        self.assertLess((time.perf_counter() - started) / 1000, 0.001)
+
+        # Cold lookups: distinct queries, none of them memoized yet
+        queries = [f"city {i}" for i in range(200)] + [f"field {i}" for i in range(200)]
+        started = time.perf_counter()
+        for query in queries:
+            index.search(query, 10)
+        self.assertLess((time.perf_counter() - started) / len(queries), 0.005)
+
+    def test_changes_invalidate_memoized_results(self):
+        self.assertEqual(self.ids("lviv"), [4])
+        self.index.add(5, "Lviv West", "Lviv")
+        self.assertEqual(sorted(self.ids("lviv")), [4, 5])
+
+
+class AutocompleteApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(self.user)
+        self.boryspil = sample_airport(name="Boryspil", closest_big_city="Kyiv")
+        sample_airport(name="Heathrow", closest_big_city="London")
+
+    def test_returns_ranked_matches(self):
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "kyi"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            [
+                {
+                    "id": self.boryspil.id,
+                    "name": "Boryspil",
+                    "closest_big_city": "Kyiv",
+                }
+            ],
+        )
+
+    def test_limit_is_capped(self):
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "a", "limit": "1000"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_index_follows_saves_and_deletes(self):
+        get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            gatwick = sample_airport(name="Gatwick", closest_big_city="London")
+        self.assertEqual(get_index().search("gatw")[0][0], gatwick.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            gatwick.delete()
+        self.assertEqual(get_index().search("gatw"), [])
+
+    def test_other_workers_rebuild_on_version_change(self):
+        index = get_index()
+        self.assertIs(get_index(), index)
+        cache.set(VERSION_CACHE_KEY, cache.get(VERSION_CACHE_KEY, 0) + 1)
+        self.assertIsNot(get_index(), index)
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Flight
+from airport.serializers import FlightDetailSerializer
+from airport.tests.test_airport_api import (
+    sample_route,
+    sample_airplane,
+    sample_crew,
+    sample_flight,
+    sample_order,
+)
+
+
+class BatchRetrieveTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("user@example.com", "testpass")
+        self.client.force_authenticate(self.user)
+
+    def test_flight_batch_in_request_order_with_missing(self):
+        first = sample_flight()
+        second = sample_flight(route=first.route, crew_list=[sample_crew()])
+        sample_order(self.user, tickets=[{"row": 1, "seat": 1, "flight": second}])
+
+        res = self.client.get(
+            reverse("airport:flight-batch"), {"ids": f"{second.id},999,{first.id},x"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item["id"], item["status"]) for item in res.data],
+            [(second.id, 200), (999, 404), (first.id, 200), ("x", 400)],
+        )
+        self.assertEqual(
+            res.data[0]["data"],
+            FlightDetailSerializer(Flight.objects.get(id=second.id)).data,
+        )
+
+    def test_flight_batch_query_count_is_fixed(self):
+        route = sample_route()
+        ids = [
+            str(sample_flight(route=route, crew_list=[sample_crew()]).id)
+            for _ in range(5)
+        ]
+        # flights, then prefetched crew and tickets
+        with self.assertNumQueries(3):
+            res = self.client.get(
+                reverse("airport:flight-batch"), {"ids": ",".join(ids)}
+            )
+        self.assertEqual(len(res.data), 5)
+
+    def test_airplane_and_route_batch(self):
+        airplane = sample_airplane()
+        route = sample_route()
+        res = self.client.get(reverse("airport:airplane-batch"), {"ids": airplane.id})
+        self.assertEqual(res.data[0]["data"]["capacity"], airplane.capacity)
+        res = self.client.get(reverse("airport:route-batch"), {"ids": route.id})
+        self.assertEqual(res.data[0]["data"]["distance"], route.distance)
+
+    def test_ids_required_and_capped(self):
+        url = reverse("airport:route-batch")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get(url, {"ids": ",".join(str(i) for i in range(101))})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_non_ascii_and_out_of_range_ids_are_per_item_errors(self):
+        route = sample_route()
+        bad = ["²", "٣", "0", "9" * 30]
+
+        res = self.client.get(
+            reverse("airport:route-batch"), {"ids": ",".join([str(route.id), *bad])}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item["id"], item["status"]) for item in res.data],
+            [(route.id, 200)] + [(value, 400) for value in bad],
+        )
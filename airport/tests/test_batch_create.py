@@ -0,0 +1,195 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.autocomplete import get_index
+from airport.models import Airport, Crew, Flight, Route
+from airport.tests.test_airport_api import (
+    sample_airplane,
+    sample_airport,
+    sample_crew,
+    sample_flight,
+    sample_route,
+)
+
+AIRPORT_URL = reverse("airport:airport-list")
+ROUTE_URL = reverse("airport:route-list")
+CREW_URL = reverse("airport:crew-list")
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+class BatchCreateTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@example.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.departure = timezone.now() + timedelta(days=3)
+
+    def flight_item(self, route, airplane, crew=(), hours=0):
+        departure = self.departure + timedelta(hours=hours)
+        return {
+            "route": route.id,
+            "airplane": airplane.id,
+            "departure_time": departure.isoformat(),
+            "arrival_time": (departure + timedelta(hours=2)).isoformat(),
+            "crew": [member.id for member in crew],
+        }
+
+    def test_single_object_create_unchanged(self):
+        res = self.client.post(CREW_URL, {"first_name": "A", "last_name": "B"})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {"first_name": "A", "last_name": "B"})
+
+    def test_non_staff_cannot_batch_create(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("user@example.com", "testpass")
+        )
+        res = self.client.post(
+            CREW_URL, [{"first_name": "A", "last_name": "B"}], format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_crew_batch(self):
+        items = [{"first_name": f"First {i}", "last_name": "Last"} for i in range(20)]
+
+        res = self.client.post(CREW_URL, items, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Crew.objects.count(), 20)
+        self.assertEqual(
+            [item["id"] for item in res.data],
+            list(Crew.objects.order_by("id").values_list("id", flat=True)),
+        )
+
+    def test_empty_batch_rejected(self):
+        res = self.client.post(CREW_URL, [], format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_items_reported_and_valid_ones_created(self):
+        kyiv = sample_airport(name="Kyiv")
+        lviv = sample_airport(name="Lviv")
+        items = [
+            {"source": kyiv.id, "destination": lviv.id, "distance": 470},
+            {"source": kyiv.id, "destination": 999, "distance": 100},
+            {"source": "x", "destination": lviv.id, "distance": 100},
+            {"source": lviv.id, "destination": kyiv.id},
+        ]
+
+        res = self.client.post(ROUTE_URL, items, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [(item["index"], item["status"]) for item in res.data],
+            [(0, 201), (1, 400), (2, 400), (3, 400)],
+        )
+        self.assertIn("destination", res.data[1]["errors"])
+        self.assertIn("source", res.data[2]["errors"])
+        self.assertIn("distance", res.data[3]["errors"])
+        self.assertEqual(Route.objects.get().distance, 470)
+
+    def test_all_invalid_is_bad_request(self):
+        res = self.client.post(CREW_URL, [{"first_name": "A"}], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("last_name", res.data[0]["errors"])
+
+    def test_airports_reach_search_index(self):
+        get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                AIRPORT_URL,
+                [
+                    {"name": "Boryspil", "closest_big_city": "Kyiv"},
+                    {"name": "Zhuliany", "closest_big_city": "Kyiv"},
+                ],
+                format="json",
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        names = [name for _, name, _ in get_index().search("kyiv", 10)]
+
+        self.assertEqual(sorted(names), ["Boryspil", "Zhuliany"])
+
+    def test_flight_batch_links_crew(self):
+        route = sample_route()
+        airplane = sample_airplane()
+        crew = [sample_crew(first_name=f"Crew {i}") for i in range(3)]
+        items = [
+            self.flight_item(route, airplane, crew[:2], hours=0),
+            self.flight_item(route, airplane, crew[2:], hours=3),
+        ]
+
+        res = self.client.post(FLIGHT_URL, items, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data[0]["data"]["crew"], [crew[0].id, crew[1].id])
+        flight = Flight.objects.get(id=res.data[1]["id"])
+        self.assertEqual(list(flight.crew.all()), [crew[2]])
+
+    def test_flight_batch_detects_conflicts(self):
+        route = sample_route()
+        airplane = sample_airplane()
+        other_airplane = sample_airplane(name="Other")
+        pilot = sample_crew()
+        existing = sample_flight(
+            route=route,
+            airplane=airplane,
+            departure_time=self.departure,
+            arrival_time=self.departure + timedelta(hours=2),
+        )
+        items = [
+            # Overlaps the existing flight
+            self.flight_item(route, airplane, hours=1),
+            self.flight_item(route, other_airplane, [pilot], hours=5),
+            # Overlaps item 1 of the same batch through the crew member
+            self.flight_item(route, sample_airplane(name="Third"), [pilot], hours=6),
+            # Duplicate of item 1
+            self.flight_item(route, other_airplane, hours=5),
+        ]
+
+        res = self.client.post(FLIGHT_URL, items, format="json")
+
+        self.assertEqual([item["status"] for item in res.data], [400, 201, 400, 400])
+        self.assertIn(str(existing.id), res.data[0]["errors"]["airplane"][0])
+        self.assertIn("batch item 1", res.data[2]["errors"]["crew"][0])
+        self.assertIn("batch item 1", res.data[3]["errors"]["airplane"][0])
+        self.assertEqual(Flight.objects.count(), 2)
+
+    def test_flight_batch_query_count_is_fixed(self):
+        route = sample_route()
+        crew = sample_crew()
+        airplanes = [sample_airplane(name=f"Plane {i}") for i in range(30)]
+        items = [
+            self.flight_item(route, airplane, [crew] if i == 0 else [])
+            for i, airplane in enumerate(airplanes)
+        ]
+
+        # routes, airplanes, crew; conflict window flights and their crew;
+        # savepoint, flight and crew link inserts, release; crew prefetch
+        with self.assertNumQueries(10):
+            res = self.client.post(FLIGHT_URL, items, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Flight.objects.count(), 30)
+
+    def test_bench_command(self):
+        out = StringIO()
+
+        call_command("bench_batch_create", "--items", "20", stdout=out)
+
+        self.assertIn("speed-up", out.getvalue())
+        self.assertFalse(Airport.objects.exists())
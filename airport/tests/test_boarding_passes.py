@@ -0,0 +1,169 @@
+import io
+import os
+import tempfile
+import zipfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport import boarding_passes
+from airport.boarding_passes import render_many, render_pool, seat_label
+from airport.tests.test_airport_api import sample_flight, sample_order
+
+BATCH_URL = reverse("airport:flight-batch-boarding-passes")
+
+
+def passes_url(flight_id):
+    return reverse("airport:flight-boarding-passes", args=[flight_id])
+
+
+class BoardingPassTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.staff = get_user_model().objects.create_user(
+            "admin@example.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.staff)
+        self.passenger = get_user_model().objects.create_user(
+            "passenger@example.com", "pass", first_name="Ada", last_name="Byron"
+        )
+        self.flight = sample_flight()
+        self.order = sample_order(
+            self.passenger,
+            [
+                {"flight": self.flight, "row": 1, "seat": 1},
+                {"flight": self.flight, "row": 2, "seat": 3},
+            ],
+        )
+
+    def archive(self, response):
+        return zipfile.ZipFile(io.BytesIO(response.content))
+
+    def test_seat_label(self):
+        self.assertEqual(seat_label(12, 3), "12C")
+        self.assertEqual(seat_label(1, 9), "1J")
+        self.assertEqual(seat_label(1, 11), "1-11")
+
+    def test_flight_archive(self):
+        res = self.client.get(passes_url(self.flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/zip")
+        archive = self.archive(res)
+        tickets = self.order.tickets.order_by("row")
+        self.assertEqual(
+            archive.namelist(),
+            [
+                f"flight-{self.flight.id}/1A-ticket-{tickets[0].id}.png",
+                f"flight-{self.flight.id}/2C-ticket-{tickets[1].id}.png",
+            ],
+        )
+        image = Image.open(archive.open(archive.namelist()[0]))
+        self.assertEqual(image.size, boarding_passes.SIZE)
+
+    def test_pdf_format(self):
+        res = self.client.get(passes_url(self.flight.id), {"pass_format": "pdf"})
+
+        archive = self.archive(res)
+        self.assertTrue(archive.namelist()[0].endswith(".pdf"))
+        self.assertTrue(archive.read(archive.namelist()[0]).startswith(b"%PDF"))
+
+        res = self.client.get(passes_url(self.flight.id), {"pass_format": "gif"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cached_until_tickets_change(self):
+        first = self.client.get(passes_url(self.flight.id))
+        with mock.patch.object(
+            boarding_passes, "render", wraps=boarding_passes.render
+        ) as render:
+            not_modified = self.client.get(
+                passes_url(self.flight.id), HTTP_IF_NONE_MATCH=first["ETag"]
+            )
+            sample_order(self.passenger, [{"flight": self.flight, "row": 3, "seat": 1}])
+            changed = self.client.get(
+                passes_url(self.flight.id), HTTP_IF_NONE_MATCH=first["ETag"]
+            )
+
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+        self.assertEqual(len(self.archive(changed).namelist()), 3)
+        # Only the new ticket's pass was drawn
+        self.assertEqual(render.call_count, 1)
+
+    def test_many_flights(self):
+        other = sample_flight(departure_time=timezone.now() + timedelta(days=2))
+        sample_order(self.passenger, [{"flight": other, "row": 1, "seat": 2}])
+
+        res = self.client.get(BATCH_URL, {"ids": f"{self.flight.id},{other.id}"})
+
+        names = self.archive(res).namelist()
+        self.assertEqual(len(names), 3)
+        self.assertTrue(names[-1].startswith(f"flight-{other.id}/"))
+
+        res = self.client.get(BATCH_URL, {"ids": f"{self.flight.id},999"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_malformed_ids_rejected(self):
+        for ids in ("1,²", "1,x", str(2**63), "0"):
+            res = self.client.get(BATCH_URL, {"ids": ids})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, ids)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(self.passenger)
+
+        res = self.client.get(passes_url(self.flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(
+        AIRPORT_BOARDING_PASS_POOL_MIN=1, AIRPORT_BOARDING_PASS_WORKERS=2
+    )
+    def test_process_pool(self):
+        passes = [
+            boarding_passes.pass_data(ticket)
+            for ticket in boarding_passes.flight_tickets([self.flight.id])
+        ]
+
+        with render_pool() as pool:
+            rendered = render_many(passes, pool=pool)
+
+        self.assertEqual(len(rendered), 2)
+        self.assertTrue(all(content.startswith(b"\x89PNG") for content in rendered))
+
+    @override_settings(AIRPORT_BOARDING_PASS_POOL_MIN=1)
+    def test_api_renders_without_process_pool(self):
+        with mock.patch.object(boarding_passes, "ProcessPoolExecutor") as executor:
+            res = self.client.get(passes_url(self.flight.id))
+
+        self.assertEqual(len(self.archive(res).namelist()), 2)
+        executor.assert_not_called()
+
+    def test_command(self):
+        handle, output = tempfile.mkstemp(suffix=".zip")
+        os.close(handle)
+        self.addCleanup(os.remove, output)
+
+        call_command(
+            "render_boarding_passes",
+            "--departing-within",
+            "48",
+            "--output",
+            output,
+            stdout=io.StringIO(),
+        )
+
+        with zipfile.ZipFile(output) as archive:
+            self.assertEqual(len(archive.namelist()), 2)
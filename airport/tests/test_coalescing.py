@@ -0,0 +1,207 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.coalescing import (
+    CACHE_STATUS_HEADER,
+    CircuitBreaker,
+    Coalescer,
+    ServiceUnavailable,
+    SingleFlight,
+    _bump_version,
+    flight_lists,
+)
+from airport.tests.test_airport_api import sample_flight, sample_order
+from airport.views import FlightViewSet
+
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+class SingleFlightTests(SimpleTestCase):
+
+    def test_concurrent_callers_share_one_call(self):
+        single_flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+        results = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return "rows"
+
+        def caller():
+            results.append(single_flight.do("key", compute))
+
+        threads = [threading.Thread(target=caller) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [("rows", False)] + [("rows", True)] * 7)
+
+    def test_error_is_shared_and_key_released(self):
+        single_flight = SingleFlight()
+
+        def fail():
+            raise OperationalError("down")
+
+        with self.assertRaises(OperationalError):
+            single_flight.do("key", fail)
+        self.assertEqual(single_flight.do("key", lambda: 1), (1, False))
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def test_opens_and_recovers_through_trial(self):
+        breaker = CircuitBreaker(failures=2, cooldown=0.05, slow=1)
+        breaker.record(False)
+        self.assertTrue(breaker.allow())
+        with self.assertLogs("airport.coalescing", "WARNING"):
+            breaker.record(True, seconds=5)  # slow counts as failure
+
+        self.assertFalse(breaker.allow())
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # only one trial
+        breaker.record(True, seconds=0.01)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.is_open)
+
+
+class CoalescerTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.coalescer = Coalescer(
+            "test", breaker=CircuitBreaker(failures=1, cooldown=60), background=False
+        )
+
+    def test_miss_hit_then_stale_after_change(self):
+        self.assertEqual(self.coalescer.get("k", lambda: [1]), ([1], "MISS"))
+        self.assertEqual(self.coalescer.get("k", lambda: [2]), ([1], "HIT"))
+
+        _bump_version()
+
+        self.assertEqual(self.coalescer.get("k", lambda: [2]), ([1], "STALE"))
+        self.assertEqual(self.coalescer.get("k", lambda: [3]), ([2], "HIT"))
+
+    def test_background_refresh_runs_refresh(self):
+        self.coalescer.get("k", lambda: [1])
+        _bump_version()
+
+        self.assertEqual(
+            self.coalescer.get("k", lambda: [2], refresh=lambda: [3]), ([1], "STALE")
+        )
+        self.assertEqual(self.coalescer.get("k", lambda: [4]), ([3], "HIT"))
+
+    @override_settings(AIRPORT_FLIGHT_LIST_FRESH=0, AIRPORT_FLIGHT_LIST_STALE=0)
+    def test_stale_served_when_database_fails(self):
+        self.coalescer.get("k", lambda: [1])
+
+        def broken():
+            raise OperationalError("timeout")
+
+        with self.assertLogs("airport.coalescing", "WARNING"):
+            self.assertEqual(self.coalescer.get("k", broken), ([1], "STALE"))
+        # Breaker is open now: the database is not asked at all
+        self.assertEqual(self.coalescer.get("k", lambda: [2]), ([1], "STALE"))
+        with self.assertRaises(ServiceUnavailable):
+            self.coalescer.get("other", lambda: [2])
+
+
+@override_settings(AIRPORT_FLIGHT_LIST_CACHE=True)
+class FlightListCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        flight_lists.background = False
+        flight_lists.breaker = CircuitBreaker(failures=1, cooldown=60)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("user@example.com", "pass")
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def tearDown(self):
+        flight_lists.background = True
+        flight_lists.breaker = None
+
+    def test_repeated_search_served_from_cache(self):
+        first = self.client.get(FLIGHT_URL, {"route_id": self.flight.route_id})
+        with self.assertNumQueries(0):
+            second = self.client.get(FLIGHT_URL, {"route_id": self.flight.route_id})
+
+        self.assertEqual(first[CACHE_STATUS_HEADER], "MISS")
+        self.assertEqual(second[CACHE_STATUS_HEADER], "HIT")
+        self.assertEqual(second.data, first.data)
+
+    def test_booking_revalidates_list(self):
+        self.client.get(FLIGHT_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            sample_order(self.user, [{"flight": self.flight, "row": 1, "seat": 1}])
+
+        stale = self.client.get(FLIGHT_URL)
+        fresh = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(stale[CACHE_STATUS_HEADER], "STALE")
+        self.assertEqual(
+            fresh.data[0]["tickets_available"],
+            stale.data[0]["tickets_available"] - 1,
+        )
+
+    def test_refresh_lists_through_its_own_request_and_view(self):
+        params = {"route_id": self.flight.route_id}
+        self.client.get(FLIGHT_URL, params)
+        with self.captureOnCommitCallbacks(execute=True):
+            sample_order(self.user, [{"flight": self.flight, "row": 1, "seat": 1}])
+
+        with mock.patch.object(
+            FlightViewSet,
+            "get_queryset",
+            autospec=True,
+            side_effect=FlightViewSet.get_queryset,
+        ) as get_queryset:
+            stale = self.client.get(FLIGHT_URL, params)
+        refreshed = self.client.get(FLIGHT_URL, params)
+
+        view = get_queryset.call_args.args[0]
+        self.assertEqual(stale[CACHE_STATUS_HEADER], "STALE")
+        self.assertIsNot(view.request._request, stale.wsgi_request)
+        self.assertEqual(view.request.user, self.user)
+        self.assertEqual(
+            view.request.query_params.dict(), {"route_id": str(self.flight.route_id)}
+        )
+        self.assertEqual(refreshed[CACHE_STATUS_HEADER], "HIT")
+        self.assertEqual(
+            refreshed.data[0]["tickets_available"],
+            stale.data[0]["tickets_available"] - 1,
+        )
+
+    def test_unavailable_without_cached_data(self):
+        with self.assertLogs("airport.coalescing", "WARNING"):
+            flight_lists.breaker.record(False)
+
+        res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn("Retry-After", res)
+
+    def test_streamed_lists_bypass_cache(self):
+        res = self.client.get(FLIGHT_URL, {"stream": "1"})
+        self.assertNotIn(CACHE_STATUS_HEADER, res)
+
+        res = self.client.get(FLIGHT_URL, {"stream": "false"})
+        self.assertEqual(res[CACHE_STATUS_HEADER], "MISS")
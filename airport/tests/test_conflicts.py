@@ -0,0 +1,172 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.conflicts import IntervalIndex
+from airport.models import Flight
+from airport.tests.test_airport_api import (
+    sample_route,
+    sample_airplane,
+    sample_crew,
+    sample_flight,
+)
+
+
+class IntervalIndexTests(TestCase):
+
+    def setUp(self):
+        self.start = timezone.now()
+        self.index = IntervalIndex(max_length=timedelta(hours=10))
+        self.index.add(1, self.start, self.start + timedelta(hours=2), "a")
+        self.index.add(
+            1, self.start + timedelta(hours=3), self.start + timedelta(hours=5), "b"
+        )
+        self.index.add(2, self.start, self.start + timedelta(hours=9), "c")
+
+    def test_overlapping(self):
+        hour = timedelta(hours=1)
+        self.assertEqual(
+            self.index.overlapping(1, self.start + hour, self.start + 4 * hour),
+            ["a", "b"],
+        )
+        self.assertEqual(
+            self.index.overlapping(1, self.start + 2 * hour, self.start + 3 * hour),
+            [],
+        )
+        self.assertEqual(
+            self.index.overlapping(2, self.start + 8 * hour, self.start + 9 * hour),
+            ["c"],
+        )
+        self.assertEqual(
+            self.index.overlapping(1, self.start, self.start + hour, exclude="a"), []
+        )
+
+    def test_conflicts(self):
+        self.index.add(
+            1, self.start + timedelta(hours=1), self.start + timedelta(hours=4), "d"
+        )
+        self.assertEqual(sorted(self.index.conflicts()), [(1, "a", "d"), (1, "d", "b")])
+
+
+class FlightConflictValidationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            "admin@example.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.departure = timezone.now() + timedelta(days=1)
+        self.crew = sample_crew()
+        self.flight = sample_flight(
+            departure_time=self.departure, crew_list=[self.crew]
+        )
+
+    def payload(self, hours_offset, **overrides):
+        departure = self.departure + timedelta(hours=hours_offset)
+        payload = {
+            "route": sample_route().id,
+            "airplane": sample_airplane().id,
+            "departure_time": departure.isoformat(),
+            "arrival_time": (departure + timedelta(hours=2)).isoformat(),
+            "crew": [sample_crew(first_name="Other").id],
+        }
+        payload.update(overrides)
+        return payload
+
+    def test_overlapping_airplane_rejected(self):
+        payload = self.payload(1, airplane=self.flight.airplane_id)
+        res = self.client.post(reverse("airport:flight-list"), payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("airplane", res.data)
+
+    def test_overlapping_crew_rejected(self):
+        payload = self.payload(1, crew=[self.crew.id])
+        res = self.client.post(reverse("airport:flight-list"), payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("crew", res.data)
+
+    def test_back_to_back_flights_allowed(self):
+        payload = self.payload(2, airplane=self.flight.airplane_id, crew=[self.crew.id])
+        res = self.client.post(reverse("airport:flight-list"), payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_update_does_not_conflict_with_itself(self):
+        url = reverse("airport:flight-detail", args=[self.flight.id])
+        new_arrival = self.flight.arrival_time + timedelta(minutes=30)
+        res = self.client.patch(
+            url, {"arrival_time": new_arrival.isoformat()}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_arrival_before_departure_rejected(self):
+        payload = self.payload(10)
+        payload["arrival_time"] = payload["departure_time"]
+        res = self.client.post(reverse("airport:flight-list"), payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CrewRosterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("user@example.com", "testpass")
+        self.client.force_authenticate(self.user)
+
+    def test_roster_lists_upcoming_flights_in_order(self):
+        crew = sample_crew()
+        now = timezone.now()
+        later = sample_flight(departure_time=now + timedelta(days=2), crew_list=[crew])
+        sooner = sample_flight(
+            route=later.route,
+            departure_time=now + timedelta(days=1),
+            crew_list=[crew],
+        )
+        sample_flight(
+            route=later.route,
+            departure_time=now - timedelta(days=1),
+            crew_list=[crew],
+        )
+        sample_flight(route=later.route, departure_time=now + timedelta(days=3))
+
+        res = self.client.get(reverse("airport:crew-roster", args=[crew.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["departure_time"] for item in res.data],
+            [
+                sooner.departure_time.isoformat().replace("+00:00", "Z"),
+                later.departure_time.isoformat().replace("+00:00", "Z"),
+            ],
+        )
+
+
+class AuditCommandTests(TestCase):
+
+    def test_audit_reports_overlaps(self):
+        crew = sample_crew()
+        first = sample_flight(crew_list=[crew])
+        Flight.objects.create(
+            route=sample_route(),
+            airplane=first.airplane,
+            departure_time=first.departure_time + timedelta(minutes=30),
+            arrival_time=first.arrival_time + timedelta(minutes=30),
+        ).crew.set([crew])
+
+        out = StringIO()
+        call_command("audit_flight_conflicts", stdout=out)
+
+        self.assertIn(f"Airplane {first.airplane_id}", out.getvalue())
+        self.assertIn(f"Crew {crew.id}", out.getvalue())
+        self.assertIn("2 conflict(s) found", out.getvalue())
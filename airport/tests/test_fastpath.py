@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from airport.fastpath import get_plan
+from airport.models import Airport, Route, AirplaneType, Airplane, Crew, Flight
+from airport.serializers import (
+    AirportSerializer,
+    RouteSerializer,
+    AirplaneTypeSerializer,
+    AirplaneSerializer,
+    CrewSerializer,
+    FlightListSerializer,
+)
+from airport.tests.test_airport_api import (
+    sample_airport,
+    sample_route,
+    sample_airplane,
+    sample_crew,
+    sample_flight,
+)
+from airport.views import TICKETS_AVAILABLE, FlightViewSet
+
+FLIGHT_LIST = FlightViewSet.queryset.annotate(tickets_available=TICKETS_AVAILABLE)
+
+
+class FieldPlanTests(TestCase):
+
+    def setUp(self):
+        route = sample_route()
+        airplane = sample_airplane()
+        now = timezone.now()
+        crew = [sample_crew(), sample_crew(first_name="Jane", last_name="Roe")]
+        for day in range(3):
+            sample_flight(
+                route=route,
+                airplane=airplane,
+                departure_time=now + timedelta(days=day + 1),
+                crew_list=crew[: day % 3],
+            )
+        sample_airport(name="Ünïcode", closest_big_city="Kyiv")
+
+    def assert_identical(self, serializer_class, queryset):
+        renderer = JSONRenderer()
+        expected = renderer.render(serializer_class(queryset, many=True).data)
+        actual = renderer.render(get_plan(serializer_class).render(queryset))
+        self.assertEqual(actual, expected)
+
+    def test_reference_serializers_identical(self):
+        self.assert_identical(AirportSerializer, Airport.objects.order_by("id"))
+        self.assert_identical(RouteSerializer, Route.objects.order_by("id"))
+        self.assert_identical(
+            AirplaneTypeSerializer, AirplaneType.objects.order_by("id")
+        )
+        self.assert_identical(AirplaneSerializer, Airplane.objects.order_by("id"))
+        self.assert_identical(CrewSerializer, Crew.objects.order_by("id"))
+
+    def test_flight_list_identical(self):
+        self.assert_identical(FlightListSerializer, FLIGHT_LIST.order_by("id"))
+
+    def test_flight_list_query_count_is_fixed(self):
+        with self.assertNumQueries(2):
+            get_plan(FlightListSerializer).render(FLIGHT_LIST.all())
+
+
+class FastListEndpointTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("user@example.com", "testpass")
+        self.client.force_authenticate(self.user)
+        sample_flight(crew_list=[sample_crew(), sample_crew(first_name="Jane")])
+
+    def test_flight_list_response_identical(self):
+        url = reverse("airport:flight-list")
+        expected = self.client.get(url).content
+        with override_settings(AIRPORT_FAST_LIST=True):
+            actual = self.client.get(url).content
+        self.assertEqual(actual, expected)
+
+    def test_airplane_list_with_capacity_filter_falls_back(self):
+        url = reverse("airport:airplane-list") + "?min_capacity=10"
+        expected = self.client.get(url).content
+        with override_settings(AIRPORT_FAST_LIST=True):
+            actual = self.client.get(url).content
+        self.assertEqual(actual, expected)
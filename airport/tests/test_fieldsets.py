@@ -0,0 +1,118 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.tests.test_airport_api import (
+    sample_route,
+    sample_airplane,
+    sample_crew,
+    sample_flight,
+    sample_order,
+)
+from airport.views import FlightViewSet
+
+
+class SparseFieldsetTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("user@example.com", "testpass")
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight(
+            crew_list=[sample_crew(), sample_crew(first_name="Jane")]
+        )
+        self.url = reverse("airport:flight-list")
+
+    def test_fields_trim_output(self):
+        res = self.client.get(
+            self.url, {"fields": "id,departure_time,tickets_available"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(res.data[0]), ["id", "departure_time", "tickets_available"]
+        )
+        self.assertEqual(res.data[0]["id"], self.flight.id)
+        self.assertEqual(
+            res.data[0]["tickets_available"], self.flight.airplane.capacity
+        )
+
+    def test_fields_skip_joins_and_prefetches(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {"fields": "id,departure_time"})
+        flight_queries = [
+            query["sql"] for query in queries if "airport_flight" in query["sql"]
+        ]
+        self.assertEqual(len(flight_queries), 1)
+        self.assertNotIn("JOIN", flight_queries[0])
+        self.assertNotIn("arrival_time", flight_queries[0])
+
+    def test_view_queryset_kept(self):
+        other = sample_flight(route=self.flight.route)
+        only_other = FlightViewSet.queryset.filter(id=other.id)
+
+        with mock.patch.object(FlightViewSet, "queryset", only_other):
+            res = self.client.get(self.url, {"fields": "id,tickets_available"})
+
+        self.assertEqual(
+            res.data, [{"id": other.id, "tickets_available": other.airplane.capacity}]
+        )
+
+    def test_sparse_values_match_full_listing(self):
+        full = self.client.get(self.url).data[0]
+        sparse = self.client.get(self.url, {"fields": "route,airplane,crew"}).data[0]
+        for name in ("route", "airplane", "crew"):
+            self.assertEqual(sparse[name], full[name])
+
+    def test_expand(self):
+        res = self.client.get(
+            self.url, {"fields": "id,route,airplane,crew", "expand": "route,crew"}
+        )
+        item = res.data[0]
+        self.assertEqual(item["route"]["id"], self.flight.route_id)
+        self.assertEqual(item["route"]["distance"], self.flight.route.distance)
+        self.assertEqual(item["airplane"], self.flight.airplane.name)
+        self.assertEqual(
+            sorted(member["first_name"] for member in item["crew"]), ["Jane", "John"]
+        )
+
+    def test_expand_query_count_is_fixed(self):
+        for day in range(2, 5):
+            sample_flight(route=self.flight.route, crew_list=[sample_crew()])
+        with self.assertNumQueries(2):
+            self.client.get(self.url, {"expand": "route,airplane,crew"})
+
+    def test_unknown_field_rejected(self):
+        res = self.client.get(self.url, {"fields": "id,nope"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get(self.url, {"expand": "tickets"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reference_endpoints(self):
+        route = sample_route()
+        res = self.client.get(
+            reverse("airport:route-list"), {"fields": "id,source", "expand": "source"}
+        )
+        item = next(item for item in res.data if item["id"] == route.id)
+        self.assertEqual(item["source"]["name"], route.source.name)
+
+        sample_airplane()
+        res = self.client.get(
+            reverse("airport:airplane-list"),
+            {"fields": "name,airplane_type", "expand": "airplane_type"},
+        )
+        self.assertEqual(list(res.data[0]), ["name", "airplane_type"])
+        self.assertIn("name", res.data[0]["airplane_type"])
+
+    def test_order_fields(self):
+        sample_order(self.user, tickets=[{"row": 1, "seat": 1, "flight": self.flight}])
+        res = self.client.get(reverse("airport:order-list"), {"fields": "id"})
+        self.assertEqual(list(res.data[0]), ["id"])
@@ -0,0 +1,158 @@
+import random
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.geo import AirportTree, great_circle_km
+from airport.models import Airport, Route
+from airport.tests.test_airport_api import sample_airport, sample_route
+
+NEAREST_URL = reverse("airport:airport-nearest")
+AIRPORT_URL = reverse("airport:airport-list")
+ROUTE_URL = reverse("airport:route-list")
+
+
+def located_airport(name, latitude, longitude):
+    return Airport.objects.create(
+        name=name, closest_big_city=name, latitude=latitude, longitude=longitude
+    )
+
+
+class GreatCircleTests(SimpleTestCase):
+
+    def test_known_distance(self):
+        # Boryspil to Heathrow
+        self.assertAlmostEqual(
+            float(great_circle_km(50.345, 30.8947, 51.47, -0.4543)), 2185, delta=1
+        )
+
+    def test_vectorized(self):
+        distances = great_circle_km([0, 0], [0, 179.5], [0, 0], [1, -179.5])
+        self.assertAlmostEqual(distances[0], distances[1], places=6)
+
+
+class AirportTreeTests(SimpleTestCase):
+
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(500)]
+        tree = AirportTree(
+            range(500),
+            [lat for lat, _ in points],
+            [lon for _, lon in points],
+            leaf_size=4,
+        )
+        for latitude, longitude in [(50.4, 30.5), (89.9, 0), (0, 179.99), (-90, 0)]:
+            expected = sorted(
+                range(500),
+                key=lambda i: float(great_circle_km(latitude, longitude, *points[i])),
+            )[:5]
+            result = tree.nearest(latitude, longitude, 5)
+            self.assertEqual([airport_id for airport_id, _ in result], expected)
+            self.assertAlmostEqual(
+                result[0][1],
+                float(great_circle_km(latitude, longitude, *points[expected[0]])),
+                places=6,
+            )
+
+    def test_empty_tree(self):
+        self.assertEqual(AirportTree([], [], []).nearest(0, 0, 3), [])
+
+
+class GeoApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@example.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.kyiv = located_airport("Boryspil", 50.345, 30.8947)
+        self.lviv = located_airport("Lviv", 49.8125, 23.9561)
+        self.london = located_airport("Heathrow", 51.47, -0.4543)
+
+    def test_nearest_airports(self):
+        res = self.client.get(NEAREST_URL, {"lat": 50.45, "lon": 30.52, "limit": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["name"] for item in res.data], ["Boryspil", "Lviv"])
+        self.assertLess(res.data[0]["distance_km"], res.data[1]["distance_km"])
+
+    def test_nearest_rejects_bad_coordinates(self):
+        for params in ({"lat": "x", "lon": 1}, {"lat": 91, "lon": 0}, {"lon": 0}):
+            res = self.client.get(NEAREST_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_follows_new_airports(self):
+        self.client.get(NEAREST_URL, {"lat": 0, "lon": 0})
+        with self.captureOnCommitCallbacks(execute=True):
+            located_airport("Null Island", 0.1, 0.1)
+
+        res = self.client.get(NEAREST_URL, {"lat": 0, "lon": 0, "limit": 1})
+
+        self.assertEqual(res.data[0]["name"], "Null Island")
+
+    def test_coordinates_must_come_in_pairs(self):
+        res = self.client.post(
+            AIRPORT_URL,
+            {"name": "Half", "closest_big_city": "Half", "latitude": 10},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_route_distance_computed_when_omitted(self):
+        res = self.client.post(
+            ROUTE_URL,
+            {"source": self.kyiv.id, "destination": self.london.id},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["distance"], 2185)
+
+    def test_route_distance_validated(self):
+        res = self.client.post(
+            ROUTE_URL,
+            {"source": self.kyiv.id, "destination": self.london.id, "distance": 900},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            ROUTE_URL,
+            {"source": self.kyiv.id, "destination": self.london.id, "distance": 2300},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_route_distance_required_without_coordinates(self):
+        unknown = sample_airport(name="Unknown")
+        res = self.client.post(
+            ROUTE_URL,
+            {"source": self.kyiv.id, "destination": unknown.id},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_check_route_distances_fixes_mismatches(self):
+        wrong = sample_route(self.kyiv, self.lviv, distance=10)
+        sample_route(self.kyiv, self.london, distance=2185)
+        out = StringIO()
+
+        call_command("check_route_distances", "--fix", stdout=out)
+
+        self.assertIn("Fixed 1 mismatching route(s)", out.getvalue())
+        wrong.refresh_from_db()
+        self.assertEqual(
+            wrong.distance,
+            round(float(great_circle_km(50.345, 30.8947, 49.8125, 23.9561))),
+        )
+        self.assertEqual(Route.objects.filter(distance=2185).count(), 1)
@@ -0,0 +1,168 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Order, OrderRequest, SeatEvent, SeatHold, Ticket
+from airport.order_queue import process_batch
+from airport.tests.test_airport_api import sample_flight
+from airport.travel_stats import get_stats
+
+HOLD_URL = reverse("airport:seathold-list")
+CHECKOUT_URL = reverse("airport:seathold-checkout")
+ORDER_URL = reverse("airport:order-list")
+
+
+class SeatHoldTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "agent@example.com", "testpass", is_staff=True
+        )
+        self.other = get_user_model().objects.create_user(
+            "other@example.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def hold(self, row=1, seat=1, user=None):
+        return SeatHold.objects.create(
+            flight=self.flight,
+            row=row,
+            seat=seat,
+            user=user or self.user,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+
+    def test_create_hold(self):
+        res = self.client.post(
+            HOLD_URL, {"flight": self.flight.id, "row": 2, "seat": 3}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(SeatHold.objects.get(id=res.data["id"]).is_active)
+
+    def test_seat_held_by_other_customer_rejected(self):
+        self.hold(user=self.other)
+        res = self.client.post(
+            HOLD_URL, {"flight": self.flight.id, "row": 1, "seat": 1}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_hold_replaced(self):
+        self.hold(user=self.other)
+        SeatHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        res = self.client.post(
+            HOLD_URL, {"flight": self.flight.id, "row": 1, "seat": 1}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.get().user, self.user)
+
+    def test_sold_seat_cannot_be_held(self):
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            flight=self.flight,
+            order=Order.objects.create(user=self.other),
+        )
+        res = self.client.post(
+            HOLD_URL, {"flight": self.flight.id, "row": 1, "seat": 1}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_order_validation_honours_holds(self):
+        self.hold(user=self.other)
+        payload = {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]}
+        res = self.client.post(ORDER_URL, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(self.other)
+        res = self.client.post(ORDER_URL, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_queued_orders_honour_holds(self):
+        self.hold(user=self.other)
+        self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+            format="json",
+            HTTP_PREFER="respond-async",
+        )
+        process_batch()
+        self.assertEqual(OrderRequest.objects.get().status, OrderRequest.FAILED)
+
+    def test_checkout_converts_holds_atomically(self):
+        self.hold(row=1, seat=1)
+        self.hold(row=1, seat=2)
+        self.hold(row=1, seat=3, user=self.other)
+
+        res = self.client.post(CHECKOUT_URL, {}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(id=res.data["id"])
+        self.assertEqual(sorted(order.tickets.values_list("seat", flat=True)), [1, 2])
+        self.assertEqual(SeatHold.objects.get().user, self.other)
+
+    def test_checkout_queries_do_not_grow_with_holds(self):
+        # With the stats row in place both checkouts take the same path
+        get_stats(self.user)
+        query_counts = []
+        for seats in ((1, 2), (3, 4, 5, 6)):
+            for seat in seats:
+                self.hold(row=1, seat=seat)
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(CHECKOUT_URL, {}, format="json")
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(
+            SeatEvent.objects.filter(kind=SeatEvent.TAKEN).count(),
+            Ticket.objects.count(),
+        )
+
+    def test_checkout_fails_whole_when_seat_sold(self):
+        first = self.hold(row=1, seat=1)
+        self.hold(row=1, seat=2)
+        Ticket.objects.create(
+            row=1,
+            seat=2,
+            flight=self.flight,
+            order=Order.objects.create(user=self.other),
+        )
+        res = self.client.post(CHECKOUT_URL, {}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(SeatHold.objects.filter(id=first.id).exists())
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_checkout_rejects_malformed_hold_ids(self):
+        self.hold(row=1, seat=1)
+        for holds in ("1", 1, ["x"], [], {"id": 1}):
+            res = self.client.post(CHECKOUT_URL, {"holds": holds}, format="json")
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, holds)
+            self.assertIn("holds", res.data)
+        self.assertFalse(Order.objects.exists())
+
+    def test_release_expired_holds(self):
+        self.hold(row=1, seat=1)
+        for seat in range(2, 6):
+            self.hold(row=1, seat=seat, user=self.other)
+        SeatHold.objects.filter(user=self.other).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        out = StringIO()
+        call_command("release_expired_holds", "--batch-size", "2", stdout=out)
+        self.assertIn("Released 4 hold(s)", out.getvalue())
+        self.assertEqual(SeatHold.objects.count(), 1)
@@ -0,0 +1,99 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import IdempotencyKey, Order, Ticket
+from airport.tests.test_airport_api import sample_flight
+
+ORDER_URL = reverse("airport:order-list")
+
+
+class IdempotentOrderTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@example.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+        self.payload = {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]}
+
+    def post(self, payload, key="key-1"):
+        return self.client.post(
+            ORDER_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_original_response(self):
+        first = self.post(self.payload)
+        second = self.post(self.payload)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_replay_skips_validation_and_inventory(self):
+        self.post(self.payload)
+        with self.assertNumQueries(1):
+            self.post(self.payload)
+
+    def test_different_payload_with_same_key_rejected(self):
+        self.post(self.payload)
+        other = {"tickets": [{"row": 2, "seat": 2, "flight": self.flight.id}]}
+        res = self.post(other)
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_failed_request_is_not_stored(self):
+        bad = {"tickets": [{"row": 999, "seat": 1, "flight": self.flight.id}]}
+        self.assertEqual(self.post(bad).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_unrelated_integrity_error_not_replayed(self):
+        with mock.patch(
+            "airport.serializers.OrderSerializer.save",
+            side_effect=IntegrityError("ticket constraint"),
+        ):
+            with self.assertRaisesMessage(IntegrityError, "ticket constraint"):
+                self.post(self.payload)
+
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_expired_key_runs_again(self):
+        self.post(self.payload)
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        other = {"tickets": [{"row": 2, "seat": 2, "flight": self.flight.id}]}
+        res = self.post(other)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_without_header_creates_each_time(self):
+        self.client.post(ORDER_URL, self.payload, format="json")
+        self.client.post(ORDER_URL, self.payload, format="json")
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_purge_command(self):
+        self.post(self.payload, key="old")
+        self.post(self.payload, key="fresh")
+        IdempotencyKey.objects.filter(key="old").update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        call_command("purge_idempotency_keys", stdout=StringIO())
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)), ["fresh"]
+        )
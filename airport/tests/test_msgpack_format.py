@@ -0,0 +1,99 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from airport.models import Airport
+from airport.msgpack_format import MEDIA_TYPE, MessagePackRenderer, packb, unpackb
+from airport.tests.test_airport_api import sample_crew, sample_flight, sample_order
+
+FLIGHT_URL = reverse("airport:flight-list")
+AIRPORT_URL = reverse("airport:airport-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+class MessagePackRendererTests(SimpleTestCase):
+
+    def test_same_data_as_json(self):
+        data = {
+            "when": datetime(2030, 1, 1, 10, 30, tzinfo=timezone.utc),
+            "price": Decimal("12.50"),
+            "seats": (1, 2),
+            "name": "Boryspil",
+        }
+
+        rendered = unpackb(MessagePackRenderer().render(data))
+
+        self.assertEqual(rendered, json.loads(JSONRenderer().render(data)))
+
+
+class MessagePackApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@example.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight(crew_list=[sample_crew()])
+        sample_order(self.user, [{"flight": self.flight, "row": 1, "seat": 1}])
+
+    def test_negotiated_by_accept(self):
+        for url in (FLIGHT_URL, ORDER_URL, f"{FLIGHT_URL}{self.flight.id}/"):
+            as_json = self.client.get(url)
+            as_msgpack = self.client.get(url, HTTP_ACCEPT=MEDIA_TYPE)
+
+            self.assertEqual(as_msgpack["Content-Type"], MEDIA_TYPE)
+            self.assertEqual(unpackb(as_msgpack.content), json.loads(as_json.content))
+
+    def test_format_suffix(self):
+        res = self.client.get(FLIGHT_URL, {"format": "msgpack"})
+
+        self.assertEqual(res["Content-Type"], MEDIA_TYPE)
+
+    def test_json_stays_default(self):
+        res = self.client.get(FLIGHT_URL, HTTP_ACCEPT="*/*")
+
+        self.assertEqual(res["Content-Type"], "application/json")
+
+    def test_msgpack_request_body(self):
+        res = self.client.post(
+            AIRPORT_URL,
+            packb({"name": "Boryspil", "closest_big_city": "Kyiv"}),
+            content_type=MEDIA_TYPE,
+            HTTP_ACCEPT=MEDIA_TYPE,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(unpackb(res.content)["name"], "Boryspil")
+        self.assertTrue(Airport.objects.filter(name="Boryspil").exists())
+
+    def test_malformed_body_rejected(self):
+        for body in (
+            b"\xc1",
+            packb({1: "x"}),
+            packb({"name": "x"}) + b"\x00",
+            packb({"tickets": [{1: "x"}]}),
+            packb({"tickets": [{b"row": 1}]}),
+        ):
+            res = self.client.post(AIRPORT_URL, body, content_type=MEDIA_TYPE)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, body)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+
+        call_command("bench_renderers", rows=5, repeat=1, stdout=out)
+
+        self.assertIn("msgpack", out.getvalue())
+        self.assertIn("order history", out.getvalue())
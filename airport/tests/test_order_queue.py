@@ -0,0 +1,130 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Order, OrderRequest, SeatHold
+from airport.order_queue import process_batch
+from airport.tests.test_airport_api import sample_flight
+from airport.travel_stats import get_stats
+
+ORDER_URL = reverse("airport:order-list")
+
+
+class QueuedOrderTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@example.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def enqueue(self, tickets):
+        return self.client.post(
+            ORDER_URL,
+            {"tickets": tickets},
+            format="json",
+            HTTP_PREFER="respond-async",
+        )
+
+    def test_async_request_is_accepted_and_confirmed_later(self):
+        res = self.enqueue([{"row": 1, "seat": 1, "flight": self.flight.id}])
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data["status"], OrderRequest.PENDING)
+        self.assertFalse(Order.objects.exists())
+
+        self.assertEqual(process_batch(), 1)
+
+        status_res = self.client.get(res.data["status_url"])
+        self.assertEqual(status_res.data["status"], OrderRequest.CONFIRMED)
+        order = Order.objects.get(id=status_res.data["order"])
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(order.tickets.get().flight, self.flight)
+
+    def test_shape_errors_rejected_up_front(self):
+        res = self.enqueue([{"row": 0, "seat": 1, "flight": self.flight.id}])
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(OrderRequest.objects.exists())
+
+    def test_invalid_requests_fail_without_blocking_batch(self):
+        self.enqueue([{"row": 999, "seat": 1, "flight": self.flight.id}])
+        self.enqueue([{"row": 1, "seat": 1, "flight": 999999}])
+        self.enqueue([{"row": 2, "seat": 2, "flight": self.flight.id}])
+
+        process_batch()
+
+        statuses = list(
+            OrderRequest.objects.order_by("id").values_list("status", flat=True)
+        )
+        self.assertEqual(
+            statuses,
+            [OrderRequest.FAILED, OrderRequest.FAILED, OrderRequest.CONFIRMED],
+        )
+        self.assertIn("tickets", OrderRequest.objects.first().errors)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_batch_is_group_committed(self):
+        # With the stats row in place both batches take the same path
+        get_stats(self.user)
+        query_counts = []
+        for size in (2, 8):
+            for seat in range(size):
+                self.enqueue(
+                    [{"row": 1, "seat": seat % 6 + 1, "flight": self.flight.id}]
+                )
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(process_batch(), size)
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(Order.objects.count(), 10)
+
+    def test_confirmed_orders_release_own_holds(self):
+        other = get_user_model().objects.create_user("other@example.com", "testpass")
+        expires_at = timezone.now() + timedelta(minutes=5)
+        for user, seat in ((self.user, 1), (self.user, 2), (other, 3)):
+            SeatHold.objects.create(
+                user=user, flight=self.flight, row=1, seat=seat, expires_at=expires_at
+            )
+        self.enqueue([{"row": 1, "seat": 1, "flight": self.flight.id}])
+
+        process_batch()
+
+        self.assertEqual(
+            sorted(SeatHold.objects.values_list("user_id", "seat")),
+            [(self.user.id, 2), (other.id, 3)],
+        )
+
+    def test_status_only_visible_to_owner(self):
+        res = self.enqueue([{"row": 1, "seat": 1, "flight": self.flight.id}])
+        other = get_user_model().objects.create_user("other@example.com", "testpass")
+        self.client.force_authenticate(other)
+        self.assertEqual(
+            self.client.get(res.data["status_url"]).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+    @override_settings(AIRPORT_ASYNC_ORDERS=True)
+    def test_setting_forces_async_and_worker_drains(self):
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        out = StringIO()
+        call_command("process_order_queue", "--once", stdout=out)
+        self.assertIn("Processed 1 request(s)", out.getvalue())
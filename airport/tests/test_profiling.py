@@ -0,0 +1,117 @@
+import pstats
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from airport.models import RequestProfile
+from airport.profiling import PROFILE_ID_HEADER, sample_rate
+from airport.tests.test_airport_api import sample_crew, sample_flight
+
+FLIGHT_URL = reverse("airport:flight-list")
+PROFILES_URL = reverse("airport:requestprofile-list")
+
+
+class ProfilingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.staff = get_user_model().objects.create_user(
+            "admin@example.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.staff)
+        sample_flight(crew_list=[sample_crew()])
+
+    def test_sample_rate(self):
+        self.assertEqual(sample_rate("1"), 1.0)
+        self.assertEqual(sample_rate("true"), 1.0)
+        self.assertEqual(sample_rate("0.25"), 0.25)
+        self.assertEqual(sample_rate("7"), 1.0)
+        self.assertEqual(sample_rate("nope"), 0.0)
+
+    def test_unflagged_request_not_profiled(self):
+        res = self.client.get(FLIGHT_URL)
+
+        self.assertNotIn(PROFILE_ID_HEADER, res)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_staff_request_profiled(self):
+        res = self.client.get(FLIGHT_URL, HTTP_X_PROFILE="1")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        profile = RequestProfile.objects.get(id=res[PROFILE_ID_HEADER])
+        self.assertEqual(profile.user, self.staff)
+        self.assertEqual(profile.path, FLIGHT_URL)
+        summary = profile.summary
+        self.assertGreater(summary["sql"]["queries"], 0)
+        for phase in ("queryset", "serialization", "rendering"):
+            self.assertGreater(summary["phases_ms"][phase], 0, phase)
+        self.assertTrue(summary["functions"])
+        self.assertTrue(summary["allocations"])
+        self.assertGreater(summary["memory"]["peak_kb"], 0)
+
+    def test_token_authenticated_staff_use_query_flag(self):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.staff).key}"
+        )
+
+        res = client.get(FLIGHT_URL, {"profile": "1"})
+
+        self.assertIn(PROFILE_ID_HEADER, res)
+
+    def test_non_staff_and_zero_rate_not_profiled(self):
+        self.client.get(FLIGHT_URL, HTTP_X_PROFILE="0")
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("user@example.com", "testpass")
+        )
+        res = self.client.get(FLIGHT_URL, HTTP_X_PROFILE="1")
+
+        self.assertNotIn(PROFILE_ID_HEADER, res)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(AIRPORT_PROFILING=False)
+    def test_disabled_middleware_is_not_loaded(self):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+
+        res = client.get(FLIGHT_URL, HTTP_X_PROFILE="1")
+
+        self.assertNotIn(PROFILE_ID_HEADER, res)
+
+    def test_download_and_listing(self):
+        profile_id = self.client.get(FLIGHT_URL, HTTP_X_PROFILE="1")[PROFILE_ID_HEADER]
+
+        listing = self.client.get(PROFILES_URL)
+        res = self.client.get(
+            reverse("airport:requestprofile-download", args=[profile_id])
+        )
+
+        self.assertEqual(listing.data[0]["id"], int(profile_id))
+        self.assertNotIn("stats", listing.data[0])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("attachment", res["Content-Disposition"])
+        with tempfile.NamedTemporaryFile(suffix=".prof") as prof:
+            prof.write(res.content)
+            prof.flush()
+            self.assertGreater(pstats.Stats(prof.name).total_calls, 0)
+
+    def test_profiles_are_staff_only(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("user@example.com", "testpass")
+        )
+        res = self.client.get(PROFILES_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(AIRPORT_PROFILING_KEEP=2)
+    def test_old_profiles_pruned(self):
+        for _ in range(3):
+            self.client.get(FLIGHT_URL, HTTP_X_PROFILE="1")
+        self.assertEqual(RequestProfile.objects.count(), 2)
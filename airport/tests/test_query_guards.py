@@ -0,0 +1,154 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.db.models.expressions import RawSQL
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.query_guards import (
+    NEXT_OFFSET_HEADER,
+    PAGE_SIZE_HEADER,
+    is_timeout,
+    statement_timeout,
+    timeout_count,
+)
+from airport.tests.test_airport_api import sample_flight, sample_route
+from airport.views import FlightViewSet
+
+FLIGHT_URL = reverse("airport:flight-list")
+
+# Counts to ten million, far longer than the timeouts used here
+SLOW_SQL = (
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c "
+    "WHERE x < 10000000) SELECT count(*) FROM c"
+)
+
+
+class StatementTimeoutTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_slow_statement_interrupted_and_counted(self):
+        with self.assertLogs("airport.query_guards", "WARNING"):
+            with self.assertRaises(OperationalError) as error:
+                with statement_timeout("test-list", 50):
+                    with connection.cursor() as cursor:
+                        cursor.execute(SLOW_SQL)
+
+        self.assertTrue(is_timeout(error.exception))
+        self.assertEqual(timeout_count("test-list"), 1)
+
+    def test_fast_statements_unaffected(self):
+        with statement_timeout("test-list", 1000):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                self.assertEqual(cursor.fetchone(), (1,))
+        self.assertEqual(timeout_count("test-list"), 0)
+
+
+class QueryGuardTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("user@example.com", "pass")
+        self.client.force_authenticate(self.user)
+        self.route = sample_route()
+        start = timezone.now() + timedelta(days=1)
+        self.flights = [
+            sample_flight(
+                route=self.route, departure_time=start + timedelta(hours=3 * i)
+            )
+            for i in range(3)
+        ]
+
+    def ids(self, response):
+        return [flight["id"] for flight in response.data]
+
+    def test_paging(self):
+        first = self.client.get(FLIGHT_URL, {"route_id": self.route.id, "limit": 2})
+        last = self.client.get(
+            FLIGHT_URL, {"route_id": self.route.id, "limit": 2, "offset": 2}
+        )
+
+        self.assertEqual(self.ids(first), [flight.id for flight in self.flights[:2]])
+        self.assertEqual(first[NEXT_OFFSET_HEADER], "2")
+        self.assertEqual(self.ids(last), [self.flights[2].id])
+        self.assertNotIn(NEXT_OFFSET_HEADER, last)
+
+    @override_settings(AIRPORT_MAX_PAGE_SIZE=2)
+    def test_limit_capped(self):
+        res = self.client.get(FLIGHT_URL, {"route_id": self.route.id, "limit": 50})
+
+        self.assertEqual(len(res.data), 2)
+        self.assertEqual(res[NEXT_OFFSET_HEADER], "2")
+        self.assertEqual(res[PAGE_SIZE_HEADER], "2")
+
+    @override_settings(AIRPORT_SCAN_PAGE_SIZE=1)
+    def test_unselective_list_downgraded(self):
+        scan = self.client.get(FLIGHT_URL)
+        selective = self.client.get(FLIGHT_URL, {"route_id": self.route.id})
+        upcoming = self.client.get(
+            FLIGHT_URL, {"departure_after": timezone.now().isoformat()}
+        )
+
+        self.assertEqual(len(scan.data), 1)
+        self.assertEqual(scan[NEXT_OFFSET_HEADER], "1")
+        self.assertEqual(scan[PAGE_SIZE_HEADER], "1")
+        self.assertEqual(len(selective.data), 3)
+        self.assertEqual(len(upcoming.data), 3)
+
+    @override_settings(AIRPORT_MAX_PAGE_SIZE=1)
+    def test_streamed_list_not_paged(self):
+        res = self.client.get(FLIGHT_URL, {"stream": "true", "route_id": self.route.id})
+
+        self.assertEqual(len(json.loads(b"".join(res.streaming_content))), 3)
+
+    def test_unselective_stream_staff_only(self):
+        res = self.client.get(FLIGHT_URL, {"stream": "true"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.user.is_staff = True
+        res = self.client.get(FLIGHT_URL, {"stream": "true"})
+        self.assertEqual(len(json.loads(b"".join(res.streaming_content))), 3)
+
+    @override_settings(AIRPORT_STATEMENT_TIMEOUTS={"default": 5000, "flight-list": 50})
+    def test_streamed_rows_read_under_timeout(self):
+        slow = FlightViewSet.queryset.annotate(slow=RawSQL(f"({SLOW_SQL})", []))
+
+        with mock.patch.object(FlightViewSet, "queryset", slow):
+            res = self.client.get(
+                FLIGHT_URL, {"stream": "true", "route_id": self.route.id}
+            )
+            with self.assertLogs("airport.query_guards", "WARNING"):
+                with self.assertRaises(OperationalError):
+                    b"".join(res.streaming_content)
+
+        self.assertEqual(timeout_count("flight-list"), 1)
+
+    @override_settings(AIRPORT_MAX_OFFSET=10)
+    def test_invalid_pages_rejected(self):
+        for params in ({"offset": 11}, {"limit": "many"}, {"limit": -1}):
+            res = self.client.get(FLIGHT_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    @override_settings(AIRPORT_STATEMENT_TIMEOUTS={"default": 5000, "flight-list": 50})
+    def test_timeout_answered_with_503(self):
+        slow = FlightViewSet.queryset.annotate(slow=RawSQL(f"({SLOW_SQL})", []))
+
+        with mock.patch.object(FlightViewSet, "queryset", slow):
+            with self.assertLogs("airport.query_guards", "WARNING"):
+                res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res["Retry-After"], "5")
+        self.assertEqual(timeout_count("flight-list"), 1)
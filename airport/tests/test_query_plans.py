@@ -0,0 +1,93 @@
+import unittest
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from airport.models import Airport, Flight, Order, Ticket
+from airport.query_plans import (
+    HOT_QUERIES,
+    ORDERED_QUERIES,
+    explain,
+    full_scans,
+    sorts,
+    supported,
+)
+from airport.tests.test_airport_api import (
+    sample_airplane,
+    sample_airplane_type,
+    sample_crew,
+    sample_route,
+)
+
+
+@unittest.skipUnless(supported(), "no plan checks for this database")
+class HotQueryPlanTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        airplane_type = sample_airplane_type()
+        airplanes = [
+            sample_airplane(name=f"Plane {i}", airplane_type=airplane_type)
+            for i in range(10)
+        ]
+        routes = [sample_route() for _ in range(10)]
+        crew = [sample_crew(first_name=f"Crew {i}") for i in range(10)]
+        start = timezone.now() - timedelta(days=100)
+        flights = Flight.objects.bulk_create(
+            [
+                Flight(
+                    route=routes[i % 10],
+                    airplane=airplanes[i % 10],
+                    departure_time=start + timedelta(hours=i),
+                    arrival_time=start + timedelta(hours=i + 2),
+                )
+                for i in range(400)
+            ]
+        )
+        Flight.crew.through.objects.bulk_create(
+            [
+                Flight.crew.through(flight=flight, crew=crew[i % 10])
+                for i, flight in enumerate(flights)
+            ]
+        )
+        users = get_user_model().objects.bulk_create(
+            [get_user_model()(email=f"user{i}@example.com") for i in range(20)]
+        )
+        orders = Order.objects.bulk_create(
+            [Order(user=users[i % 20]) for i in range(400)]
+        )
+        Ticket.objects.bulk_create(
+            [
+                Ticket(order=order, flight=flights[i], row=1 + i % 10, seat=1)
+                for i, order in enumerate(orders)
+            ]
+        )
+        # Plan from real statistics rather than the planner's defaults
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_hot_queries_use_indexes(self):
+        for name, build in HOT_QUERIES.items():
+            with self.subTest(query=name):
+                plan = explain(build())
+                self.assertEqual(full_scans(plan), [], f"{name}:\n{plan}")
+                if name in ORDERED_QUERIES:
+                    self.assertFalse(sorts(plan), f"{name}:\n{plan}")
+
+    def test_detects_full_scan(self):
+        plan = explain(Airport.objects.filter(closest_big_city="Kyiv"))
+        self.assertEqual(full_scans(plan), [Airport._meta.db_table])
+
+    def test_detects_sort(self):
+        self.assertTrue(sorts(explain(Airport.objects.order_by("closest_big_city"))))
+        self.assertFalse(sorts(explain(Airport.objects.order_by("id"))))
+
+    def test_command_reports_clean_run(self):
+        out = StringIO()
+        call_command("explain_hot_queries", "--fail", stdout=out)
+        self.assertIn("0 hot query(ies) scan a table or sort", out.getvalue())
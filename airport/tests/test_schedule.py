@@ -0,0 +1,239 @@
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from airport.models import Flight, Route, Schedule, Order, Ticket
+from airport.scheduling import generate_flights
+from airport.tests.test_airport_api import (
+    sample_route,
+    sample_airplane,
+    sample_crew,
+    sample_flight,
+)
+
+
+def sample_schedule(days=14, **params):
+    today = timezone.localdate()
+    defaults = {
+        "route": sample_route(),
+        "airplane": sample_airplane(),
+        "days_of_week": "1234567",
+        "departure_time": time(10, 0),
+        "arrival_time": time(12, 30),
+        "valid_from": today + timedelta(days=1),
+        "valid_until": today + timedelta(days=days),
+    }
+    defaults.update(params)
+    return Schedule.objects.create(**defaults)
+
+
+class ScheduleGenerationTests(TestCase):
+
+    def test_generate_creates_flight_per_day_with_crew(self):
+        schedule = sample_schedule()
+        crew = [sample_crew(), sample_crew(first_name="Jane")]
+        schedule.crew.set(crew)
+
+        result = generate_flights(schedule)
+
+        self.assertEqual(result["created"], 14)
+        flights = Flight.objects.filter(schedule=schedule)
+        self.assertEqual(flights.count(), 14)
+        for flight in flights:
+            self.assertEqual(flight.crew.count(), 2)
+            self.assertEqual(
+                flight.arrival_time - flight.departure_time, timedelta(hours=2.5)
+            )
+
+    def test_same_route_and_airplane_on_different_dates(self):
+        schedule = sample_schedule(days=3)
+        generate_flights(schedule)
+        self.assertEqual(
+            Flight.objects.filter(
+                route=schedule.route, airplane=schedule.airplane
+            ).count(),
+            3,
+        )
+
+    def test_days_of_week_filter(self):
+        schedule = sample_schedule(days=14, days_of_week="15")
+        generate_flights(schedule)
+        weekdays = {
+            timezone.localdate(flight.departure_time).isoweekday()
+            for flight in Flight.objects.filter(schedule=schedule)
+        }
+        self.assertEqual(weekdays, {1, 5})
+        self.assertEqual(Flight.objects.filter(schedule=schedule).count(), 4)
+
+    def test_regenerate_is_incremental(self):
+        schedule = sample_schedule(days=7)
+        generate_flights(schedule)
+        ids_before = set(
+            Flight.objects.filter(schedule=schedule).values_list("id", flat=True)
+        )
+
+        result = generate_flights(schedule)
+        self.assertEqual(result, {"created": 0, "updated": 0, "deleted": 0})
+
+        schedule.departure_time = time(11, 0)
+        schedule.arrival_time = time(13, 0)
+        schedule.save()
+        result = generate_flights(schedule)
+        self.assertEqual(result["updated"], 7)
+        self.assertEqual(
+            set(Flight.objects.filter(schedule=schedule).values_list("id", flat=True)),
+            ids_before,
+        )
+
+    def test_shrinking_validity_keeps_sold_flights(self):
+        schedule = sample_schedule(days=7)
+        generate_flights(schedule)
+        sold = Flight.objects.filter(schedule=schedule).latest("departure_time")
+        user = get_user_model().objects.create_user("user@example.com", "testpass")
+        Ticket.objects.create(
+            row=1, seat=1, flight=sold, order=Order.objects.create(user=user)
+        )
+
+        schedule.valid_until = schedule.valid_from + timedelta(days=2)
+        schedule.save()
+        result = generate_flights(schedule)
+
+        self.assertEqual(result["deleted"], 3)
+        self.assertEqual(Flight.objects.filter(schedule=schedule).count(), 3)
+        sold.refresh_from_db()
+        self.assertIsNone(sold.schedule)
+
+    def test_overnight_arrival_rolls_to_next_day(self):
+        schedule = sample_schedule(
+            days=1, departure_time=time(23, 0), arrival_time=time(1, 0)
+        )
+        generate_flights(schedule)
+        flight = Flight.objects.get(schedule=schedule)
+        self.assertEqual(
+            flight.arrival_time - flight.departure_time, timedelta(hours=2)
+        )
+
+    def test_double_booking_rejected(self):
+        crew = sample_crew()
+        schedule = sample_schedule(days=3)
+        schedule.crew.set([crew])
+        departure = timezone.make_aware(
+            datetime.combine(schedule.valid_from + timedelta(days=1), time(11, 0))
+        )
+        manual = sample_flight(
+            route=schedule.route,
+            airplane=schedule.airplane,
+            departure_time=departure,
+            arrival_time=departure + timedelta(hours=1),
+        )
+
+        with self.assertRaises(ValidationError) as error:
+            generate_flights(schedule)
+
+        self.assertIn(str(manual.id), str(error.exception.detail["flights"]))
+        self.assertFalse(Flight.objects.filter(schedule=schedule).exists())
+
+        manual.airplane = sample_airplane(
+            name="Spare", airplane_type=schedule.airplane.airplane_type
+        )
+        manual.save()
+        manual.crew.set([crew])
+        with self.assertRaises(ValidationError) as error:
+            generate_flights(schedule)
+        self.assertIn("crew member", str(error.exception.detail["flights"]))
+
+    def test_same_departure_as_manual_flight_rejected(self):
+        schedule = sample_schedule(days=1)
+        departure = timezone.make_aware(
+            datetime.combine(schedule.valid_from, time(10, 0))
+        )
+        sample_flight(
+            route=schedule.route,
+            airplane=schedule.airplane,
+            departure_time=departure,
+            arrival_time=departure + timedelta(hours=2, minutes=30),
+        )
+
+        with self.assertRaises(ValidationError):
+            generate_flights(schedule)
+
+
+class ScheduleApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            "admin@example.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+
+    def test_create_schedule_generates_flights(self):
+        today = timezone.localdate()
+        payload = {
+            "route": sample_route().id,
+            "airplane": sample_airplane().id,
+            "days_of_week": "1234567",
+            "departure_time": "08:00",
+            "arrival_time": "09:00",
+            "valid_from": str(today + timedelta(days=1)),
+            "valid_until": str(today + timedelta(days=5)),
+            "crew": [sample_crew().id],
+        }
+        res = self.client.post(reverse("airport:schedule-list"), payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Flight.objects.filter(schedule_id=res.data["id"]).count(), 5)
+
+    def test_invalid_validity_range_rejected(self):
+        today = timezone.localdate()
+        payload = {
+            "route": sample_route().id,
+            "airplane": sample_airplane().id,
+            "days_of_week": "1",
+            "departure_time": "08:00",
+            "arrival_time": "09:00",
+            "valid_from": str(today + timedelta(days=5)),
+            "valid_until": str(today + timedelta(days=1)),
+        }
+        res = self.client.post(reverse("airport:schedule-list"), payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_clashing_schedule_rejected(self):
+        airplane = sample_airplane()
+        departure = timezone.make_aware(
+            datetime.combine(timezone.localdate() + timedelta(days=2), time(8, 30))
+        )
+        sample_flight(
+            airplane=airplane,
+            departure_time=departure,
+            arrival_time=departure + timedelta(hours=1),
+        )
+        today = timezone.localdate()
+        payload = {
+            "route": Route.objects.get().id,
+            "airplane": airplane.id,
+            "days_of_week": "1234567",
+            "departure_time": "08:00",
+            "arrival_time": "09:00",
+            "valid_from": str(today + timedelta(days=1)),
+            "valid_until": str(today + timedelta(days=5)),
+        }
+        res = self.client.post(reverse("airport:schedule-list"), payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("flights", res.data)
+        self.assertFalse(Schedule.objects.exists())
+
+    def test_schedule_requires_admin(self):
+        user = get_user_model().objects.create_user("user@example.com", "testpass")
+        self.client.force_authenticate(user)
+        res = self.client.get(reverse("airport:schedule-list"))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,102 @@
+import gzip
+import inspect
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport import schema
+from airport.batch import BatchCreateMixin, BatchRetrieveMixin
+from airport.fieldsets import SparseFieldsetMixin
+from airport.idempotency import IdempotentCreateMixin
+from airport.query_guards import QueryGuardMixin
+from airport.schema import generate_schema, render_schema, schema_file
+
+SCHEMA_URL = reverse("schema")
+
+
+class SchemaDriftTests(TestCase):
+
+    def test_stored_schema_matches_introspection(self):
+        with open(schema_file(), "rb") as file:
+            stored = json.loads(file.read())
+
+        live = json.loads(render_schema(generate_schema()))
+
+        self.assertEqual(
+            stored, live, "openapi.json is stale, run `manage.py build_schema`"
+        )
+
+    def test_operations_are_not_described_by_mixins(self):
+        mixins = (
+            BatchCreateMixin,
+            BatchRetrieveMixin,
+            IdempotentCreateMixin,
+            QueryGuardMixin,
+            SparseFieldsetMixin,
+        )
+        mixin_docs = {inspect.getdoc(mixin) for mixin in mixins}
+        live = json.loads(render_schema(generate_schema()))
+
+        for path, operations in live["paths"].items():
+            for method, operation in operations.items():
+                with self.subTest(path=path, method=method):
+                    self.assertNotIn(operation.get("description"), mixin_docs)
+
+
+class PrecomputedSchemaViewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        schema.reset()
+        self.addCleanup(schema.reset)
+        self.client = APIClient()
+
+    def test_serves_stored_file_without_introspection(self):
+        with mock.patch("airport.schema.generate_schema") as generate:
+            res = self.client.get(SCHEMA_URL, {"format": "json"})
+
+        generate.assert_not_called()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with open(schema_file(), "rb") as file:
+            self.assertEqual(res.content, file.read())
+        self.assertTrue(res["ETag"])
+
+    def test_yaml_stays_the_default_format(self):
+        res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res["Content-Type"], "application/vnd.oai.openapi")
+        self.assertTrue(res.content.startswith(b"openapi:"))
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get(SCHEMA_URL)["ETag"]
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+
+    def test_gzip_variant(self):
+        plain = self.client.get(SCHEMA_URL)
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertNotEqual(res["ETag"], plain["ETag"])
+        self.assertIn("Accept-Encoding", res["Vary"])
+
+    @override_settings(AIRPORT_SCHEMA_FILE=None)
+    def test_generates_once_without_file(self):
+        with mock.patch(
+            "airport.schema.generate_schema", wraps=generate_schema
+        ) as generate:
+            self.client.get(SCHEMA_URL)
+            res = self.client.get(SCHEMA_URL, {"format": "json"})
+
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
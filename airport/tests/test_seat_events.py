@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Order, SeatEvent, Ticket
+from airport.tests.test_airport_api import sample_flight
+
+
+@override_settings(
+    AIRPORT_SSE_MAX_DURATION=0, AIRPORT_SSE_POLL_INTERVAL=0, AIRPORT_SSE_LAG=0
+)
+class SeatEventStreamTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("user@example.com", "testpass")
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+        self.order = Order.objects.create(user=self.user)
+
+    def stream(self, **extra):
+        url = reverse("airport:flight-seats-stream", args=[self.flight.id])
+        res = self.client.get(url, HTTP_ACCEPT="text/event-stream", **extra)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        return b"".join(res.streaming_content).decode()
+
+    def test_ticket_changes_are_logged(self):
+        ticket = Ticket.objects.create(
+            row=1, seat=2, flight=self.flight, order=self.order
+        )
+        ticket.delete()
+        self.assertEqual(
+            list(SeatEvent.objects.order_by("id").values_list("kind", "row", "seat")),
+            [(SeatEvent.TAKEN, 1, 2), (SeatEvent.RELEASED, 1, 2)],
+        )
+
+    def test_stream_sends_events(self):
+        Ticket.objects.create(row=3, seat=4, flight=self.flight, order=self.order)
+        event = SeatEvent.objects.get()
+        body = self.stream()
+        self.assertIn(f"id: {event.id}\nevent: seat\n", body)
+        self.assertIn('"kind": "taken", "row": 3, "seat": 4', body)
+
+    def test_stream_resumes_after_last_event_id(self):
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=self.order)
+        Ticket.objects.create(row=1, seat=2, flight=self.flight, order=self.order)
+        first, second = SeatEvent.objects.order_by("id")
+        body = self.stream(HTTP_LAST_EVENT_ID=str(first.id))
+        self.assertNotIn(f"id: {first.id}\n", body)
+        self.assertIn(f"id: {second.id}\n", body)
+
+    @override_settings(AIRPORT_SSE_LAG=60)
+    def test_recent_events_held_back_in_id_order(self):
+        for seat in (1, 2, 3):
+            Ticket.objects.create(
+                row=1, seat=seat, flight=self.flight, order=self.order
+            )
+        first, second, third = SeatEvent.objects.order_by("id")
+        past = timezone.now() - timedelta(minutes=5)
+        # The second event committed late: the third must wait for it
+        SeatEvent.objects.filter(id__in=[first.id, third.id]).update(created_at=past)
+
+        body = self.stream()
+
+        self.assertIn(f"id: {first.id}\n", body)
+        self.assertNotIn(f"id: {second.id}\n", body)
+        self.assertNotIn(f"id: {third.id}\n", body)
+
+        SeatEvent.objects.filter(id=second.id).update(created_at=past)
+        body = self.stream(HTTP_LAST_EVENT_ID=str(first.id))
+        self.assertIn(f"id: {second.id}\n", body)
+        self.assertIn(f"id: {third.id}\n", body)
+
+    def test_other_flights_not_streamed(self):
+        other = sample_flight(route=self.flight.route)
+        Ticket.objects.create(row=1, seat=1, flight=other, order=self.order)
+        self.assertNotIn("event: seat", self.stream())
+
+    def test_deleting_flight_cascades_without_events(self):
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=self.order)
+        self.flight.delete()
+        self.assertFalse(SeatEvent.objects.exists())
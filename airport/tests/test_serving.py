@@ -0,0 +1,189 @@
+import http.client
+import os
+import signal
+import threading
+import time
+from wsgiref.util import setup_testing_defaults
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from airport.fastpath import _plans
+from airport.schema import _compiled
+from airport.serializers import AirportSerializer
+from airport.serving import PreforkServer, get_application, shared_cache, warm_up
+from airport.tests.test_airport_api import sample_airport
+
+
+def pid_app(environ, start_response):
+    if environ["PATH_INFO"] == "/slow":
+        time.sleep(3)
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [str(os.getpid()).encode()]
+
+
+def stream_app(environ, start_response):
+    if environ["PATH_INFO"] != "/stream":
+        return pid_app(environ, start_response)
+    start_response("200 OK", [("Content-Type", "text/event-stream")])
+
+    def events():
+        yield b"data: open\n\n"
+        time.sleep(3)
+
+    return events()
+
+
+class WarmUpTests(TestCase):
+
+    def test_builds_caches(self):
+        sample_airport()
+        _plans.clear()
+        _compiled.clear()
+
+        steps = list(warm_up())
+
+        self.assertEqual([error for _, _, error in steps], [None] * len(steps))
+        self.assertIn(AirportSerializer, _plans)
+        self.assertIn("json", _compiled)
+
+    def test_failing_step_is_reported(self):
+        def broken():
+            raise RuntimeError("boom")
+
+        with self.assertLogs("airport.serving", "ERROR"):
+            steps = list(warm_up([("broken", broken), ("fine", lambda: None)]))
+
+        self.assertEqual(
+            [(name, str(error) if error else None) for name, _, error in steps],
+            [("broken", "boom"), ("fine", None)],
+        )
+
+
+@override_settings(DEBUG=False)
+class StaticFilesTests(SimpleTestCase):
+
+    def get_status(self, app, path):
+        environ = {"PATH_INFO": path, "HTTP_HOST": "testserver"}
+        setup_testing_defaults(environ)
+        started = []
+        body = app(environ, lambda status, headers: started.append(status))
+        body.close()
+        return started[0]
+
+    def test_served_without_debug(self):
+        status = self.get_status(get_application(), "/static/admin/css/base.css")
+
+        self.assertEqual(status, "200 OK")
+
+    def test_left_to_proxy(self):
+        status = self.get_status(
+            get_application(static=False), "/static/admin/css/base.css"
+        )
+
+        self.assertEqual(status, "404 Not Found")
+
+
+class SharedCacheTests(SimpleTestCase):
+
+    def test_local_memory_cache_is_not_shared(self):
+        self.assertFalse(shared_cache())
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": "/tmp/airport-test-cache",
+            }
+        }
+    )
+    def test_out_of_process_cache_is_shared(self):
+        self.assertTrue(shared_cache())
+
+
+class PreforkServerTests(SimpleTestCase):
+
+    def get(self, port, path="/"):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        try:
+            connection.request("GET", path)
+            return int(connection.getresponse().read())
+        finally:
+            connection.close()
+
+    def test_workers_are_recycled(self):
+        server = PreforkServer(
+            pid_app, host="127.0.0.1", port=0, workers=2, max_requests=2
+        )
+        master = os.fork()
+        if master == 0:
+            try:
+                server.serve()
+            finally:
+                os._exit(0)
+        server.socket.close()
+        try:
+            pids = [self.get(server.address[1]) for _ in range(10)]
+        finally:
+            os.kill(master, signal.SIGTERM)
+            _, status = os.waitpid(master, 0)
+
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertNotIn(master, pids)
+        self.assertGreaterEqual(len(set(pids)), 5)
+        self.assertTrue(all(pids.count(pid) <= 2 for pid in pids))
+
+    def test_long_request_does_not_block_worker(self):
+        server = PreforkServer(pid_app, host="127.0.0.1", port=0, workers=1, threads=2)
+        master = os.fork()
+        if master == 0:
+            try:
+                server.serve()
+            finally:
+                os._exit(0)
+        server.socket.close()
+        port = server.address[1]
+        slow = threading.Thread(target=self.get, args=(port, "/slow"))
+        try:
+            slow.start()
+            time.sleep(0.5)
+            start = time.monotonic()
+            self.get(port)
+            elapsed = time.monotonic() - start
+        finally:
+            slow.join()
+            os.kill(master, signal.SIGTERM)
+            os.waitpid(master, 0)
+
+        self.assertLess(elapsed, 2)
+
+    def test_event_streams_have_their_own_slots(self):
+        server = PreforkServer(
+            stream_app, host="127.0.0.1", port=0, workers=1, threads=1, streams=1
+        )
+        master = os.fork()
+        if master == 0:
+            try:
+                server.serve()
+            finally:
+                os._exit(0)
+        server.socket.close()
+        port = server.address[1]
+        first = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        second = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        try:
+            first.request("GET", "/stream")
+            self.assertEqual(first.getresponse().status, 200)
+            start = time.monotonic()
+            self.get(port)
+            elapsed = time.monotonic() - start
+            second.request("GET", "/stream")
+            rejected = second.getresponse()
+        finally:
+            first.close()
+            second.close()
+            os.kill(master, signal.SIGTERM)
+            os.waitpid(master, 0)
+
+        self.assertLess(elapsed, 2)
+        self.assertEqual(rejected.status, 503)
+        self.assertEqual(rejected.getheader("Retry-After"), "5")
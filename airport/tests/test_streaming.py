@@ -0,0 +1,119 @@
+import gzip
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from airport.tests.test_airport_api import (
+    sample_airport,
+    sample_crew,
+    sample_flight,
+    sample_order,
+)
+from airport.streaming import iter_json_array
+
+
+@override_settings(AIRPORT_STREAM_CHUNK_SIZE=2)
+class StreamingListTests(TestCase):
+
+    def setUp(self):
+        # Requests in these tests would otherwise hit the user throttle
+        cache.clear()
+        self.client = APIClient()
+        # Only staff may stream the whole flight list
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        first = sample_flight(crew_list=[sample_crew(), sample_crew(first_name="Ann")])
+        for day in range(2, 6):
+            sample_flight(
+                route=first.route,
+                airplane=first.airplane,
+                departure_time=timezone.now() + timedelta(days=day),
+            )
+        sample_order(
+            self.user,
+            tickets=[
+                {"row": 1, "seat": 1, "flight": first},
+                {"row": 1, "seat": 2, "flight": first},
+            ],
+        )
+        sample_airport(name="Line Separator")
+
+    def assert_streams_same_body(self, url):
+        expected = self.client.get(url).content
+        res = self.client.get(url, {"stream": "true"})
+        self.assertTrue(res.streaming)
+        self.assertEqual(b"".join(res.streaming_content), expected)
+
+    def test_flight_list(self):
+        self.assert_streams_same_body(reverse("airport:flight-list"))
+
+    def test_flight_list_fast_path(self):
+        url = reverse("airport:flight-list")
+        expected = self.client.get(url).content
+        with override_settings(AIRPORT_FAST_LIST=True):
+            res = self.client.get(url, {"stream": "true"})
+            self.assertEqual(b"".join(res.streaming_content), expected)
+
+    def test_order_list(self):
+        self.assert_streams_same_body(reverse("airport:order-list"))
+
+    def test_reference_lists(self):
+        for name in ("airport", "route", "airplanetype", "airplane", "crew"):
+            self.assert_streams_same_body(reverse(f"airport:{name}-list"))
+
+    def test_gzip(self):
+        url = reverse("airport:flight-list")
+        expected = self.client.get(url).content
+        res = self.client.get(url, {"stream": "true"}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(b"".join(res.streaming_content)), expected)
+
+    def test_gzip_follows_quality_values(self):
+        url = reverse("airport:flight-list")
+        for accept_encoding, compressed in (
+            ("gzip;q=0, identity", False),
+            ("br, gzip;q=0.5", True),
+            ("*;q=0.1", True),
+            ("gzip;q=0, *", False),
+            ("identity", False),
+        ):
+            res = self.client.get(
+                url, {"stream": "true"}, HTTP_ACCEPT_ENCODING=accept_encoding
+            )
+            self.assertEqual(
+                res.get("Content-Encoding") == "gzip", compressed, accept_encoding
+            )
+
+    def test_crew_prefetched_per_chunk(self):
+        url = reverse("airport:flight-list")
+        with CaptureQueriesContext(connection) as queries:
+            b"".join(self.client.get(url, {"stream": "true"}).streaming_content)
+
+        crew_queries = [
+            query for query in queries if 'FROM "airport_crew"' in query["sql"]
+        ]
+        # Five flights in chunks of two
+        self.assertEqual(len(crew_queries), 3)
+
+
+class IterJsonArrayTests(TestCase):
+
+    def test_empty(self):
+        self.assertEqual(b"".join(iter_json_array([])), b"[]")
+        self.assertEqual(b"".join(iter_json_array([[], []])), b"[]")
+
+    def test_chunks_joined(self):
+        chunks = [[{"a": 1}], [], [{"a": 2}, {"a": 3}]]
+        self.assertEqual(
+            b"".join(iter_json_array(chunks)), b'[{"a":1},{"a":2},{"a":3}]'
+        )
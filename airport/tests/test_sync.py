@@ -0,0 +1,174 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airport, Flight, Tombstone
+from airport.scheduling import generate_flights
+from airport.tests.test_airport_api import sample_airport, sample_crew, sample_flight
+from airport.tests.test_schedule import sample_schedule
+
+SYNC_URL = reverse("airport:sync-list")
+
+
+@override_settings(AIRPORT_SYNC_LAG=0)
+class SyncTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("user@example.com", "pass")
+        self.client.force_authenticate(self.user)
+        self.crew = sample_crew()
+        self.flight = sample_flight(crew_list=[self.crew])
+
+    def sync(self, cursor=None, **params):
+        if cursor:
+            params["cursor"] = cursor
+        res = self.client.get(SYNC_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def ids(self, data, kind):
+        return [row["id"] for row in data["changed"][kind]]
+
+    def test_requires_authentication(self):
+        res = APIClient().get(SYNC_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_first_sync_sends_everything(self):
+        data = self.sync()
+
+        self.assertTrue(data["reset"])
+        self.assertFalse(data["has_more"])
+        self.assertEqual(self.ids(data, "flights"), [self.flight.id])
+        self.assertEqual(self.ids(data, "crew"), [self.crew.id])
+        self.assertEqual(len(data["changed"]["airports"]), 2)
+        self.assertEqual(data["changed"]["flights"][0]["crew"], [self.crew.id])
+
+    def test_only_changes_after_cursor(self):
+        cursor = self.sync()["cursor"]
+        idle = self.sync(cursor)
+
+        airport = sample_airport(name="Boryspil")
+        self.flight.departure_time += timedelta(hours=1)
+        self.flight.save()
+        data = self.sync(idle["cursor"])
+
+        self.assertFalse(idle["reset"])
+        self.assertTrue(all(rows == [] for rows in idle["changed"].values()))
+        self.assertFalse(data["reset"])
+        self.assertEqual(self.ids(data, "airports"), [airport.id])
+        self.assertEqual(self.ids(data, "flights"), [self.flight.id])
+        self.assertEqual(data["changed"]["routes"], [])
+
+    def test_deletions_sent_as_ids(self):
+        cursor = self.sync()["cursor"]
+        airport = Airport.objects.create(name="Lviv", closest_big_city="Lviv")
+        airport_id = airport.id
+        airport.delete()
+        flight_id = self.flight.id
+        self.flight.delete()
+
+        data = self.sync(cursor)
+
+        self.assertEqual(data["deleted"]["airports"], [airport_id])
+        self.assertEqual(data["deleted"]["flights"], [flight_id])
+        self.assertEqual(self.sync(data["cursor"])["deleted"]["flights"], [])
+
+    def test_crew_changes_mark_flight(self):
+        other = sample_crew(first_name="Olena")
+        for change in (
+            lambda: self.flight.crew.add(other),
+            lambda: other.flight_set.remove(self.flight),
+            lambda: self.crew.flight_set.clear(),
+            lambda: Flight.objects.get(id=self.flight.id).crew.set([other]),
+            lambda: other.delete(),
+        ):
+            cursor = self.sync()["cursor"]
+            change()
+            data = self.sync(cursor)
+            self.assertEqual(self.ids(data, "flights"), [self.flight.id])
+
+    def test_paged_by_limit(self):
+        sample_flight(departure_time=self.flight.departure_time + timedelta(days=1))
+        full = self.sync()
+        pages = [self.sync(limit=1)]
+        while pages[-1]["has_more"]:
+            pages.append(self.sync(pages[-1]["cursor"], limit=1))
+
+        self.assertGreater(len(pages), 2)
+        for kind, rows in full["changed"].items():
+            self.assertEqual(
+                [row["id"] for page in pages for row in page["changed"][kind]],
+                [row["id"] for row in rows],
+            )
+        self.assertTrue(all(len(page["changed"]["flights"]) <= 1 for page in pages))
+
+    @override_settings(AIRPORT_SYNC_LAG=60)
+    def test_recent_writes_held_back(self):
+        data = self.sync()
+
+        self.assertEqual(data["changed"]["flights"], [])
+        with mock.patch(
+            "django.utils.timezone.now",
+            return_value=timezone.now() + timedelta(minutes=2),
+        ):
+            later = self.sync(data["cursor"])
+        self.assertEqual(self.ids(later, "flights"), [self.flight.id])
+
+    @override_settings(AIRPORT_SYNC_TOMBSTONE_TTL=60)
+    def test_expired_cursor_resets(self):
+        cursor = self.sync()["cursor"]
+
+        with mock.patch(
+            "django.utils.timezone.now",
+            return_value=timezone.now() + timedelta(minutes=2),
+        ):
+            data = self.sync(cursor)
+
+        self.assertTrue(data["reset"])
+        self.assertEqual(self.ids(data, "flights"), [self.flight.id])
+
+    def test_invalid_cursor_rejected(self):
+        for params in ({"cursor": "not-a-cursor"}, {"limit": "all"}):
+            res = self.client.get(SYNC_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_schedule_crew_change_marks_flights(self):
+        schedule = sample_schedule(days=2, route=self.flight.route)
+        generate_flights(schedule)
+        cursor = self.sync()["cursor"]
+
+        schedule.crew.add(sample_crew(first_name="Olena"))
+        generate_flights(schedule)
+        data = self.sync(cursor)
+
+        self.assertCountEqual(
+            self.ids(data, "flights"),
+            Flight.objects.filter(schedule=schedule).values_list("id", flat=True),
+        )
+
+    def test_purge_command(self):
+        Tombstone.objects.create(
+            kind="flights", object_id=1, deleted_at=timezone.now() - timedelta(days=60)
+        )
+        Tombstone.objects.create(kind="flights", object_id=2)
+        out = StringIO()
+
+        call_command("purge_sync_tombstones", stdout=out)
+
+        self.assertEqual(
+            list(Tombstone.objects.values_list("object_id", flat=True)), [2]
+        )
+        self.assertIn("Deleted 1", out.getvalue())
@@ -0,0 +1,172 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import LiveServerTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from airport.traffic import REDACTED, read_records, sanitize, write_record
+from airport.tests.test_airport_api import sample_flight
+
+FLIGHT_URL = reverse("airport:flight-list")
+AIRPORT_URL = reverse("airport:airport-list")
+
+
+class TrafficLogMixin:
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        handle, self.log = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+        self.addCleanup(os.remove, self.log)
+
+
+class TrafficCaptureTests(TrafficLogMixin, TestCase):
+
+    def test_sanitize(self):
+        self.assertEqual(
+            sanitize({"name": "Boryspil", "password": "x", "items": [{"token": "t"}]}),
+            {"name": "Boryspil", "password": REDACTED, "items": [{"token": REDACTED}]},
+        )
+
+    def test_sanitize_personal_data(self):
+        body = {
+            "email": "a@b.c",
+            "first_name": "Olena",
+            "last_name": "Koval",
+            "phone_number": "+380",
+            "closest_big_city": "Kyiv",
+        }
+        self.assertEqual(
+            sanitize(body),
+            {
+                "email": REDACTED,
+                "first_name": REDACTED,
+                "last_name": REDACTED,
+                "phone_number": REDACTED,
+                "closest_big_city": "Kyiv",
+            },
+        )
+
+    def test_api_requests_captured(self):
+        staff = get_user_model().objects.create_user(
+            "admin@example.com", "testpass", is_staff=True
+        )
+        client = APIClient()
+        client.force_authenticate(staff)
+        with override_settings(
+            AIRPORT_TRAFFIC_CAPTURE_FILE=self.log, AIRPORT_TRAFFIC_SAMPLE_RATE=1
+        ):
+            client.get(FLIGHT_URL, {"route_id": "1"})
+            client.post(
+                AIRPORT_URL,
+                {"name": "Boryspil", "closest_big_city": "Kyiv", "token": "t"},
+                format="json",
+            )
+            client.get("/admin/login/")
+
+        listed, created = read_records(self.log)
+        self.assertEqual(listed["endpoint"], "airport:flight-list")
+        self.assertEqual(listed["query"], {"route_id": ["1"]})
+        self.assertEqual(listed["role"], "staff")
+        self.assertEqual(listed["status"], 200)
+        self.assertIsNone(listed["body"])
+        self.assertGreater(listed["duration_ms"], 0)
+        self.assertEqual(created["method"], "POST")
+        self.assertEqual(created["status"], 201)
+        self.assertEqual(created["body"]["name"], "Boryspil")
+        self.assertEqual(created["body"]["token"], REDACTED)
+
+    def test_unsampled_requests_not_captured(self):
+        with override_settings(
+            AIRPORT_TRAFFIC_CAPTURE_FILE=self.log, AIRPORT_TRAFFIC_SAMPLE_RATE=0
+        ):
+            APIClient().get(FLIGHT_URL)
+
+        self.assertEqual(read_records(self.log), [])
+
+
+class ReplayTrafficTests(TrafficLogMixin, LiveServerTestCase):
+
+    def record(self, ts, role, status, **fields):
+        write_record(
+            {
+                "ts": ts,
+                "method": "GET",
+                "path": FLIGHT_URL,
+                "query": {},
+                "content_type": None,
+                "body": None,
+                "endpoint": "airport:flight-list",
+                "role": role,
+                "status": status,
+                "duration_ms": 1.0,
+                **fields,
+            },
+            self.log,
+        )
+
+    def test_replay_reports_per_endpoint(self):
+        sample_flight()
+        user = get_user_model().objects.create_user("user@example.com", "pass")
+        token = Token.objects.create(user=user)
+        self.record(100.0, "user", 200)
+        self.record(100.2, "anonymous", 401)
+        self.record(
+            100.1,
+            "user",
+            200,
+            path="/api/airport/missing/",
+            endpoint="/api/airport/missing/",
+        )
+        with open(self.log, "a") as log:
+            log.write('{"torn')
+
+        out = StringIO()
+        call_command(
+            "replay_traffic",
+            self.log,
+            base_url=self.live_server_url,
+            speed=4,
+            user_token=token.key,
+            stdout=out,
+        )
+
+        lines = {line.split()[0]: line.split() for line in out.getvalue().splitlines()}
+        # count, p50, p95, p99, error rate, changed status
+        self.assertEqual(lines["airport:flight-list"][1], "2")
+        self.assertEqual(lines["airport:flight-list"][5:], ["0.0%", "0"])
+        self.assertEqual(lines["/api/airport/missing/"][5:], ["0.0%", "1"])
+        self.assertIn("3 request(s)", out.getvalue())
+
+    def test_read_only_skips_writes(self):
+        self.record(1.0, "staff", 201, method="POST", body={"name": "x"})
+
+        with self.assertRaisesMessage(CommandError, "nothing to replay"):
+            call_command(
+                "replay_traffic",
+                self.log,
+                base_url=self.live_server_url,
+                read_only=True,
+                stdout=StringIO(),
+            )
+
+    def test_captured_log_replays(self):
+        with override_settings(
+            AIRPORT_TRAFFIC_CAPTURE_FILE=self.log, AIRPORT_TRAFFIC_SAMPLE_RATE=1
+        ):
+            APIClient().get(FLIGHT_URL)
+        self.assertEqual(read_records(self.log)[0]["role"], "anonymous")
+
+        out = StringIO()
+        call_command(
+            "replay_traffic", self.log, base_url=self.live_server_url, stdout=out
+        )
+        self.assertIn("error rate 0.0%", out.getvalue())
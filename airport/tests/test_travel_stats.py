@@ -0,0 +1,145 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.archive import archive_batch
+from airport.holds import checkout
+from airport.models import Order, SeatHold, TravelStats
+from airport.order_queue import process_batch
+from airport.tests.test_airport_api import (
+    sample_airport,
+    sample_flight,
+    sample_order,
+    sample_route,
+)
+
+STATS_URL = reverse("user:travel-stats")
+ORDER_URL = reverse("airport:order-list")
+
+
+class TravelStatsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@example.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.kyiv = sample_airport(name="Boryspil", closest_big_city="Kyiv")
+        self.lviv = sample_airport(name="Lviv", closest_big_city="Lviv")
+        self.warsaw = sample_airport(name="Chopin", closest_big_city="Warsaw")
+        self.to_lviv = sample_flight(
+            route=sample_route(self.kyiv, self.lviv, distance=470)
+        )
+        self.to_warsaw = sample_flight(
+            route=sample_route(self.kyiv, self.warsaw, distance=690)
+        )
+
+    def order(self, *tickets, **kwargs):
+        return self.client.post(
+            ORDER_URL,
+            {
+                "tickets": [
+                    {"flight": flight.id, "row": row, "seat": seat}
+                    for flight, row, seat in tickets
+                ]
+            },
+            format="json",
+            **kwargs,
+        )
+
+    def stats(self, days_later=3):
+        """Stats as read after the sample flights (tomorrow) departed."""
+        later = timezone.now() + timedelta(days=days_later)
+        with mock.patch("django.utils.timezone.now", return_value=later):
+            return self.client.get(STATS_URL).data
+
+    def test_requires_authentication(self):
+        res = APIClient().get(STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_first_read_computes_existing_history(self):
+        sample_order(self.user, [{"flight": self.to_lviv, "row": 1, "seat": 1}])
+
+        data = self.stats()
+
+        self.assertEqual(data["flights_taken"], 1)
+        self.assertEqual(data["distance"], 470)
+        self.assertTrue(TravelStats.objects.filter(user=self.user).exists())
+
+    def test_orders_update_stats_incrementally(self):
+        self.stats()
+
+        self.order((self.to_lviv, 1, 1), (self.to_lviv, 1, 2))
+        self.order((self.to_warsaw, 1, 1), (self.to_lviv, 2, 1))
+
+        data = self.stats()
+        self.assertEqual(data["flights_taken"], 2)
+        self.assertEqual(data["distance"], 470 + 690)
+        self.assertEqual(
+            [(airport["name"], airport["visits"]) for airport in data["top_airports"]],
+            [("Boryspil", 2), ("Lviv", 1), ("Chopin", 1)],
+        )
+
+    def test_queued_and_checked_out_orders_are_counted(self):
+        self.stats()
+        self.order((self.to_lviv, 1, 1), HTTP_PREFER="respond-async")
+        process_batch()
+        SeatHold.objects.create(
+            flight=self.to_warsaw,
+            row=3,
+            seat=3,
+            user=self.user,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        checkout(self.user)
+
+        self.assertEqual(self.stats()["flights_taken"], 2)
+
+    def test_booked_flights_count_once_departed(self):
+        self.order((self.to_lviv, 1, 1))
+
+        self.assertEqual(self.stats(days_later=0)["flights_taken"], 0)
+        self.assertEqual(self.stats()["flights_taken"], 1)
+        self.assertEqual(self.stats()["distance"], 470)
+
+    def test_deleted_orders_and_flights_are_subtracted(self):
+        first = self.order((self.to_lviv, 1, 1)).data["id"]
+        self.order((self.to_warsaw, 1, 1))
+        self.assertEqual(self.stats()["flights_taken"], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.get(id=first).delete()
+        self.assertEqual(self.stats()["distance"], 690)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.to_warsaw.delete()
+        data = self.stats()
+        self.assertEqual(data["flights_taken"], 0)
+        self.assertEqual(data["top_airports"], [])
+
+    def test_recompute_command_rebuilds_rows(self):
+        self.order((self.to_lviv, 1, 1))
+        TravelStats.objects.update(flights_taken=99, distance=0, airport_visits={})
+        archive_batch(timezone.now() + timedelta(days=2))
+        out = StringIO()
+
+        call_command(
+            "recompute_travel_stats", "--workers", "1", "--chunk-size", "1", stdout=out
+        )
+
+        self.assertIn("Recomputed stats for 1 user(s)", out.getvalue())
+        data = self.stats()
+        self.assertEqual(data["flights_taken"], 1)
+        self.assertEqual(data["distance"], 470)
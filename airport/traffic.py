@@ -0,0 +1,143 @@
+import json
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+CAPTURED_PREFIXES = ("/api/",)
+CAPTURED_CONTENT_TYPES = ("application/json", "application/x-www-form-urlencoded")
+REDACTED = "[redacted]"
+# Credentials and personal data: contact details, names, identity
+# documents and dates of birth
+SENSITIVE_KEY = re.compile(
+    r"password|token|secret|^refresh$|^access$|authorization|card|cvv|api_?key"
+    r"|e_?mail|phone|^(first|last|full|middle)_?name$|^username$|address"
+    r"|passport|birth",
+    re.IGNORECASE,
+)
+
+# Writes from concurrent threads of one process must not interleave;
+# processes append whole lines with O_APPEND
+_write_lock = threading.Lock()
+
+
+def sanitize(value):
+    """Copy of a decoded body or query with credentials and PII replaced."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if SENSITIVE_KEY.search(str(key)) else sanitize(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [sanitize(item) for item in value]
+    return value
+
+
+def request_body(request):
+    """
+    The decoded body of a JSON or form request, or None when it is empty,
+    too big or of another type (uploads, binary formats).
+    """
+    content_type = request.content_type or ""
+    if content_type not in CAPTURED_CONTENT_TYPES:
+        return None
+    length = int(request.META.get("CONTENT_LENGTH") or 0)
+    if not length or length > getattr(settings, "AIRPORT_TRAFFIC_MAX_BODY", 65536):
+        return None
+    # Reading .body keeps a copy, so the view can still parse the stream
+    raw = request.body
+    if content_type == "application/json":
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+    return {key: request.POST.getlist(key) for key in request.POST}
+
+
+def auth_role(request):
+    """anonymous, user or staff, as authenticated by the view (DRF sets it)."""
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return "anonymous"
+    return "staff" if user.is_staff else "user"
+
+
+def endpoint_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is not None and match.view_name:
+        return match.view_name
+    return request.path
+
+
+def write_record(record, path=None):
+    line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+    path = path or settings.AIRPORT_TRAFFIC_CAPTURE_FILE
+    with _write_lock, open(path, "a", encoding="utf-8") as log:
+        log.write(line)
+
+
+def read_records(path):
+    """Captured records of a JSONL log, oldest first, skipping torn lines."""
+    records = []
+    with open(path, encoding="utf-8") as log:
+        for line in log:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    records.sort(key=lambda record: record["ts"])
+    return records
+
+
+class TrafficCaptureMiddleware:
+    """
+    Sample API requests into a JSONL log for replay_traffic.
+
+    With AIRPORT_TRAFFIC_CAPTURE_FILE set, a fraction
+    AIRPORT_TRAFFIC_SAMPLE_RATE of requests under /api/ is written as one
+    line each: time, method, path, query, the JSON or form body with
+    passwords, tokens, e-mail addresses, names and similar fields
+    redacted, the endpoint name, the
+    authenticated role (never the user), the status and the time spent
+    producing the response. Without the setting the middleware is not
+    loaded at all.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "AIRPORT_TRAFFIC_CAPTURE_FILE", None):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.rate = getattr(settings, "AIRPORT_TRAFFIC_SAMPLE_RATE", 0.01)
+
+    def __call__(self, request):
+        if not request.path.startswith(CAPTURED_PREFIXES) or (
+            random.random() >= self.rate
+        ):
+            return self.get_response(request)
+
+        captured_at = time.time()
+        body = request_body(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        write_record(
+            {
+                "ts": round(captured_at, 6),
+                "method": request.method,
+                "path": request.path,
+                "query": sanitize(
+                    {key: request.GET.getlist(key) for key in request.GET}
+                ),
+                "content_type": request.content_type if body is not None else None,
+                "body": sanitize(body),
+                "endpoint": endpoint_name(request),
+                "role": auth_role(request),
+                "status": response.status_code,
+                "duration_ms": round(duration * 1000, 3),
+            }
+        )
+        return response
@@ -0,0 +1,223 @@
+import threading
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from airport.models import Airport, ArchivedTicket, Order, Ticket, TravelStats
+
+TOP_AIRPORTS = 3
+
+TRIP_COLUMNS = (
+    "order__user_id",
+    "flight_id",
+    "flight__route__source_id",
+    "flight__route__destination_id",
+    "flight__route__distance",
+)
+
+
+def _trips(tickets):
+    """Distinct (user, flight, source, destination, distance) rows."""
+    return set(tickets.values_list(*TRIP_COLUMNS).distinct())
+
+
+def _totals(trips):
+    totals = defaultdict(lambda: [set(), 0, Counter()])
+    for user_id, flight_id, source_id, destination_id, distance in trips:
+        flights, _, visits = total = totals[user_id]
+        if flight_id in flights:
+            continue
+        flights.add(flight_id)
+        total[1] += distance
+        visits[str(source_id)] += 1
+        visits[str(destination_id)] += 1
+    return totals
+
+
+def compute(user_ids, now=None):
+    """
+    Full stats for user_ids from live and archived tickets. Only flights
+    departed by ``now`` count; the first upcoming departure is kept so the
+    row can be refreshed once it has passed.
+    """
+    now = now or timezone.now()
+    live = Ticket.objects.filter(order__user_id__in=user_ids)
+    trips = _trips(live.filter(flight__departure_time__lte=now)) | _trips(
+        ArchivedTicket.objects.filter(order__user_id__in=user_ids)
+    )
+    totals = _totals(trips)
+    upcoming = dict(
+        live.filter(flight__departure_time__gt=now)
+        .values("order__user_id")
+        .annotate(first=Min("flight__departure_time"))
+        .values_list("order__user_id", "first")
+    )
+    return [
+        TravelStats(
+            user_id=user_id,
+            flights_taken=len(totals[user_id][0]),
+            distance=totals[user_id][1],
+            airport_visits=dict(totals[user_id][2]),
+            next_departure=upcoming.get(user_id),
+        )
+        for user_id in user_ids
+    ]
+
+
+def save(stats):
+    TravelStats.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=("user",),
+        update_fields=(
+            "flights_taken",
+            "distance",
+            "airport_visits",
+            "next_departure",
+            "updated_at",
+        ),
+    )
+
+
+def _lock(user_ids):
+    """
+    Lock the stats rows of user_ids, inserting empty ones first. A
+    concurrent transaction inserting the same row blocks here until it
+    commits, so two first orders of a user are computed one after the
+    other instead of the last write silently winning.
+    """
+    TravelStats.objects.bulk_create(
+        [TravelStats(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    return TravelStats.objects.select_for_update().in_bulk(
+        list(user_ids), field_name="user_id"
+    )
+
+
+def refresh(user_ids):
+    """Recompute the stats rows of user_ids from scratch."""
+    user_ids = list(
+        get_user_model().objects.filter(id__in=user_ids).values_list("id", flat=True)
+    )
+    if not user_ids:
+        return
+    with transaction.atomic():
+        _lock(user_ids)
+        save(compute(user_ids))
+
+
+def record_orders(orders):
+    """
+    Note newly created orders in their users' stats rows.
+
+    Must run in the transaction that created the orders. Flights count
+    once they have departed, so booking one only moves the row's
+    ``next_departure``; get_stats recomputes the row when that passes.
+    Users without a row yet, or booking a flight that already departed,
+    are recomputed in full after their row is locked.
+    """
+    orders = list(orders)
+    if not orders:
+        return
+    now = timezone.now()
+    user_ids = {order.user_id for order in orders}
+    departures = defaultdict(list)
+    for user_id, departure in Ticket.objects.filter(
+        order_id__in=[order.id for order in orders]
+    ).values_list("order__user_id", "flight__departure_time"):
+        departures[user_id].append(departure)
+
+    with transaction.atomic():
+        known = set(
+            TravelStats.objects.filter(user_id__in=user_ids).values_list(
+                "user_id", flat=True
+            )
+        )
+        rows = _lock(user_ids)
+        stale = [
+            user_id
+            for user_id in user_ids
+            if user_id not in known
+            or any(departure <= now for departure in departures[user_id])
+        ]
+        if stale:
+            save(compute(stale, now))
+
+        # One UPDATE for the whole batch, whether or not a row moves
+        booked = []
+        for user_id, stats in rows.items():
+            if user_id in stale or not departures[user_id]:
+                continue
+            first = min(departures[user_id])
+            if stats.next_departure is None or first < stats.next_departure:
+                stats.next_departure = first
+            booked.append(stats)
+        TravelStats.objects.bulk_update(booked, ("next_departure",))
+
+
+_pending = threading.local()
+
+
+def _refresh_on_commit(user_ids=(), order_ids=()):
+    """
+    Queue users (or the owners of orders) for a refresh after commit.
+    Deleting a flight or order fires this once per ticket; every callback
+    but the first finds the queue already drained.
+    """
+    if not hasattr(_pending, "user_ids"):
+        _pending.user_ids, _pending.order_ids = set(), set()
+    _pending.user_ids.update(user_ids)
+    _pending.order_ids.update(order_ids)
+    transaction.on_commit(_refresh_pending)
+
+
+def _refresh_pending():
+    user_ids = getattr(_pending, "user_ids", set())
+    order_ids = getattr(_pending, "order_ids", set())
+    _pending.user_ids, _pending.order_ids = set(), set()
+    if order_ids:
+        user_ids |= set(
+            Order.objects.filter(id__in=order_ids).values_list("user_id", flat=True)
+        )
+    if user_ids:
+        refresh(user_ids)
+
+
+def ticket_deleted(sender, instance, **kwargs):
+    _refresh_on_commit(order_ids=[instance.order_id])
+
+
+def order_deleted(sender, instance, **kwargs):
+    # Its tickets are deleted with it, after which the order is unknown
+    _refresh_on_commit(user_ids=[instance.user_id])
+
+
+def get_stats(user):
+    """
+    The user's stats row, computed on first access and again once a
+    booked flight has departed since the last computation.
+    """
+    stats = TravelStats.objects.filter(user=user).first()
+    if stats is None or (
+        stats.next_departure is not None and stats.next_departure <= timezone.now()
+    ):
+        refresh([user.id])
+        stats = TravelStats.objects.get(user=user)
+    return stats
+
+
+def top_airports(stats, limit=TOP_AIRPORTS):
+    """The user's most visited airports, each with a ``visits`` count."""
+    ranked = Counter(stats.airport_visits).most_common(limit)
+    airports = Airport.objects.in_bulk([int(airport_id) for airport_id, _ in ranked])
+    result = []
+    for airport_id, visits in ranked:
+        airport = airports.get(int(airport_id))
+        if airport is not None:
+            airport.visits = visits
+            result.append(airport)
+    return result
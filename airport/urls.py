@@ -10,7 +10,12 @@ router.register("airplane_types", views.AirplaneTypeViewSet)
 router.register("airplanes", views.AirplaneViewSet)
 router.register("crews", views.CrewViewSet)
 router.register("flights", views.FlightViewSet)
+router.register("schedules", views.ScheduleViewSet)
 router.register("orders", views.OrderViewSet)
+router.register("order_requests", views.OrderRequestViewSet)
+router.register("seat_holds", views.SeatHoldViewSet)
+router.register("request_profiles", views.RequestProfileViewSet)
+router.register("sync", views.SyncViewSet, basename="sync")
 
 urlpatterns = [path("", include(router.urls))]
 
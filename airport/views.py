@@ -1,16 +1,60 @@
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Count, F
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.timezone import now
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import mixins, status
+from rest_framework import mixins, serializers, status
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAdminUser
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.utils import timezone
-from rest_framework.viewsets import GenericViewSet, ModelViewSet
+from rest_framework.viewsets import (
+    GenericViewSet,
+    ModelViewSet,
+    ReadOnlyModelViewSet,
+    ViewSet,
+)
 
-from airport.models import Airport, Route, AirplaneType, Airplane, Crew, Flight, Order
+from airport.autocomplete import get_index
+from airport.batch import BatchCreateMixin, BatchRetrieveMixin
+from airport.boarding_passes import BoardingPassMixin
+from airport.coalescing import CoalescedListMixin, flight_lists
+from airport.conflicts import indexes_covering
+from airport.fastpath import FastListMixin
+from airport.fieldsets import Expand, Shape, SparseFieldsetMixin, is_sparse_request
+from airport.geo import get_tree
+from airport.holds import checkout as checkout_holds
+from airport.idempotency import IdempotentCreateMixin
+from airport.order_queue import OrderRequestSerializer, QueuedCreateMixin
+from airport.models import (
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Crew,
+    Flight,
+    Order,
+    OrderRequest,
+    RequestProfile,
+    Schedule,
+    SeatHold,
+)
 from airport.permissions import IsAdminOrIfAuthenticatedReadOnly
+from airport.query_guards import QueryGuardMixin, get_int_param
+from airport.scheduling import generate_flights
+from airport.seat_events import (
+    EventStreamRenderer,
+    LAST_EVENT_ID_HEADER,
+    event_stream,
+)
+from airport.streaming import StreamingListMixin
+from airport.sync import changes_since
 from airport.serializers import (
     AirportSerializer,
     RouteSerializer,
@@ -24,26 +68,162 @@ from airport.serializers import (
     FlightDetailSerializer,
     AirplaneDetailSerializer,
     AirplaneImageSerializer,
+    ScheduleSerializer,
+    SeatHoldCheckoutSerializer,
+    SeatHoldSerializer,
+    RequestProfileSerializer,
 )
 
 
-class AirportViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, GenericViewSet):
+AUTOCOMPLETE_MAX_LIMIT = 50
+# Seats still free on a flight; joins the airplane and its tickets
+TICKETS_AVAILABLE = F("airplane__rows") * F("airplane__seats_in_row") - Count("tickets")
+NEAREST_MAX_LIMIT = 100
+
+
+class AirportViewSet(
+    BatchCreateMixin,
+    SparseFieldsetMixin,
+    StreamingListMixin,
+    FastListMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
+):
+    """Airports served by the service."""
+
     queryset = Airport.objects.all()
     serializer_class = AirportSerializer
     authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="Prefix of an airport name or city; typos are "
+                "tolerated. Example: ?q=bory",
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description=f"Maximum matches, at most {AUTOCOMPLETE_MAX_LIMIT}.",
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False, url_path="autocomplete")
+    def autocomplete(self, request):
+        """Ranked airports matching ?q= from the in-memory index."""
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT))
+        matches = get_index().search(request.query_params.get("q", ""), limit)
+        return Response(
+            [
+                {"id": airport_id, "name": name, "closest_big_city": city}
+                for airport_id, name, city in matches
+            ]
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name=name,
+                type=OpenApiTypes.FLOAT,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description=description,
+            )
+            for name, description in (
+                ("lat", "Latitude in degrees. Example: ?lat=50.45"),
+                ("lon", "Longitude in degrees. Example: ?lon=30.52"),
+            )
+        ]
+        + [
+            OpenApiParameter(
+                name="limit",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description=f"Number of airports, at most {NEAREST_MAX_LIMIT}.",
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False, url_path="nearest")
+    def nearest(self, request):
+        """Closest airports to ?lat=&lon=, with great-circle distance in km."""
+        params = request.query_params
+        try:
+            latitude = float(params["lat"])
+            longitude = float(params["lon"])
+        except (KeyError, ValueError):
+            raise ValidationError({"lat": "lat and lon must be numbers."})
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValidationError({"lat": "Coordinates out of range."})
+        try:
+            limit = int(params.get("limit", 5))
+        except ValueError:
+            limit = 5
+        limit = max(1, min(limit, NEAREST_MAX_LIMIT))
+
+        tree = get_tree()
+        result = []
+        for airport_id, distance in tree.nearest(latitude, longitude, limit):
+            name, city, airport_latitude, airport_longitude = tree.details[airport_id]
+            result.append(
+                {
+                    "id": airport_id,
+                    "name": name,
+                    "closest_big_city": city,
+                    "latitude": airport_latitude,
+                    "longitude": airport_longitude,
+                    "distance_km": round(distance, 1),
+                }
+            )
+        return Response(result)
+
+
+class RouteViewSet(
+    BatchCreateMixin,
+    BatchRetrieveMixin,
+    SparseFieldsetMixin,
+    StreamingListMixin,
+    FastListMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
+):
+    """Routes between two airports, with their distance."""
 
-class RouteViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, GenericViewSet):
     queryset = Route.objects.all()
     serializer_class = RouteSerializer
+    batch_queryset = Route.objects.all()
+    expandable = {
+        "source": Expand(
+            AirportSerializer, Shape(only=("source",), select=("source",))
+        ),
+        "destination": Expand(
+            AirportSerializer, Shape(only=("destination",), select=("destination",))
+        ),
+    }
     authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
 
 class AirplaneTypeViewSet(
-    mixins.CreateModelMixin, mixins.ListModelMixin, GenericViewSet
+    SparseFieldsetMixin,
+    StreamingListMixin,
+    FastListMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
 ):
+    """Kinds of airplanes flown on the routes."""
+
     queryset = AirplaneType.objects.all()
     serializer_class = AirplaneTypeSerializer
     authentication_classes = (TokenAuthentication,)
@@ -52,13 +232,28 @@ class AirplaneTypeViewSet(
 
 @extend_schema()
 class AirplaneViewSet(
+    BatchCreateMixin,
+    BatchRetrieveMixin,
+    SparseFieldsetMixin,
+    StreamingListMixin,
+    FastListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     GenericViewSet,
 ):
+    """Airplanes with their seat layout and image."""
+
     queryset = Airplane.objects.all()
     serializer_class = AirplaneSerializer
+    batch_queryset = Airplane.objects.select_related("airplane_type")
+    batch_serializer_class = AirplaneDetailSerializer
+    expandable = {
+        "airplane_type": Expand(
+            AirplaneTypeSerializer,
+            Shape(only=("airplane_type",), select=("airplane_type",)),
+        ),
+    }
     authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
@@ -72,7 +267,9 @@ class AirplaneViewSet(
             queryset = queryset.filter(airplane_type_id=airplane_type_id)
 
         if capacity:
-            queryset = [plane for plane in queryset if plane.capacity >= int(capacity)]
+            queryset = queryset.alias(total_seats=F("rows") * F("seats_in_row")).filter(
+                total_seats__gte=int(capacity)
+            )
 
         return queryset
 
@@ -111,6 +308,7 @@ class AirplaneViewSet(
         permission_classes=[IsAdminUser],
     )
     def upload_image(self, request, pk=None):
+        """Upload an image of the airplane."""
         airplane = self.get_object()
         serializer = self.get_serializer(airplane, data=request.data)
 
@@ -120,12 +318,41 @@ class AirplaneViewSet(
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CrewViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, GenericViewSet):
+class CrewViewSet(
+    BatchCreateMixin,
+    SparseFieldsetMixin,
+    StreamingListMixin,
+    FastListMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
+):
+    """Crew members assigned to flights."""
+
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
     authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
+    def get_serializer_class(self):
+        if self.action == "roster":
+            return FlightListSerializer
+        return CrewSerializer
+
+    @action(methods=["GET"], detail=True, url_path="roster")
+    def roster(self, request, pk=None):
+        """Upcoming flights the crew member is assigned to."""
+        crew = self.get_object()
+        flights = (
+            Flight.objects.filter(crew=crew, arrival_time__gt=now())
+            .select_related("route__source", "route__destination", "airplane")
+            .prefetch_related("crew")
+            .annotate(tickets_available=TICKETS_AVAILABLE)
+            .order_by("departure_time")
+        )
+        serializer = self.get_serializer(flights, many=True)
+        return Response(serializer.data)
+
 
 @extend_schema(
     parameters=[
@@ -147,24 +374,67 @@ class CrewViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, GenericViewSet
             location=OpenApiParameter.QUERY,
             description="Return only flights departing on or after this time. Example: ?departure_after=2025-01-01T10:00:00Z",
         ),
+        OpenApiParameter(
+            name="limit",
+            type=OpenApiTypes.INT,
+            location=OpenApiParameter.QUERY,
+            description="Rows per page, capped by the server (lower without "
+            "route_id, airplane_id or departure_after). X-Page-Size gives the "
+            "limit applied and X-Next-Offset is sent when more follow.",
+        ),
+        OpenApiParameter(
+            name="offset",
+            type=OpenApiTypes.INT,
+            location=OpenApiParameter.QUERY,
+            description="Rows to skip. Example: ?limit=50&offset=100",
+        ),
     ]
 )
-class FlightViewSet(ModelViewSet):
-    queryset = (
-        Flight.objects.all()
-        .select_related("route", "airplane")
-        .annotate(
-            tickets_available=(
-                F("airplane__rows") * F("airplane__seats_in_row") - Count("tickets")
-            )
-        )
-    )
+class FlightViewSet(
+    BatchCreateMixin,
+    BatchRetrieveMixin,
+    BoardingPassMixin,
+    QueryGuardMixin,
+    CoalescedListMixin,
+    SparseFieldsetMixin,
+    StreamingListMixin,
+    FastListMixin,
+    ModelViewSet,
+):
+    """Scheduled flights with the number of seats still free."""
+
+    queryset = Flight.objects.all().select_related("route", "airplane")
     serializer_class = FlightSerializer
     authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    coalescer = flight_lists
+    selective_filters = ("route_id", "airplane_id", "departure_after")
+    batch_queryset = Flight.objects.select_related(
+        "route", "airplane"
+    ).prefetch_related("crew", "tickets")
+    batch_serializer_class = FlightDetailSerializer
+    field_shapes = {
+        "route": Shape(
+            only=(
+                "route__source__name",
+                "route__source__closest_big_city",
+                "route__destination__name",
+            ),
+            select=("route__source", "route__destination"),
+        ),
+        "airplane": Shape(only=("airplane__name",), select=("airplane",)),
+        "tickets_available": Shape(annotate={"tickets_available": TICKETS_AVAILABLE}),
+    }
+    expandable = {
+        "route": Expand(RouteSerializer, Shape(only=("route",), select=("route",))),
+        "airplane": Expand(
+            AirplaneSerializer, Shape(only=("airplane",), select=("airplane",))
+        ),
+        "crew": Expand(CrewSerializer, Shape(prefetch=("crew",)), many=True),
+    }
 
     def get_queryset(self):
-        queryset = self.queryset
+        queryset = super().get_queryset()
 
         route_id = self.request.query_params.get("route_id")
         airplane_id = self.request.query_params.get("airplane_id")
@@ -180,6 +450,18 @@ class FlightViewSet(ModelViewSet):
             dep_time = timezone.datetime.fromisoformat(departure_after)
             queryset = queryset.filter(departure_time__gte=dep_time)
 
+        if is_sparse_request(self.request):
+            # The field shapes add the free seat count only when asked for
+            return queryset
+
+        queryset = queryset.annotate(tickets_available=TICKETS_AVAILABLE)
+        if self.action == "list":
+            # Route names and crew of every row; streamed lists read them
+            # per chunk, as iterator(chunk_size=...) prefetches per chunk
+            queryset = queryset.select_related(
+                "route__source", "route__destination"
+            ).prefetch_related("crew")
+
         return queryset
 
     def get_serializer_class(self):
@@ -189,18 +471,102 @@ class FlightViewSet(ModelViewSet):
             return FlightDetailSerializer
         return FlightSerializer
 
+    def get_batch_context(self, items):
+        parse = serializers.DateTimeField().to_internal_value
+        windows = []
+        for item in items:
+            try:
+                windows.append(
+                    (parse(item["departure_time"]), parse(item["arrival_time"]))
+                )
+            except (KeyError, TypeError, ValidationError):
+                continue
+        return {"conflict_indexes": indexes_covering(windows)}
+
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="last_event_id",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description="Resume after this event id (same as the "
+                "Last-Event-ID header). Example: ?last_event_id=42",
+            ),
+        ]
+    )
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="seats/stream",
+        renderer_classes=[EventStreamRenderer, JSONRenderer],
+    )
+    def seats_stream(self, request, pk=None):
+        """Server-Sent Events feed of seats taken and released on a flight."""
+        flight = get_object_or_404(Flight.objects.only("id"), pk=pk)
+        last_event_id = request.META.get(
+            LAST_EVENT_ID_HEADER, request.query_params.get("last_event_id", "0")
+        )
+        try:
+            last_event_id = int(last_event_id)
+        except ValueError:
+            last_event_id = 0
+        response = StreamingHttpResponse(
+            event_stream(flight.id, last_event_id), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
 
-class OrderViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, GenericViewSet):
-    queryset = Order.objects.prefetch_related("tickets", "tickets__flight")
+class ScheduleViewSet(ModelViewSet):
+    queryset = Schedule.objects.select_related("route", "airplane").prefetch_related(
+        "crew"
+    )
+    serializer_class = ScheduleSerializer
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAdminUser,)
+
+    # A timetable clashing with other flights is rejected as a whole
+    @transaction.atomic
+    def perform_create(self, serializer):
+        generate_flights(serializer.save())
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        generate_flights(serializer.save())
+
+    @action(methods=["POST"], detail=True, url_path="generate")
+    def generate(self, request, pk=None):
+        """Regenerate the future flights of this schedule."""
+        return Response(generate_flights(self.get_object()), status=status.HTTP_200_OK)
+
+
+class OrderViewSet(
+    IdempotentCreateMixin,
+    QueuedCreateMixin,
+    QueryGuardMixin,
+    SparseFieldsetMixin,
+    StreamingListMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
+):
+    """Orders of the current user and the tickets bought with them."""
+
+    queryset = Order.objects.prefetch_related(
+        "tickets", "tickets__flight", "archived_tickets"
+    )
     serializer_class = OrderSerializer
     authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
+    field_shapes = {"tickets": Shape(prefetch=("tickets", "archived_tickets"))}
+
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        return super().get_queryset().filter(user=self.request.user)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -209,3 +575,106 @@ class OrderViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, GenericViewSe
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+
+class OrderRequestViewSet(
+    mixins.RetrieveModelMixin, mixins.ListModelMixin, GenericViewSet
+):
+    """Status of orders queued with ``Prefer: respond-async``."""
+
+    queryset = OrderRequest.objects.all()
+    serializer_class = OrderRequestSerializer
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return super().get_queryset().filter(user=self.request.user)
+
+
+class SeatHoldViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.DestroyModelMixin,
+    GenericViewSet,
+):
+    """Seats reserved for a few minutes while the user checks out."""
+
+    queryset = SeatHold.objects.all()
+    serializer_class = SeatHoldSerializer
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+
+    def get_queryset(self):
+        return (
+            super().get_queryset().filter(user=self.request.user, expires_at__gt=now())
+        )
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @extend_schema(request=SeatHoldCheckoutSerializer, responses={201: OrderSerializer})
+    @action(methods=["POST"], detail=False, url_path="checkout")
+    def checkout(self, request):
+        """Convert active holds (all, or the ids in "holds") into one order."""
+        serializer = SeatHoldCheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order = checkout_holds(request.user, serializer.validated_data.get("holds"))
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+
+class RequestProfileViewSet(ReadOnlyModelViewSet):
+    """Profiles recorded for staff requests sent with ``X-Profile``."""
+
+    queryset = RequestProfile.objects.defer("stats")
+    serializer_class = RequestProfileSerializer
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(responses={(200, "application/octet-stream"): OpenApiTypes.BINARY})
+    @action(methods=["GET"], detail=True, url_path="download")
+    def download(self, request, pk=None):
+        """cProfile stats of the request, readable by pstats or snakeviz."""
+        profile = get_object_or_404(RequestProfile.objects.only("stats"), pk=pk)
+        response = HttpResponse(
+            bytes(profile.stats), content_type="application/octet-stream"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="request-profile-{profile.id}.prof"'
+        )
+        return response
+
+
+class SyncViewSet(ViewSet):
+    """
+    Airports, routes, airplanes, crew and flights changed or deleted since
+    the client's last sync, for clients keeping a local copy.
+    """
+
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="cursor",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="Cursor returned by the previous sync. Without "
+                "one (or with one too old) everything is sent with reset: true.",
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description="Rows per kind, capped by the server. has_more "
+                "asks for another call with the returned cursor.",
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    def list(self, request):
+        page_size = getattr(settings, "AIRPORT_SYNC_PAGE_SIZE", 500)
+        limit = get_int_param(request, "limit", page_size) or page_size
+        return Response(
+            changes_since(request.query_params.get("cursor"), min(limit, page_size))
+        )
@@ -27,9 +27,11 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 
 # SECURITY WARNING: don't run with debug turned on in production!
 
-DEBUG = True
+DEBUG = os.getenv("DJANGO_DEBUG", "true").lower() in ("1", "true", "yes")
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [
+    host for host in os.getenv("DJANGO_ALLOWED_HOSTS", "").split(",") if host
+]
 
 load_dotenv()
 
@@ -51,12 +53,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "airport.traffic.TrafficCaptureMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "airport.profiling.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "airport_service.urls"
@@ -94,6 +98,22 @@ DATABASES = {
     }
 }
 
+# The flight list cache and its version, background refresh claims,
+# autocomplete and nearest-airport index versions and query timeout
+# counters all live in the default cache. serve runs every worker in its
+# own process, so they only take effect across workers with a shared
+# cache: set REDIS_URL (docker-compose does). Without it each process
+# keeps its own local-memory cache, which suits runserver and tests.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -153,6 +173,18 @@ REST_FRAMEWORK = {
         "user": "30/minute",  # 30 requests per minute for authorized
     },
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # MessagePack alongside JSON, picked by Accept and Content-Type
+    "DEFAULT_RENDERER_CLASSES": (
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "airport.msgpack_format.MessagePackRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "rest_framework.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+        "airport.msgpack_format.MessagePackParser",
+    ),
 }
 
 SPECTACULAR_SETTINGS = {
@@ -167,3 +199,109 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
 }
+
+# Serve list endpoints through precompiled column plans (airport.fastpath)
+AIRPORT_FAST_LIST = os.getenv("AIRPORT_FAST_LIST", "false").lower() == "true"
+
+# Rows fetched, serialized and flushed per chunk for ?stream=true lists
+AIRPORT_STREAM_CHUNK_SIZE = 500
+
+# How long a stored response is replayed for a repeated Idempotency-Key
+AIRPORT_IDEMPOTENCY_TTL = timedelta(hours=24)
+
+# Queue every order for process_order_queue instead of only those sent
+# with "Prefer: respond-async"
+AIRPORT_ASYNC_ORDERS = False
+
+# Seat-map Server-Sent Events: poll interval, idle heartbeat and maximum
+# connection length in seconds (clients resume with Last-Event-ID), and
+# how long new events are held back so slower transactions with lower
+# event ids commit first
+AIRPORT_SSE_POLL_INTERVAL = 1.0
+AIRPORT_SSE_HEARTBEAT = 15
+AIRPORT_SSE_MAX_DURATION = 300
+AIRPORT_SSE_LAG = 2
+
+# How long a seat hold reserves a seat before release_expired_holds frees it
+AIRPORT_SEAT_HOLD_TTL = timedelta(minutes=10)
+
+# Seconds before a worker rebuilds its airport autocomplete index even
+# without a change signalled through the cache
+AIRPORT_AUTOCOMPLETE_MAX_AGE = 300
+
+# OpenAPI schema written by build_schema and served by /api/schema/; set to
+# None to introspect once per process at the first request instead
+AIRPORT_SCHEMA_FILE = BASE_DIR / "openapi.json"
+
+# archive_flights moves flights that landed longer ago than this, with
+# their tickets, into the (partitioned on PostgreSQL) archive tables
+AIRPORT_ARCHIVE_AFTER = timedelta(days=30)
+
+# Relative difference allowed between a route's declared distance and the
+# great-circle distance between its airports' coordinates
+AIRPORT_ROUTE_DISTANCE_TOLERANCE = 0.15
+
+# Seconds before a worker rebuilds its nearest-airport index even without
+# a change signalled through the cache
+AIRPORT_GEO_INDEX_MAX_AGE = 300
+
+# Let staff profile single requests with X-Profile: <rate> or ?profile=<rate>
+# (see airport.profiling); when False the middleware is not loaded at all
+AIRPORT_PROFILING = True
+AIRPORT_PROFILING_KEEP = 100
+
+# Cache, coalesce and serve stale flight lists (airport.coalescing): fresh
+# for AIRPORT_FLIGHT_LIST_FRESH seconds, then served stale while one
+# background refresh runs until AIRPORT_FLIGHT_LIST_STALE; entries are
+# kept for AIRPORT_FLIGHT_LIST_STALE_IF_ERROR to ride out database outages
+AIRPORT_FLIGHT_LIST_CACHE = (
+    os.getenv("AIRPORT_FLIGHT_LIST_CACHE", "false").lower() == "true"
+)
+AIRPORT_FLIGHT_LIST_FRESH = 5
+AIRPORT_FLIGHT_LIST_STALE = 300
+AIRPORT_FLIGHT_LIST_STALE_IF_ERROR = 3600
+
+# Consecutive failed or slow (seconds) flight list queries that open the
+# circuit breaker, and how long it stays open before a trial query
+AIRPORT_DB_BREAKER_FAILURES = 5
+AIRPORT_DB_BREAKER_SLOW = 2.0
+AIRPORT_DB_BREAKER_COOLDOWN = 30
+
+# Sample this fraction of API requests into AIRPORT_TRAFFIC_CAPTURE_FILE
+# (JSONL, credentials and personal data redacted) for replay_traffic;
+# unset disables capture
+AIRPORT_TRAFFIC_CAPTURE_FILE = os.getenv("AIRPORT_TRAFFIC_CAPTURE_FILE") or None
+AIRPORT_TRAFFIC_SAMPLE_RATE = float(os.getenv("AIRPORT_TRAFFIC_SAMPLE_RATE", "0.01"))
+# Larger request bodies are captured without the body
+AIRPORT_TRAFFIC_MAX_BODY = 64 * 1024
+
+# Boarding passes (airport.boarding_passes): TrueType font (None uses
+# Pillow's built-in one), size of render_boarding_passes' process pool
+# (None: one per CPU; the API renders in its own process), smallest batch
+# sent to the pool and how long rendered passes and archives are cached
+AIRPORT_BOARDING_PASS_FONT = None
+AIRPORT_BOARDING_PASS_WORKERS = None
+AIRPORT_BOARDING_PASS_POOL_MIN = 32
+AIRPORT_BOARDING_PASS_CACHE_TTL = 24 * 60 * 60
+
+# Query cost guards (airport.query_guards) on the flight and order
+# endpoints: statement timeouts in ms per "<basename>-<action>" with a
+# default, rows per list page, rows for lists not narrowed by an indexed
+# filter, deepest ?offset= and the Retry-After sent with a timeout 503.
+# Responses carry the page size applied in X-Page-Size
+AIRPORT_STATEMENT_TIMEOUTS = {
+    "default": 5000,
+    "flight-list": 2000,
+    "order-list": 2000,
+}
+AIRPORT_MAX_PAGE_SIZE = 1000
+AIRPORT_SCAN_PAGE_SIZE = 100
+AIRPORT_MAX_OFFSET = 10000
+AIRPORT_QUERY_TIMEOUT_RETRY_AFTER = 5
+
+# Delta sync (airport.sync): rows per kind per call, seconds of recent
+# writes held back so late commits are not skipped, and seconds tombstones
+# are kept (older cursors get a full resync; see purge_sync_tombstones)
+AIRPORT_SYNC_PAGE_SIZE = 500
+AIRPORT_SYNC_LAG = 5
+AIRPORT_SYNC_TOMBSTONE_TTL = 30 * 24 * 60 * 60
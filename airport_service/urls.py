@@ -20,8 +20,8 @@ from django.urls import path, include
 from drf_spectacular.views import (
     SpectacularSwaggerView,
     SpectacularRedocView,
-    SpectacularAPIView,
 )
+from airport.schema import PrecomputedSchemaView
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -31,7 +31,7 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/airport/", include("airport.urls", namespace="airport")),
     path("api/user/", include("user.urls", namespace="user")),
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    path("api/schema/", PrecomputedSchemaView.as_view(), name="schema"),
     path(
         "api/doc/swagger/",
         SpectacularSwaggerView.as_view(url_name="schema"),
@@ -1,5 +1,10 @@
 from django.urls import path
-from user.views import CreateUserView, CreateTokenView, ManageUserView
+from user.views import (
+    CreateUserView,
+    CreateTokenView,
+    ManageUserView,
+    TravelStatsView,
+)
 
 app_name = "user"
 
@@ -7,4 +12,5 @@ urlpatterns = [
     path("register/", CreateUserView.as_view(), name="create"),
     path("login/", CreateTokenView.as_view(), name="login"),
     path("me/", ManageUserView.as_view(), name="manage"),
+    path("me/stats/", TravelStatsView.as_view(), name="travel-stats"),
 ]
@@ -4,6 +4,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from airport.serializers import TravelStatsSerializer
+from airport.travel_stats import get_stats
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
@@ -23,3 +25,14 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
 
     def get_object(self):
         return self.request.user
+
+
+class TravelStatsView(generics.RetrieveAPIView):
+    """Flights taken, distance flown and most visited airports of the user."""
+
+    serializer_class = TravelStatsSerializer
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get_object(self):
+        return get_stats(self.request.user)